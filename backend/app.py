@@ -1,12 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, session
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 from flask_session import Session
 from dotenv import load_dotenv
 import os
 import logging
 from datetime import timedelta
 import redis
+import click
+import time
 
 # Load environment variables
 load_dotenv()
@@ -60,12 +62,20 @@ CORS(app, resources={
 })
 
 # Initialize SocketIO with CORS
+# SOCKETIO_ASYNC_MODE must match the server: 'threading' (dev server, gunicorn gthread)
+# or 'eventlet' (gunicorn eventlet workers). With several workers or nodes, set
+# SOCKETIO_MESSAGE_QUEUE (e.g. redis://redis:6379/1) so emits reach clients
+# connected to other processes. Only the WebSocket transport is accepted by
+# default: a WebSocket stays on the worker that accepted it, whereas long-polling
+# requests would have to be routed back to the same worker (SOCKETIO_TRANSPORTS).
 socketio = SocketIO(app, cors_allowed_origins=[
     "http://localhost:3000",
     "http://127.0.0.1:3000",
     "https://moodhdj.shop",
     "http://moodhdj.shop"
-], async_mode='threading')
+], async_mode=os.getenv('SOCKETIO_ASYNC_MODE', 'threading'),
+   message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE') or None,
+   transports=[t.strip() for t in os.getenv('SOCKETIO_TRANSPORTS', 'websocket').split(',') if t.strip()])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -81,28 +91,160 @@ app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(mood_bp, url_prefix='/api/mood')
 app.register_blueprint(music_bp, url_prefix='/api/music')
 
-# Health check endpoint (for ALB/ECS health checks)
+# Read-your-writes with read replicas: after a user writes, their reads stay on the primary
+@app.before_request
+def set_db_request_context():
+    from config.database import set_read_context
+    from config.query_stats import start_request
+    set_read_context(session.get('db_user_id'))
+    start_request()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+# Per-route latency histogram (rule pattern, not the raw path, to bound label cardinality)
+@app.after_request
+def record_request_latency(response):
+    from services import metrics
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route, status=response.status_code
+        )
+    return response
+
+# Report time spent in the database for each request
+@app.after_request
+def add_db_time_header(response):
+    from config.query_stats import request_totals
+    totals = request_totals()
+    if totals is not None:
+        response.headers['X-DB-Time'] = f"{totals['time'] * 1000:.1f}ms"
+        response.headers['X-DB-Queries'] = str(totals['queries'])
+    return response
+
+@app.teardown_request
+def clear_db_request_context(exc):
+    from config.query_stats import end_request
+    end_request()
+
+# Health check endpoint (status and pool/query stats; always 200 - use
+# /api/health/ready for load balancer checks)
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint for load balancer"""
-    return jsonify({'status': 'healthy', 'service': 'mooddj-backend'}), 200
+    from config.database import get_pool_stats, get_query_stats
+
+    return jsonify({
+        'status': 'healthy',
+        'service': 'mooddj-backend',
+        'db_pool': get_pool_stats(),
+        'db_queries': get_query_stats(top=10)
+    }), 200
+
+# Liveness: the process is up and serving requests (no dependency checks)
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe for the container orchestrator"""
+    return jsonify({'status': 'alive'}), 200
+
+def _build_health_checker():
+    from services.health import HealthChecker
+    from config.database import execute_query
+    from routes.mood_routes import mood_detector
+
+    checker = HealthChecker()
+    checker.register('database', lambda: execute_query("SELECT 1", fetch=True))
+    checker.register('detector', mood_detector.warm_up)
+    if session_type == 'redis':
+        checker.register('session_store', app.config['SESSION_REDIS'].ping)
+    if os.getenv('SOCKETIO_MESSAGE_QUEUE', '').startswith('redis'):
+        message_queue = redis.from_url(os.getenv('SOCKETIO_MESSAGE_QUEUE'), socket_timeout=2)
+        checker.register('message_queue', message_queue.ping)
+    return checker
+
+health_checker = _build_health_checker()
+
+# Readiness: only route traffic here while MySQL, Redis and the detector are usable
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe for the load balancer (dependency results cached for HEALTH_CACHE_TTL seconds)"""
+    result = health_checker.check()
+
+    return jsonify({
+        'status': 'ready' if result['ready'] else 'unavailable',
+        **result
+    }), 200 if result['ready'] else 503
+
+# Prometheus scrape endpoint
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Application metrics in the Prometheus text format"""
+    from services import metrics
+
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # WebSocket event handlers
+def user_room(user_id):
+    """Socket.IO room shared by all of a user's connections (tabs, devices)"""
+    return f'user:{user_id}'
+
+def _fetch_playback(user_id, token_info):
+    """Playback watcher poll: (playback, refreshed token) or (None, None) if re-login is needed"""
+    from routes.music_routes import spotify_service
+    token_info = spotify_service.get_valid_token(user_id, token_info)
+    if not token_info:
+        return None, None
+    sp_client = spotify_service.create_spotify_client(token_info, user_id)
+    return spotify_service.get_current_playback(sp_client), token_info
+
+from services.playback_watcher import playback_watcher
+playback_watcher.init_app(socketio, _fetch_playback, user_room)
+
 @socketio.on('connect')
 def handle_connect():
+    from services import metrics
+    metrics.SOCKETIO_CONNECTIONS.inc()
     logger.info(f'Client connected: {request.sid}')
-    emit('connection_response', {'status': 'connected'})
+    # Authenticated clients join their own room, identified by the session
+    # cookie sent with the handshake (never by client-supplied data)
+    user_id = session.get('user_id')
+    if user_id:
+        join_room(user_room(user_id))
+    emit('connection_response', {'status': 'connected', 'authenticated': bool(user_id)})
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    from services import metrics
+    metrics.SOCKETIO_CONNECTIONS.dec()
+    playback_watcher.unsubscribe(request.sid)
     logger.info(f'Client disconnected: {request.sid}')
 
 @socketio.on('mood_update')
 def handle_mood_update(data):
     """Handle mood updates from frontend"""
     logger.info(f'Mood update received: {data}')
-    # Broadcast to all connected clients
-    emit('mood_changed', data, broadcast=True)
+    # Only the sender's own connections receive it (just this socket if not logged in)
+    user_id = session.get('user_id')
+    emit('mood_changed', data, to=user_room(user_id) if user_id else request.sid)
+
+@socketio.on('watch_playback')
+def handle_watch_playback(data=None):
+    """Push 'playback_state' to this user's room instead of the client polling /api/music/current"""
+    user_id = session.get('user_id')
+    token_info = session.get('spotify_token_info')
+    if not user_id or not token_info:
+        emit('playback_state', {'playback': None, 'error': 'reauthenticate'})
+        return
+    playback_watcher.subscribe(user_id, request.sid, token_info)
+
+@socketio.on('unwatch_playback')
+def handle_unwatch_playback(data=None):
+    """Stop playback updates for this socket"""
+    playback_watcher.unsubscribe(request.sid)
 
 @socketio.on('start_detection')
 def handle_start_detection(data):
@@ -171,6 +313,57 @@ def check_and_sync_library():
         logger.info("   Backend will continue without auto-sync")
         logger.info("   You can manually sync by calling POST /api/music/sync")
 
+# Schema command: flask --app app db-migrate
+@app.cli.command('db-migrate')
+@click.option('--target', type=int, default=None, help='Stop after this migration version')
+@click.option('--dry-run', is_flag=True, help='List pending migrations without applying them')
+@click.option('--fake', is_flag=True, help='Record pending migrations as applied without running them')
+def db_migrate_command(target, dry_run, fake):
+    """Apply pending migrations from backend/migrations"""
+    from config.migrations import migrate
+
+    migrations = migrate(target=target, dry_run=dry_run, fake=fake)
+    if not migrations:
+        logger.info("Schema is up to date")
+    for migration in migrations:
+        action = 'Pending' if dry_run else ('Recorded' if fake else 'Applied')
+        logger.info(f"{action} {migration['version']:03d}_{migration['name']}")
+
+# Maintenance command: flask --app app reclassify-moods
+@app.cli.command('reclassify-moods')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows classified per pass')
+def reclassify_moods_command(batch_size):
+    """Recompute user_songs.mood_id after the mood thresholds change"""
+    from services.mood_classifier import reclassify_user_songs
+
+    result = reclassify_user_songs(batch_size=batch_size)
+    logger.info(f"Reclassified {result['scanned']} songs, {result['updated']} changed")
+
+# Maintenance command: flask --app app mood-retention (run daily from cron)
+@app.cli.command('mood-retention')
+@click.option('--days', type=int, default=None, help='Keep raw mood events this many days (MOOD_RETENTION_DAYS)')
+@click.option('--months-ahead', type=int, default=None, help='Monthly partitions to create in advance')
+def mood_retention_command(days, months_ahead):
+    """Create upcoming mood_sessions partitions and drop expired ones"""
+    from services import mood_retention
+
+    result = mood_retention.run_retention(
+        retention_days=days if days is not None else mood_retention.RETENTION_DAYS,
+        months_ahead=months_ahead if months_ahead is not None else mood_retention.MONTHS_AHEAD
+    )
+    logger.info(f"Created {len(result['created'])} partitions, dropped {len(result['dropped'])}")
+
+# Maintenance command: flask --app app gc-songs
+@app.cli.command('gc-songs')
+@click.option('--batch-size', type=int, default=None, help='Songs deleted per chunk (ORPHAN_GC_BATCH_SIZE)')
+@click.option('--pause', type=float, default=0.0, show_default=True, help='Seconds to sleep between chunks')
+def gc_songs_command(batch_size, pause):
+    """Delete songs that are no longer in any user's library"""
+    from services import orphan_gc
+
+    deleted = orphan_gc.collect_orphan_songs(batch_size or orphan_gc.BATCH_SIZE, pause=pause)
+    logger.info(f"Removed {deleted} orphaned songs")
+
 if __name__ == '__main__':
     logger.info('Starting MoodDJ Backend Server...')
     logger.info('-'*70)
@@ -1,8 +1,16 @@
 import mysql.connector
 from mysql.connector import pooling
+import contextvars
+import itertools
 import os
+import threading
+import time
+from contextlib import contextmanager
+import redis
 from dotenv import load_dotenv
 
+from config.query_stats import query_stats
+
 # Load environment variables
 load_dotenv()
 
@@ -16,56 +24,637 @@ DB_CONFIG = {
     'connection_timeout': 100
 }
 
-# Connection pool configuration (separate from connection config)
-POOL_CONFIG = {
-    **DB_CONFIG,
-    'pool_name': 'mooddj_pool',
-    'pool_size': 5,
-    'pool_reset_session': True
-}
+# Connection pool sizing (tune for SocketIO/thread concurrency)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))                # persistent pooled connections
+POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '5'))  # extra short-lived connections under load
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))        # seconds to wait for a free connection
+
+# Read replicas: comma-separated host[:port] list, same user/password/database as the primary
+READ_REPLICAS = [h.strip() for h in os.getenv('DB_READ_REPLICAS', '').split(',') if h.strip()]
+READ_STICKY_SECONDS = float(os.getenv('DB_READ_STICKY_SECONDS', '5'))  # reads stay on the primary after a write
+# Where those pins are kept so every worker/node sees them (in-process when unset)
+READ_STICKY_REDIS = (os.getenv('DB_READ_STICKY_REDIS')
+                     or (os.getenv('SESSION_REDIS', 'redis://localhost:6379') if os.getenv('SESSION_TYPE') == 'redis' else None)
+                     or (os.getenv('SOCKETIO_MESSAGE_QUEUE') if os.getenv('SOCKETIO_MESSAGE_QUEUE', '').startswith('redis') else None))
+REPLICA_COOLDOWN = float(os.getenv('DB_REPLICA_COOLDOWN', '30'))      # seconds a failed replica is skipped
+
+# Errors that mean the server (not the query) is the problem
+CONNECTION_ERRORS = (mysql.connector.errors.InterfaceError,
+                     mysql.connector.errors.OperationalError,
+                     mysql.connector.errors.PoolError)
+
+
+class PoolTimeoutError(mysql.connector.errors.PoolError):
+    """Raised when no connection becomes free within the checkout timeout"""
+
+
+class PooledConnection:
+    """
+    Connection checked out from a ConnectionPool
+
+    Behaves like the underlying MySQL connection; close() hands the slot back
+    to the pool (and closes the connection if it was an overflow connection).
+    """
+
+    def __init__(self, conn, pool, overflow=False, wait_time=0.0):
+        self._conn = conn
+        self._pool = pool
+        self._overflow = overflow
+        self._released = False
+        self.wait_time = wait_time  # seconds spent waiting for this checkout
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._conn.close()
+        finally:
+            self._pool._release(self._overflow)
+
+    def invalidate(self):
+        """
+        Hand the slot back without reading anything the server is still sending
+
+        Closes the socket (e.g. after abandoning a streaming result) instead of
+        draining it; a pooled connection reconnects on its next checkout.
+        """
+        if self._released:
+            return
+        self._released = True
+        try:
+            raw = self._conn._cnx if isinstance(self._conn, pooling.PooledMySQLConnection) else self._conn
+            raw.shutdown()
+            try:
+                self._conn.close()
+            except Exception:
+                pass  # Resetting the closed session fails; the pool has taken it back regardless
+        finally:
+            self._pool._release(self._overflow)
+
+
+class ConnectionPool:
+    """
+    MySQL connection pool with blocking checkout, overflow and usage metrics
+
+    Up to pool_size connections are kept open by MySQLConnectionPool. When all
+    of them are busy, up to max_overflow extra connections are opened and
+    closed after use. Beyond that, checkouts wait up to `timeout` seconds for
+    a connection to be returned instead of failing immediately.
+    """
+
+    def __init__(self, db_config, pool_name='mooddj_pool', pool_size=POOL_SIZE,
+                 max_overflow=POOL_MAX_OVERFLOW, timeout=POOL_TIMEOUT):
+        if pool_size > pooling.CNX_POOL_MAXSIZE:
+            print(f"[WARN] DB_POOL_SIZE={pool_size} exceeds MySQL pool maximum of "
+                  f"{pooling.CNX_POOL_MAXSIZE}; extra connections become overflow")
+            max_overflow += pool_size - pooling.CNX_POOL_MAXSIZE
+            pool_size = pooling.CNX_POOL_MAXSIZE
+
+        self.db_config = db_config
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size + max_overflow)
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self._in_use = 0
+        self._overflow_in_use = 0
+        self._waiting = 0
+        self._peak_in_use = 0
+        self._checkouts = 0
+        self._overflow_checkouts = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def create(self):
+        """Create the underlying MySQLConnectionPool (retried lazily if it fails)"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = pooling.MySQLConnectionPool(
+                    **self.db_config,
+                    pool_name=self.pool_name,
+                    pool_size=self.pool_size,
+                    pool_reset_session=True
+                )
+        return self._pool
+
+    def get_connection(self):
+        """
+        Check out a connection, waiting up to `timeout` seconds for a free one
+
+        Returns:
+            PooledConnection: Connection to close() when done
+
+        Raises:
+            PoolTimeoutError: If no connection became free in time
+        """
+        start = time.monotonic()
+        with self._stats_lock:
+            self._waiting += 1
+
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - start
+
+        with self._stats_lock:
+            self._waiting -= 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+            if not acquired:
+                self._timeouts += 1
+
+        if not acquired:
+            raise PoolTimeoutError(
+                f"No database connection available after {self.timeout}s "
+                f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+            )
+
+        try:
+            conn, overflow = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self._in_use += 1
+            self._checkouts += 1
+            if overflow:
+                self._overflow_in_use += 1
+                self._overflow_checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        return PooledConnection(conn, self, overflow, waited)
+
+    def _checkout(self):
+        """Take a pooled connection, or open an overflow connection if the pool is exhausted"""
+        pool = self._pool or self.create()
+        try:
+            return pool.get_connection(), False
+        except mysql.connector.errors.PoolError:
+            return mysql.connector.connect(**self.db_config), True
+
+    def _release(self, overflow=False):
+        with self._stats_lock:
+            self._in_use -= 1
+            if overflow:
+                self._overflow_in_use -= 1
+        self._slots.release()
+
+    def stats(self):
+        """
+        Get pool usage metrics
+
+        Returns:
+            dict: Current and cumulative checkout metrics
+        """
+        with self._stats_lock:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'timeout': self.timeout,
+                'in_use': self._in_use,
+                'overflow_in_use': self._overflow_in_use,
+                'waiting': self._waiting,
+                'peak_in_use': self._peak_in_use,
+                'checkouts': self._checkouts,
+                'overflow_checkouts': self._overflow_checkouts,
+                'timeouts': self._timeouts,
+                'wait_time_total': round(self._wait_time_total, 6),
+                'wait_time_max': round(self._wait_time_max, 6),
+                'wait_time_avg': round(self._wait_time_total / self._checkouts, 6) if self._checkouts else 0.0
+            }
+
+
+class ReplicaSet:
+    """
+    Read replicas, each with its own ConnectionPool
+
+    Replicas are used round-robin. A replica that fails a checkout or loses
+    its connection is skipped for `cooldown` seconds and then tried again;
+    while none are healthy, reads go to the primary. A replica whose pool is
+    merely saturated (checkout timeout) stays in rotation; only the read that
+    timed out goes to the primary.
+    """
+
+    def __init__(self, endpoints, db_config, cooldown=REPLICA_COOLDOWN):
+        self.cooldown = cooldown
+        self.replicas = []
+        for index, endpoint in enumerate(endpoints):
+            host, _, port = endpoint.partition(':')
+            config = {**db_config, 'host': host, 'port': int(port) if port else db_config['port']}
+            self.replicas.append({
+                'endpoint': endpoint,
+                'pool': ConnectionPool(config, pool_name=f'mooddj_replica_{index}'),
+                'down_until': 0.0,
+                'failures': 0,
+                'saturated': 0,  # checkouts that timed out and read from the primary instead
+                'reads': 0
+            })
+        self._cycle = itertools.cycle(self.replicas) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Next healthy replica, or None if all are cooling down"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica['down_until'] <= now:
+                    replica['reads'] += 1
+                    return replica
+        return None
+
+    def mark_down(self, replica, error):
+        with self._lock:
+            replica['down_until'] = time.monotonic() + self.cooldown
+            replica['failures'] += 1
+        print(f"[WARN] Read replica {replica['endpoint']} unavailable ({error}); "
+              f"using primary for {self.cooldown:.0f}s")
+
+    def mark_saturated(self, replica):
+        with self._lock:
+            replica['saturated'] += 1
+
+    def stats(self):
+        now = time.monotonic()
+        return [
+            {
+                'endpoint': replica['endpoint'],
+                'healthy': replica['down_until'] <= now,
+                'reads': replica['reads'],
+                'failures': replica['failures'],
+                'saturated': replica['saturated'],
+                'pool': replica['pool'].stats()
+            }
+            for replica in self.replicas
+        ]
+
+
+class WriteTracker:
+    """
+    Per-user "reads must use the primary until" deadlines
+
+    Kept in Redis when a URL is given so a write served by one worker or node
+    pins the user's reads on all of them; otherwise kept in this process.
+    Deadlines are wall-clock times and only ever extended. After a Redis
+    error the store is skipped for `retry_after` seconds so an outage does
+    not add a socket timeout to every request.
+    """
+
+    KEY_PREFIX = 'mooddj:read-pin:'
+
+    def __init__(self, redis_url=None, max_size=10000, retry_after=5.0):
+        self.redis_url = redis_url
+        self.max_size = max_size
+        self.retry_after = retry_after
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._local = {}  # key -> deadline (no Redis, or Redis unavailable)
+        self._lock = threading.Lock()
+
+    def pin(self, key, seconds):
+        """Keep key's reads on the primary for the next `seconds` seconds"""
+        deadline = time.time() + seconds
+        client = self._client()
+        if client is not None:
+            name = f"{self.KEY_PREFIX}{key}"
+            try:
+                current = client.get(name)
+                if current is None or float(current) < deadline:
+                    client.set(name, repr(deadline), px=max(int(seconds * 1000), 1))
+                return
+            except redis.RedisError as e:
+                self._redis_failed()
+                print(f"[WARN] Read pin store unavailable, pinning in this process "
+                      f"for {self.retry_after:.0f}s: {e}")
+
+        with self._lock:
+            self._local[key] = max(deadline, self._local.get(key, 0))
+            if len(self._local) > self.max_size:
+                now = time.time()
+                for stale in [k for k, until in self._local.items() if until <= now]:
+                    del self._local[stale]
+
+    def is_pinned(self, key):
+        """Whether key's reads must currently go to the primary"""
+        now = time.time()
+        client = self._client()
+        if client is not None:
+            try:
+                value = client.get(f"{self.KEY_PREFIX}{key}")
+                if value is not None and float(value) > now:
+                    return True
+            except redis.RedisError:
+                self._redis_failed()  # Fall through to pins made in this process
+        with self._lock:
+            return self._local.get(key, 0) > now
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=1)
+        return self._redis
+
+    def _redis_failed(self):
+        self._redis_down_until = time.monotonic() + self.retry_after
+
 
 # Create connection pool
-connection_pool = None
+connection_pool = ConnectionPool(DB_CONFIG)
+replica_set = ReplicaSet(READ_REPLICAS, DB_CONFIG)
+write_tracker = WriteTracker(READ_STICKY_REDIS)
 try:
-    connection_pool = pooling.MySQLConnectionPool(**POOL_CONFIG)
-    print("[INFO] Database connection pool created successfully")
+    connection_pool.create()
+    print(f"[INFO] Database connection pool created successfully "
+          f"(size={connection_pool.pool_size}, overflow={connection_pool.max_overflow})")
 except mysql.connector.Error as err:
     print(f"[ERROR] Error creating connection pool: {err}")
     print(f"        Host: {DB_CONFIG['host']}")
     print(f"        User: {DB_CONFIG['user']}")
     print(f"        Database: {DB_CONFIG['database']}")
-    connection_pool = None
+    print("        Pool creation will be retried on first use")
+if replica_set.replicas:
+    print(f"[INFO] Routing read-only queries to {len(replica_set.replicas)} read replica(s)")
+
+# Read-your-writes: the request's user is set by app.before_request; when
+# they last wrote is kept by write_tracker and looked up at most once per
+# request ({'key': user, 'pinned': None until the first read})
+_read_context = contextvars.ContextVar('db_read_context', default=None)
+
+
+def set_read_context(key):
+    """Set the user whose writes the current request's reads must see (None to clear)"""
+    _read_context.set({'key': key, 'pinned': None} if key is not None else None)
+
+
+def mark_written(key=None, delay=0.0):
+    """
+    Record a write so that user's reads stay on the primary for DB_READ_STICKY_SECONDS
+
+    Args:
+        key: User key (defaults to the current request's read context)
+        delay: Seconds until the write actually reaches the database (a
+            buffered write); the reads are pinned for that long as well
+    """
+    context = _read_context.get()
+    if key is None and context is not None:
+        key = context['key']
+    if key is None or not replica_set.replicas:
+        return
+    write_tracker.pin(key, delay + READ_STICKY_SECONDS)
+    if context is not None and context['key'] == key:
+        context['pinned'] = True
+
+
+def _reads_pinned_to_primary():
+    context = _read_context.get()
+    if context is None:
+        return False
+    if context['pinned'] is None:
+        context['pinned'] = write_tracker.is_pinned(context['key'])
+    return context['pinned']
+
 
 def get_db_connection():
-    """Get a connection from the pool"""
-    if connection_pool:
-        return connection_pool.get_connection()
-    else:
-        # Fallback to direct connection
-        return mysql.connector.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            database=DB_CONFIG['database']
-        )
-
-def execute_query(query, params=None, fetch=False):
-    """Execute a query and return results if fetch=True"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    
+    """Get a connection from the pool (blocks up to DB_POOL_TIMEOUT seconds)"""
+    return connection_pool.get_connection()
+
+def get_read_connection():
+    """
+    Get a connection for a read-only query
+
+    Returns:
+        tuple: (connection, replica) - replica is None when the primary is used
+    """
+    if replica_set.replicas and not _reads_pinned_to_primary():
+        replica = replica_set.choose()
+        if replica:
+            try:
+                return replica['pool'].get_connection(), replica
+            except PoolTimeoutError:
+                # Busy, not broken: only this read falls back to the primary
+                replica_set.mark_saturated(replica)
+            except mysql.connector.Error as e:
+                replica_set.mark_down(replica, e)
+    return get_db_connection(), None
+
+def _wait_time(conn):
+    return getattr(conn, 'wait_time', 0.0)
+
+def get_query_stats(top=None):
+    """Get per-statement timings, highest total time first"""
+    return query_stats.snapshot(top)
+
+def get_pool_stats():
+    """Get connection pool usage metrics"""
+    stats = connection_pool.stats()
+    if replica_set.replicas:
+        stats['replicas'] = replica_set.stats()
+    return stats
+
+def _run_query(conn, query, params, fetch):
+    start = time.perf_counter()
+    rows = 0
+    error = False
+    try:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params or ())
+
+            if fetch:
+                result = cursor.fetchall()
+                rows = len(result)
+                return result
+            else:
+                conn.commit()
+                rows = cursor.rowcount
+                return cursor.lastrowid
+        except Exception as e:
+            error = True
+            conn.rollback()
+            raise e
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+        query_stats.record(query, time.perf_counter() - start, rows, _wait_time(conn), error)
+
+def execute_query(query, params=None, fetch=False, read_only=False):
+    """
+    Execute a query and return results if fetch=True
+
+    With read_only=True a SELECT may be served by a read replica (falling
+    back to the primary if the replica fails); writes always use the primary.
+    """
+    if read_only and fetch:
+        conn, replica = get_read_connection()
+        if replica is not None:
+            try:
+                return _run_query(conn, query, params, fetch)
+            except CONNECTION_ERRORS as e:
+                replica_set.mark_down(replica, e)
+        else:
+            return _run_query(conn, query, params, fetch)
+
+    result = _run_query(get_db_connection(), query, params, fetch)
+    if not fetch:
+        mark_written()
+    return result
+
+
+def stream_query(query, params=None, chunk_size=1000, read_only=False):
+    """
+    Stream a SELECT's rows in chunks without loading the whole result set
+
+    Uses an unbuffered cursor, so rows are read from the server as the
+    generator is consumed. The connection stays checked out until the
+    generator is exhausted or closed; closing it early drops the server
+    connection rather than reading the remaining rows. With read_only=True the rows may come
+    from a read replica.
+
+    Yields:
+        list: Up to chunk_size row dicts at a time
+    """
+    conn = get_read_connection()[0] if read_only else get_db_connection()
+    cursor = None
+    exhausted = False
+    elapsed = 0.0  # time spent in the database, not in the consumer
+    row_count = 0
+    error = False
+
     try:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        start = time.perf_counter()
         cursor.execute(query, params or ())
-        
-        if fetch:
-            result = cursor.fetchall()
-            return result
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            elapsed += time.perf_counter() - start
+            if not rows:
+                exhausted = True
+                break
+            row_count += len(rows)
+            yield rows
+            start = time.perf_counter()
+    except Exception:
+        error = True
+        raise
+    finally:
+        query_stats.record(query, elapsed, row_count, _wait_time(conn), error)
+        if cursor is not None and not exhausted:
+            # Consumer stopped early (e.g. the client disconnected): draining the
+            # unread rows would hold the connection for the rest of the result set
+            conn.invalidate()
         else:
-            conn.commit()
-            return cursor.lastrowid
-    except Exception as e:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            conn.close()
+
+
+class UnitOfWork:
+    """
+    Several statements on one connection and cursor, committed once
+
+    Created by transaction(); do not commit or close it yourself.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cursor = conn.cursor(dictionary=True)
+        self._wait_time = _wait_time(conn)  # reported with the first statement
+
+    @contextmanager
+    def _timed(self, query):
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            query_stats.record(query, time.perf_counter() - start, self.cursor.rowcount, self._wait_time, error)
+            self._wait_time = 0.0
+
+    def execute(self, query, params=None):
+        """Execute a statement and return its lastrowid"""
+        with self._timed(query):
+            self.cursor.execute(query, params or ())
+        return self.cursor.lastrowid
+
+    def executemany(self, query, seq_params):
+        """
+        Execute a statement for every parameter tuple
+
+        INSERT ... VALUES statements are sent as a single multi-row insert.
+
+        Returns:
+            int: Number of affected rows
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
+            return 0
+        with self._timed(query):
+            self.cursor.executemany(query, seq_params)
+        return self.cursor.rowcount
+
+    def fetchall(self, query, params=None):
+        """Execute a query and return all rows"""
+        with self._timed(query):
+            self.cursor.execute(query, params or ())
+            rows = self.cursor.fetchall()
+        return rows
+
+    def fetchone(self, query, params=None):
+        """Execute a query and return the first row (or None)"""
+        rows = self.fetchall(query, params)
+        return rows[0] if rows else None
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    def close(self):
+        self.cursor.close()
+
+
+@contextmanager
+def transaction():
+    """
+    Run several statements as one unit of work
+
+    Holds a single pooled connection and cursor, commits once when the block
+    exits and rolls back if it raises.
+
+    Usage:
+        with transaction() as tx:
+            tx.executemany(insert_query, rows)
+            ids = tx.fetchall(select_query, params)
+    """
+    conn = get_db_connection()
+    uow = None
+
+    try:
+        uow = UnitOfWork(conn)
+        yield uow
+        conn.commit()
+        mark_written()
+    except Exception:
         conn.rollback()
-        raise e
+        raise
     finally:
-        cursor.close()
+        if uow:
+            uow.close()
         conn.close()
@@ -0,0 +1,130 @@
+"""
+Schema Migrations
+Applies the numbered SQL files in backend/migrations in order
+
+database_schema.sql is the baseline. Every later change is a file named
+NNN_description.sql; the versions already applied are recorded in the
+schema_migrations table, so running the migrator again only applies new files.
+
+MySQL commits DDL implicitly, so a file is not atomic: a version is recorded
+only after all of its statements succeeded, and a failed file is retried from
+the start on the next run (write migrations so that is safe).
+
+Usage:
+    flask --app app db-migrate             # apply pending migrations
+    flask --app app db-migrate --dry-run   # list pending migrations
+    flask --app app db-migrate --fake      # mark pending as applied (already applied by hand)
+"""
+
+import os
+import re
+from typing import Dict, List, Optional
+
+from config.database import execute_query
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+MIGRATION_FILE = re.compile(r'^(\d{3})_(\w+)\.sql$')
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def list_migrations(directory: str = MIGRATIONS_DIR) -> List[Dict]:
+    """
+    Get the migration files in version order
+
+    Returns:
+        list: [{'version': int, 'name': str, 'path': str}, ...]
+    """
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append({
+                'version': int(match.group(1)),
+                'name': match.group(2),
+                'path': os.path.join(directory, filename)
+            })
+    migrations.sort(key=lambda m: m['version'])
+
+    versions = [m['version'] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    Split a migration file into statements
+
+    Full-line '--' comments are dropped and a statement ends at a line ending
+    with ';'. Migrations must not put ';' at the end of a line inside a string.
+    """
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        if not current and (not line.strip() or line.strip().startswith('--')):
+            continue
+        if line.strip().startswith('--'):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(';'):
+            statements.append('\n'.join(current).rstrip()[:-1].strip())
+            current = []
+    if current and '\n'.join(current).strip():
+        statements.append('\n'.join(current).strip())
+    return statements
+
+
+def applied_versions() -> set:
+    """Versions recorded in schema_migrations (the table is created if missing)"""
+    execute_query(CREATE_TABLE)
+    rows = execute_query("SELECT version FROM schema_migrations", fetch=True)
+    return {row['version'] for row in rows}
+
+
+def pending_migrations(directory: str = MIGRATIONS_DIR) -> List[Dict]:
+    """Migrations not yet recorded in schema_migrations"""
+    applied = applied_versions()
+    return [m for m in list_migrations(directory) if m['version'] not in applied]
+
+
+def migrate(target: Optional[int] = None, dry_run: bool = False, fake: bool = False,
+            directory: str = MIGRATIONS_DIR) -> List[Dict]:
+    """
+    Apply pending migrations in order
+
+    Args:
+        target: Stop after this version (default: apply all)
+        dry_run: Only return what would be applied
+        fake: Record pending migrations as applied without running them
+        directory: Migrations directory
+
+    Returns:
+        list: Migrations applied (or pending, for dry_run)
+    """
+    pending = [m for m in pending_migrations(directory) if target is None or m['version'] <= target]
+    if dry_run:
+        return pending
+
+    for migration in pending:
+        if not fake:
+            with open(migration['path']) as f:
+                statements = split_statements(f.read())
+            print(f"[INFO] Applying migration {migration['version']:03d}_{migration['name']} "
+                  f"({len(statements)} statements)")
+            for statement in statements:
+                execute_query(statement)
+
+        execute_query(
+            "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+            (migration['version'], migration['name'])
+        )
+
+    return pending
@@ -0,0 +1,184 @@
+"""
+Query Stats
+Per-statement timing for everything that goes through config.database
+
+Each statement is reduced to a fingerprint (literals and IN lists replaced
+by placeholders, whitespace collapsed) and its duration, row count and pool
+wait time are added to that fingerprint's totals and latency histogram.
+Statements slower than DB_SLOW_QUERY_MS are logged, and the time spent in the
+database during the current request is accumulated so app.py can report it
+in the X-DB-Time response header.
+
+Usage:
+    from config.query_stats import query_stats
+
+    query_stats.snapshot(top=10)  # slowest fingerprints by total time
+"""
+
+import contextvars
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '200'))
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_COMMENTS = re.compile(r'(--[^\n]*)|(/\*.*?\*/)', re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))+\s*\)')
+_VALUES_LISTS = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """
+    Normalize a statement so every execution of it maps to the same key
+
+    Example:
+        "SELECT * FROM songs WHERE song_id IN (%s, %s, %s)"
+        -> "SELECT * FROM songs WHERE song_id IN (...)"
+    """
+    normalized = _COMMENTS.sub(' ', query)
+    normalized = _STRINGS.sub('?', normalized)
+    normalized = _NUMBERS.sub('?', normalized)
+    normalized = _PLACEHOLDER_LISTS.sub('(...)', normalized)
+    normalized = _VALUES_LISTS.sub(r'\1, ...', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+class _Totals:
+    __slots__ = ('count', 'errors', 'time_total', 'time_max', 'rows', 'wait_total', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.time_total = 0.0
+        self.time_max = 0.0
+        self.rows = 0
+        self.wait_total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+
+
+# Database time spent by the current request: [seconds, statements]
+_request_totals: contextvars.ContextVar = contextvars.ContextVar('db_request_totals', default=None)
+
+
+class QueryStats:
+    """Aggregates statement timings by fingerprint"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None):
+        """
+        Args:
+            slow_query_ms: Log statements slower than this (DB_SLOW_QUERY_MS, default 200)
+        """
+        self.slow_query_ms = slow_query_ms if slow_query_ms is not None else SLOW_QUERY_MS
+        self._totals: Dict[str, _Totals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, duration: float, rows: int = 0, wait_time: float = 0.0,
+               error: bool = False):
+        """
+        Add one statement execution
+
+        Args:
+            query: SQL as executed (before parameter substitution)
+            duration: Seconds spent executing and fetching
+            rows: Rows returned or affected
+            wait_time: Seconds spent waiting for a pooled connection
+            error: Whether the statement raised
+        """
+        key = fingerprint(query)
+        with self._lock:
+            totals = self._totals.get(key)
+            if totals is None:
+                totals = self._totals[key] = _Totals()
+            totals.count += 1
+            totals.errors += int(error)
+            totals.time_total += duration
+            totals.time_max = max(totals.time_max, duration)
+            totals.rows += max(rows or 0, 0)
+            totals.wait_total += wait_time
+            totals.buckets[self._bucket(duration)] += 1
+
+        request_totals = _request_totals.get()
+        if request_totals is not None:
+            request_totals[0] += duration + wait_time
+            request_totals[1] += 1
+
+        if duration * 1000 >= self.slow_query_ms:
+            print(f"[WARN] Slow query ({duration * 1000:.1f} ms, {rows} rows, "
+                  f"pool wait {wait_time * 1000:.1f} ms): {key[:500]}")
+
+    @staticmethod
+    def _bucket(duration: float) -> int:
+        for index, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                return index
+        return len(BUCKETS)
+
+    def snapshot(self, top: Optional[int] = None) -> List[Dict]:
+        """
+        Get per-fingerprint totals, highest total time first
+
+        Args:
+            top: Only return this many fingerprints
+
+        Returns:
+            list: [{'query', 'count', 'errors', 'time_total', 'time_avg', 'time_max',
+                    'rows', 'pool_wait_total', 'buckets'}, ...]
+        """
+        with self._lock:
+            items = [
+                {
+                    'query': key,
+                    'count': t.count,
+                    'errors': t.errors,
+                    'time_total': round(t.time_total, 6),
+                    'time_avg': round(t.time_total / t.count, 6) if t.count else 0.0,
+                    'time_max': round(t.time_max, 6),
+                    'rows': t.rows,
+                    'pool_wait_total': round(t.wait_total, 6),
+                    'buckets': list(t.buckets)
+                }
+                for key, t in self._totals.items()
+            ]
+        items.sort(key=lambda item: item['time_total'], reverse=True)
+        return items[:top] if top else items
+
+    def reset(self):
+        """Clear all totals"""
+        with self._lock:
+            self._totals.clear()
+
+
+def start_request():
+    """Begin accumulating database time for the current request"""
+    _request_totals.set([0.0, 0])
+
+
+def request_totals() -> Optional[Dict]:
+    """
+    Database time accumulated since start_request()
+
+    Returns:
+        dict: {'time': seconds, 'queries': count}, or None outside a request
+    """
+    totals = _request_totals.get()
+    if totals is None:
+        return None
+    return {'time': totals[0], 'queries': totals[1]}
+
+
+def end_request():
+    """Stop accumulating database time for the current request"""
+    _request_totals.set(None)
+
+
+# Singleton instance for easy import
+query_stats = QueryStats()
@@ -1,3 +1,5 @@
+-- Baseline schema. Later changes live in migrations/ and are applied in order.
+
 -- Create database
 DROP DATABASE IF EXISTS mooddj;
 CREATE DATABASE mooddj;
@@ -0,0 +1,46 @@
+"""
+Gunicorn settings for the MoodDJ backend
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+Environment:
+    PORT                    Listen port (default 5000)
+    GUNICORN_WORKERS        Worker processes (default 2)
+    GUNICORN_THREADS        Threads per gthread worker (default 50)
+    GUNICORN_TIMEOUT        Worker timeout in seconds (default 120)
+    SOCKETIO_ASYNC_MODE     'threading' (gthread workers) or 'eventlet'
+    SOCKETIO_MESSAGE_QUEUE  Redis URL shared by all workers; required when GUNICORN_WORKERS > 1
+    SOCKETIO_TRANSPORTS     Accepted Socket.IO transports (default 'websocket')
+
+Any worker can serve any request, so no sticky sessions are needed: playback
+queues, remembered devices, read-your-writes pins and the playback watcher's
+lease and state live in Redis (SOCKETIO_MESSAGE_QUEUE unless overridden), and
+Socket.IO only accepts WebSockets, which stay on the worker that accepted them.
+Enabling the 'polling' transport brings back the need for sticky sessions.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+if os.getenv('SOCKETIO_ASYNC_MODE', 'threading') == 'eventlet':
+    worker_class = 'eventlet'
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+else:
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '50'))
+
+# Each worker imports the app itself so it gets its own MySQL pool,
+# mood log flusher and background threads (none of them survive a fork)
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+if workers > 1 and not os.getenv('SOCKETIO_MESSAGE_QUEUE'):
+    print("[WARN] GUNICORN_WORKERS > 1 without SOCKETIO_MESSAGE_QUEUE: Socket.IO emits will only "
+          "reach clients of the emitting worker, and shared state falls back to each worker")
+if workers > 1 and 'polling' in os.getenv('SOCKETIO_TRANSPORTS', 'websocket'):
+    print("[WARN] Socket.IO long-polling with GUNICORN_WORKERS > 1 needs sticky sessions; "
+          "a polling client's requests must all reach the same worker")
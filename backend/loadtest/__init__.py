@@ -0,0 +1,7 @@
+"""
+Load Testing
+Local stand-ins for Spotify and SoundNet plus a scenario runner
+
+See loadtest/run.py for how to point the backend at the fakes and replay
+user sessions against it.
+"""
@@ -0,0 +1,423 @@
+"""
+Fake Upstream Servers
+Local stand-ins for the Spotify Accounts/Web API and the SoundNet track analysis API
+
+Both servers answer with deterministic, realistic payloads and can be tuned
+to behave like a slow or throttling upstream:
+    latency_ms   mean added response time
+    jitter_ms    standard deviation of the added time
+    rate_limit   fraction of requests answered with 429 + Retry-After
+
+Spotify fake (one port serves both the accounts and the API host):
+    POST /api/token                        code -> token for user "<code>"
+    GET  /v1/me                            profile
+    GET  /v1/me/tracks                     saved tracks (paged; --library-size per user)
+    GET  /v1/me/player/devices             one device per user
+    GET  /v1/me/player                     current playback (204 when idle)
+    PUT  /v1/me/player/play, /pause        playback control
+    GET  /v1/me/playlists                  playlists created during the run
+    POST /v1/users/<id>/playlists          create playlist
+    GET/POST/PUT/DELETE /v1/playlists/<id>/tracks (or /items)
+
+SoundNet fake:
+    GET  /pktx/spotify/<track_id>          tempo / energy / happiness
+
+Usage:
+    python -m loadtest.fakes --latency-ms 120 --jitter-ms 40 --rate-limit 0.02
+
+    # In-process (tests)
+    from loadtest.fakes import FakeSpotify, FakeSoundNet
+    spotify = FakeSpotify(port=0).start()
+    ...
+    spotify.stop()
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+CATALOGUE_SIZE = 5000
+
+
+def track_id(index: int) -> str:
+    """Spotify-like 22 character track ID for a catalogue index"""
+    return f"lt{index % CATALOGUE_SIZE:020d}"
+
+
+def _seed(value: str) -> int:
+    return int(hashlib.md5(value.encode()).hexdigest()[:8], 16)
+
+
+class FakeServer:
+    """Threaded HTTP server with configurable latency and 429 responses"""
+
+    name = 'fake'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0,
+                 jitter_ms: float = 0, rate_limit: float = 0, retry_after: int = 1):
+        """
+        Args:
+            port: Port to listen on (0 picks a free one)
+            latency_ms: Mean added response time
+            jitter_ms: Standard deviation of the added response time
+            rate_limit: Fraction of requests answered with 429 (0.0-1.0)
+            retry_after: Retry-After seconds sent with 429 responses
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name=f'{self.name}-fake', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'rate_limited': self.rate_limited}
+
+    def handle(self, method: str, path: str, query: Dict, body: bytes, headers) -> Tuple[int, Optional[dict]]:
+        """Return (status, JSON payload or None); implemented by each fake"""
+        raise NotImplementedError
+
+    def _respond(self, handler: BaseHTTPRequestHandler, method: str):
+        with self._lock:
+            self.requests += 1
+            throttled = self.rate_limit > 0 and random.random() < self.rate_limit
+            if throttled:
+                self.rate_limited += 1
+
+        if self.latency_ms or self.jitter_ms:
+            time.sleep(max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000)
+
+        extra_headers = {}
+        if throttled:
+            status, payload = 429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}}
+            extra_headers['Retry-After'] = str(self.retry_after)
+        else:
+            parsed = urlparse(handler.path)
+            length = int(handler.headers.get('Content-Length') or 0)
+            body = handler.rfile.read(length) if length else b''
+            try:
+                status, payload = self.handle(method, parsed.path.rstrip('/') or '/', parse_qs(parsed.query), body, handler.headers)
+            except Exception as e:
+                status, payload = 500, {'error': {'status': 500, 'message': str(e)}}
+
+        data = json.dumps(payload).encode() if payload is not None else b''
+        handler.send_response(status)
+        for key, value in extra_headers.items():
+            handler.send_header(key, value)
+        if data:
+            handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        if data:
+            handler.wfile.write(data)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._respond(self, 'GET')
+
+            def do_POST(self):
+                server._respond(self, 'POST')
+
+            def do_PUT(self):
+                server._respond(self, 'PUT')
+
+            def do_DELETE(self):
+                server._respond(self, 'DELETE')
+
+            def log_message(self, format, *args):
+                pass  # Keep load-test output readable
+
+        return Handler
+
+
+class FakeSpotify(FakeServer):
+    """Spotify Accounts + Web API stand-in"""
+
+    name = 'spotify'
+
+    def __init__(self, library_size: int = 200, **kwargs):
+        """
+        Args:
+            library_size: Saved tracks per user
+        """
+        super().__init__(**kwargs)
+        self.library_size = library_size
+        self._playback: Dict[str, dict] = {}
+        self._playlists: Dict[str, dict] = {}
+
+    @staticmethod
+    def _user(headers) -> Optional[str]:
+        auth = headers.get('Authorization', '')
+        if auth.startswith('Bearer fake-token-'):
+            return auth[len('Bearer fake-token-'):]
+        return None
+
+    def _track(self, index: int) -> dict:
+        tid = track_id(index)
+        return {
+            'id': tid,
+            'uri': f'spotify:track:{tid}',
+            'name': f'Load Test Track {index % CATALOGUE_SIZE}',
+            'duration_ms': 150000 + (index % 120) * 1000,
+            'artists': [{'name': f'Artist {index % 400}'}],
+            'album': {'name': f'Album {index % 900}', 'images': []}
+        }
+
+    def handle(self, method, path, query, body, headers):
+        if method == 'POST' and path == '/api/token':
+            form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+            user = form.get('code') or form.get('refresh_token', '').replace('fake-refresh-', '')
+            if not user:
+                return 400, {'error': 'invalid_grant'}
+            return 200, {
+                'access_token': f'fake-token-{user}',
+                'token_type': 'Bearer',
+                'expires_in': 3600,
+                'refresh_token': f'fake-refresh-{user}',
+                'scope': 'user-library-read playlist-modify-private user-modify-playback-state user-read-playback-state'
+            }
+
+        user = self._user(headers)
+        if user is None:
+            return 401, {'error': {'status': 401, 'message': 'Invalid access token'}}
+
+        if method == 'GET' and path == '/v1/me':
+            return 200, {'id': user, 'display_name': f'Load Test {user}', 'email': f'{user}@example.com', 'images': []}
+
+        if method == 'GET' and path == '/v1/me/tracks':
+            limit = int(query.get('limit', ['20'])[0])
+            offset = int(query.get('offset', ['0'])[0])
+            start = _seed(user) % CATALOGUE_SIZE  # Libraries overlap, like real users'
+            end = min(offset + limit, self.library_size)
+            items = [{'added_at': '2026-01-01T00:00:00Z', 'track': self._track(start + i)} for i in range(offset, end)]
+            return 200, {'items': items, 'total': self.library_size, 'limit': limit, 'offset': offset,
+                         'next': None if end >= self.library_size else f'/v1/me/tracks?offset={end}&limit={limit}'}
+
+        if method == 'GET' and path == '/v1/me/player/devices':
+            return 200, {'devices': [{'id': f'device-{user}', 'name': 'Load Test Player', 'type': 'Computer',
+                                      'is_active': user in self._playback, 'volume_percent': 50}]}
+
+        if path == '/v1/me/player' and method == 'GET':
+            state = self._playback.get(user)
+            if not state:
+                return 204, None
+            progress = state['progress_ms']
+            if state['is_playing']:
+                progress += int((time.time() - state['started']) * 1000)
+            item = state['item']
+            return 200, {'is_playing': state['is_playing'], 'progress_ms': min(progress, item['duration_ms']),
+                         'item': item, 'device': {'id': f'device-{user}', 'name': 'Load Test Player'}}
+
+        if method == 'PUT' and path == '/v1/me/player/play':
+            payload = json.loads(body or b'{}')
+            uris = payload.get('uris') or []
+            with self._lock:
+                state = self._playback.get(user)
+                if uris:
+                    self._playback[user] = {'item': self._track_from_uri(uris[0]), 'is_playing': True,
+                                            'progress_ms': 0, 'started': time.time()}
+                elif state:
+                    state.update(is_playing=True, started=time.time())
+                else:
+                    return 404, {'error': {'status': 404, 'message': 'Player command failed: No active device found'}}
+            return 204, None
+
+        if method == 'PUT' and path == '/v1/me/player/pause':
+            with self._lock:
+                state = self._playback.get(user)
+                if state and state['is_playing']:
+                    state['progress_ms'] += int((time.time() - state['started']) * 1000)
+                    state['is_playing'] = False
+            return 204, None
+
+        if method == 'GET' and path == '/v1/me/playlists':
+            with self._lock:
+                items = [self._playlist_summary(pid, pl) for pid, pl in self._playlists.items() if pl['owner'] == user]
+            return 200, {'items': items, 'total': len(items), 'next': None}
+
+        match = re.fullmatch(r'/v1/users/([^/]+)/playlists', path)
+        if method == 'POST' and match:
+            payload = json.loads(body or b'{}')
+            with self._lock:
+                pid = f'pl{len(self._playlists) + 1:020d}'
+                self._playlists[pid] = {'owner': user, 'name': payload.get('name', ''), 'tracks': []}
+                return 201, self._playlist_summary(pid, self._playlists[pid])
+
+        match = re.fullmatch(r'/v1/playlists/([^/]+)/(?:tracks|items)', path)
+        if match:
+            return self._playlist_tracks(method, match.group(1), query, body)
+
+        return 404, {'error': {'status': 404, 'message': f'No fake for {method} {path}'}}
+
+    def _track_from_uri(self, uri: str) -> dict:
+        tid = uri.rsplit(':', 1)[-1]
+        index = int(tid[2:]) if tid.startswith('lt') and tid[2:].isdigit() else _seed(tid)
+        return self._track(index)
+
+    @staticmethod
+    def _playlist_summary(pid: str, playlist: dict) -> dict:
+        return {'id': pid, 'name': playlist['name'], 'owner': {'id': playlist['owner']},
+                'tracks': {'total': len(playlist['tracks'])},
+                'external_urls': {'spotify': f'https://open.spotify.com/playlist/{pid}'}}
+
+    def _playlist_tracks(self, method, pid, query, body):
+        with self._lock:
+            playlist = self._playlists.get(pid)
+            if playlist is None:
+                return 404, {'error': {'status': 404, 'message': 'Playlist not found'}}
+            if method == 'GET':
+                limit = int(query.get('limit', ['100'])[0])
+                offset = int(query.get('offset', ['0'])[0])
+                page = playlist['tracks'][offset:offset + limit]
+                return 200, {'items': [{'track': self._track_from_uri(uri)} for uri in page],
+                             'total': len(playlist['tracks']),
+                             'next': None if offset + limit >= len(playlist['tracks']) else 'more'}
+            payload = json.loads(body or b'{}')
+            if method in ('POST', 'PUT'):
+                # spotipy posts a bare list of URIs (position in the query string)
+                uris = payload if isinstance(payload, list) else payload.get('uris') or []
+                if len(uris) > 100:
+                    return 400, {'error': {'status': 400, 'message': 'Too many tracks requested. Limit is 100'}}
+                if method == 'PUT':
+                    playlist['tracks'] = list(uris)
+                    return 200, {'snapshot_id': f'snap-{len(playlist["tracks"])}'}
+                position = query.get('position', [None])[0] if isinstance(payload, list) else payload.get('position')
+                if position is None:
+                    playlist['tracks'].extend(uris)
+                else:
+                    playlist['tracks'][int(position):int(position)] = uris
+                return 201, {'snapshot_id': f'snap-{len(playlist["tracks"])}'}
+            if method == 'DELETE':
+                items = payload.get('items') or payload.get('tracks') or []
+                if len(items) > 100:
+                    return 400, {'error': {'status': 400, 'message': 'Too many tracks requested. Limit is 100'}}
+                remove = {item['uri'] for item in items}
+                playlist['tracks'] = [uri for uri in playlist['tracks'] if uri not in remove]
+                return 200, {'snapshot_id': f'snap-{len(playlist["tracks"])}'}
+        return 405, None
+
+
+class FakeSoundNet(FakeServer):
+    """SoundNet track analysis stand-in"""
+
+    name = 'soundnet'
+
+    def __init__(self, missing_rate: float = 0.05, **kwargs):
+        """
+        Args:
+            missing_rate: Fraction of tracks answered with 404 (not in SoundNet's database)
+        """
+        super().__init__(**kwargs)
+        self.missing_rate = missing_rate
+
+    def handle(self, method, path, query, body, headers):
+        match = re.fullmatch(r'/pktx/spotify/([A-Za-z0-9]+)', path)
+        if method != 'GET' or not match:
+            return 404, {'message': 'Not found'}
+
+        rng = random.Random(_seed(match.group(1)))
+        if rng.random() < self.missing_rate:
+            return 404, {'message': 'Track not found'}
+        return 200, {
+            'tempo': rng.randint(60, 190),
+            'energy': rng.randint(0, 100),
+            'happiness': rng.randint(0, 100),
+            'key': 'C',
+            'mode': 'major'
+        }
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Upstream behaviour options shared by the fakes CLI"""
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--spotify-port', type=int, default=8801)
+    parser.add_argument('--soundnet-port', type=int, default=8802)
+    parser.add_argument('--latency-ms', type=float, default=80, help='Mean added latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Latency standard deviation')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds on 429')
+    parser.add_argument('--soundnet-latency-ms', type=float, help='Override --latency-ms for SoundNet')
+    parser.add_argument('--soundnet-rate-limit', type=float, help='Override --rate-limit for SoundNet')
+    parser.add_argument('--library-size', type=int, default=200, help='Saved tracks per fake user')
+
+
+def start_fakes(args) -> Tuple[FakeSpotify, FakeSoundNet]:
+    """Start both fakes from parsed add_arguments() options"""
+    spotify = FakeSpotify(
+        host=args.host, port=args.spotify_port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit, retry_after=args.retry_after, library_size=args.library_size
+    ).start()
+    soundnet = FakeSoundNet(
+        host=args.host, port=args.soundnet_port,
+        latency_ms=args.soundnet_latency_ms if args.soundnet_latency_ms is not None else args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.soundnet_rate_limit if args.soundnet_rate_limit is not None else args.rate_limit,
+        retry_after=args.retry_after
+    ).start()
+    return spotify, soundnet
+
+
+def backend_env(spotify: FakeSpotify, soundnet: FakeSoundNet) -> Dict[str, str]:
+    """Environment that points the backend at the fakes"""
+    return {
+        'SPOTIFY_API_URL': f'{spotify.url}/v1',
+        'SPOTIFY_ACCOUNTS_URL': spotify.url,
+        'SPOTIFY_CLIENT_ID': 'loadtest-client',
+        'SPOTIFY_CLIENT_SECRET': 'loadtest-secret',
+        'SOUNDNET_BASE_URL': soundnet.url,
+        'RAPIDAPI_KEY': 'loadtest',
+        'SOUNDNET_REQUEST_DELAY': '0'
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run fake Spotify and SoundNet servers for load testing')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    spotify, soundnet = start_fakes(args)
+    print(f"[INFO] Fake Spotify on {spotify.url}, fake SoundNet on {soundnet.url}")
+    print("[INFO] Start the backend with:")
+    print(f"    {' '.join(f'{key}={value}' for key, value in backend_env(spotify, soundnet).items())}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"[INFO] spotify={spotify.stats()} soundnet={soundnet.stats()}")
+    except KeyboardInterrupt:
+        spotify.stop()
+        soundnet.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Load Test Runner
+Replays user sessions against a running backend and reports per-endpoint latency
+
+Each virtual user logs in through the OAuth callback (the fake Spotify turns
+the code into a token for user "<code>"), syncs part of their library once,
+then repeats a detect loop until the run ends: N frames to /api/mood/detect
+at the webcam interval, one /api/mood/log and one /api/music/recommend.
+
+Usage:
+    # 1. Fake upstreams (prints the env the backend needs)
+    python -m loadtest.fakes --latency-ms 120 --rate-limit 0.02
+
+    # 2. Backend pointed at the fakes
+    SPOTIFY_API_URL=http://127.0.0.1:8801/v1 SPOTIFY_ACCOUNTS_URL=http://127.0.0.1:8801 \\
+    SPOTIFY_CLIENT_ID=loadtest-client SPOTIFY_CLIENT_SECRET=loadtest-secret \\
+    SOUNDNET_BASE_URL=http://127.0.0.1:8802 RAPIDAPI_KEY=loadtest SOUNDNET_REQUEST_DELAY=0 \\
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+    # 3. Scenarios
+    python -m loadtest.run --target http://127.0.0.1:5000 --users 50 --duration 120
+
+    # Or start the fakes in this process (backend still configured as in step 2)
+    python -m loadtest.run --start-fakes --users 20
+"""
+
+import argparse
+import base64
+import io
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+MOODS = ('happy', 'sad', 'excited', 'calm', 'neutral', 'angry', 'surprised')
+
+# Statuses a step can return while the backend is working as designed
+EXPECTED_STATUS = {
+    'login': (302,),
+    'sync': (200,),
+    'detect': (200,),
+    'log': (202,),
+    'recommend': (200,)
+}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Linearly interpolated percentile of unsorted values (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Recorder:
+    """Thread-safe latency and status collection per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._errors: Dict[str, int] = defaultdict(int)
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def record(self, endpoint: str, seconds: float, status, ok: bool):
+        with self._lock:
+            self._latencies[endpoint].append(seconds)
+            self._statuses[endpoint][str(status)] += 1
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def report(self) -> List[dict]:
+        """Per-endpoint count, errors, throughput and latency percentiles (ms)"""
+        elapsed = (self.finished or time.monotonic()) - self.started
+        rows = []
+        with self._lock:
+            for endpoint in sorted(self._latencies):
+                latencies = self._latencies[endpoint]
+                rows.append({
+                    'endpoint': endpoint,
+                    'count': len(latencies),
+                    'errors': self._errors[endpoint],
+                    'rps': round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+                    'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                    'p90_ms': round(percentile(latencies, 90) * 1000, 1),
+                    'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+                    'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                    'max_ms': round(max(latencies) * 1000, 1),
+                    'statuses': dict(self._statuses[endpoint])
+                })
+        return rows
+
+
+def format_report(rows: List[dict], elapsed: float) -> str:
+    """Plain-text table of report() rows"""
+    header = f"{'endpoint':<10} {'count':>7} {'errors':>7} {'rps':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    lines = [f"Load test finished in {elapsed:.1f}s (latencies in ms)", header, '-' * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['endpoint']:<10} {row['count']:>7} {row['errors']:>7} {row['rps']:>8.2f} "
+            f"{row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def blank_frame() -> str:
+    """Grey 320x240 JPEG as a data URL (no face; exercises decode + inference)"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 240), (128, 128, 128)).save(buffer, 'JPEG', quality=80)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def load_frame(path: str) -> str:
+    """Image file as a data URL (use a face photo to exercise the full landmark path)"""
+    with open(path, 'rb') as f:
+        return 'data:image/jpeg;base64,' + base64.b64encode(f.read()).decode()
+
+
+class VirtualUser(threading.Thread):
+    """One simulated browser session"""
+
+    def __init__(self, index: int, args, recorder: Recorder, frame: str, deadline: float):
+        super().__init__(name=f'vu-{index}', daemon=True)
+        self.user = f'{args.user_prefix}{index}'
+        self.args = args
+        self.recorder = recorder
+        self.frame = frame
+        self.deadline = deadline
+        self.http = requests.Session()
+        self.rng = random.Random(index)
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.args.target.rstrip('/') + path,
+                                         timeout=self.args.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.record(endpoint, time.perf_counter() - start, type(e).__name__, False)
+            return None
+        ok = response.status_code in EXPECTED_STATUS[endpoint]
+        if endpoint == 'login':
+            ok = ok and '/dashboard' in response.headers.get('Location', '')
+        self.recorder.record(endpoint, time.perf_counter() - start, response.status_code, ok)
+        return response
+
+    def run(self):
+        # Spread logins over the ramp-up period
+        time.sleep(self.rng.uniform(0, self.args.ramp_up))
+
+        self.call('login', 'GET', '/api/auth/callback', params={'code': self.user}, allow_redirects=False)
+        if self.args.sync_limit > 0:
+            self.call('sync', 'POST', '/api/music/sync', json={'limit': self.args.sync_limit})
+
+        mood = 'neutral'
+        while time.monotonic() < self.deadline:
+            for _ in range(self.args.frames_per_cycle):
+                response = self.call('detect', 'POST', '/api/mood/detect', json={'image': self.frame})
+                if response is not None and response.status_code == 200:
+                    mood = response.json().get('mood') or mood
+                time.sleep(self.args.frame_interval)
+                if time.monotonic() >= self.deadline:
+                    return
+
+            if not self.args.fixed_mood:
+                # A blank frame always reads neutral; vary moods so recommend covers every range
+                mood = self.rng.choice(MOODS)
+            self.call('log', 'POST', '/api/mood/log', json={'mood': mood, 'confidence': 0.8})
+            self.call('recommend', 'POST', '/api/music/recommend', json={'mood': mood, 'limit': 30})
+
+
+def main():
+    from loadtest import fakes
+
+    parser = argparse.ArgumentParser(description='Replay MoodDJ user sessions against a running backend')
+    parser.add_argument('--target', default='http://127.0.0.1:5000', help='Backend base URL')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run the detect loop')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users log in')
+    parser.add_argument('--sync-limit', type=int, default=50, help='Tracks synced per user (0 skips sync)')
+    parser.add_argument('--frames-per-cycle', type=int, default=5, help='Detect calls between log/recommend')
+    parser.add_argument('--frame-interval', type=float, default=0.5, help='Seconds between detect calls')
+    parser.add_argument('--frame', help='JPEG to send instead of a blank frame')
+    parser.add_argument('--fixed-mood', action='store_true', help='Use the detected mood instead of rotating')
+    parser.add_argument('--user-prefix', default='loadtest-user-', help='Fake Spotify user ID prefix')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    parser.add_argument('--json', dest='json_path', help='Also write the report as JSON')
+    parser.add_argument('--start-fakes', action='store_true', help='Run the fake upstreams in this process')
+    fakes.add_arguments(parser)
+    args = parser.parse_args()
+
+    servers = []
+    if args.start_fakes:
+        servers = fakes.start_fakes(args)
+        env = fakes.backend_env(*servers)
+        print(f"[INFO] Fakes running; backend env: {' '.join(f'{k}={v}' for k, v in env.items())}")
+
+    frame = load_frame(args.frame) if args.frame else blank_frame()
+    recorder = Recorder()
+    deadline = time.monotonic() + args.ramp_up + args.duration
+    users = [VirtualUser(i, args, recorder, frame, deadline) for i in range(args.users)]
+
+    print(f"[INFO] Running {args.users} users against {args.target} for {args.duration:.0f}s")
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    recorder.finished = time.monotonic()
+
+    rows = recorder.report()
+    print(format_report(rows, recorder.finished - recorder.started))
+    for server in servers:
+        print(f"[INFO] fake {server.name}: {server.stats()}")
+        server.stop()
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'users': args.users, 'duration': args.duration, 'endpoints': rows}, f, indent=2)
+        print(f"[INFO] Report written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+-- Migration 001: pre-aggregated mood statistics
+-- Per-user, per-mood counts and confidence sums, maintained by the mood log
+-- flusher as events are written. /api/mood/stats reads these instead of
+-- scanning mood_sessions.
+
+CREATE TABLE mood_stats_hourly (
+    user_id INT NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    detected_mood VARCHAR(50) NOT NULL,
+    event_count INT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_start, detected_mood)
+);
+
+CREATE TABLE mood_stats_daily (
+    user_id INT NOT NULL,
+    bucket_date DATE NOT NULL,
+    detected_mood VARCHAR(50) NOT NULL,
+    event_count INT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, bucket_date, detected_mood)
+);
+
+-- Backfill from existing history
+INSERT INTO mood_stats_hourly (user_id, bucket_start, detected_mood, event_count, confidence_sum)
+SELECT user_id,
+       DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'),
+       detected_mood,
+       COUNT(*),
+       SUM(confidence_score)
+FROM mood_sessions
+GROUP BY user_id, DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), detected_mood;
+
+INSERT INTO mood_stats_daily (user_id, bucket_date, detected_mood, event_count, confidence_sum)
+SELECT user_id,
+       DATE(timestamp),
+       detected_mood,
+       COUNT(*),
+       SUM(confidence_score)
+FROM mood_sessions
+GROUP BY user_id, DATE(timestamp), detected_mood;
@@ -0,0 +1,36 @@
+-- Migration 002: range-partition mood_sessions by month
+-- Old months can then be dropped with ALTER TABLE ... DROP PARTITION instead
+-- of large DELETEs, and time-bounded history/stats queries prune partitions.
+--
+-- MySQL requirements for partitioned InnoDB tables:
+--   * no foreign keys (user_id integrity is enforced by the application)
+--   * the partitioning column must be part of every unique key, so the
+--     primary key becomes (session_id, timestamp)
+--
+-- Future monthly partitions are split off p_future by the retention job
+-- (flask --app app mood-retention), which also drops expired partitions.
+
+ALTER TABLE mood_sessions DROP FOREIGN KEY mood_sessions_ibfk_1;
+
+ALTER TABLE mood_sessions
+    MODIFY timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (session_id, timestamp);
+
+ALTER TABLE mood_sessions
+PARTITION BY RANGE (UNIX_TIMESTAMP(timestamp)) (
+    PARTITION p_archive VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p202604 VALUES LESS THAN (UNIX_TIMESTAMP('2026-05-01 00:00:00')),
+    PARTITION p202605 VALUES LESS THAN (UNIX_TIMESTAMP('2026-06-01 00:00:00')),
+    PARTITION p202606 VALUES LESS THAN (UNIX_TIMESTAMP('2026-07-01 00:00:00')),
+    PARTITION p202607 VALUES LESS THAN (UNIX_TIMESTAMP('2026-08-01 00:00:00')),
+    PARTITION p202608 VALUES LESS THAN (UNIX_TIMESTAMP('2026-09-01 00:00:00')),
+    PARTITION p202609 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,26 @@
+-- Migration 003: unique user/song links and covering indexes for hot queries
+-- Without a unique key on (user_id, song_id) the sync upsert never hit
+-- ON DUPLICATE KEY and every re-sync added duplicate user_songs rows.
+
+-- Keep only the newest link per (user_id, song_id); it carries the latest mood
+DELETE older FROM user_songs older
+INNER JOIN user_songs newer
+    ON newer.user_id = older.user_id
+   AND newer.song_id = older.song_id
+   AND newer.user_song_id > older.user_song_id;
+
+-- Sync upsert target; also serves the recommendation join and /sync/status
+-- COUNT(DISTINCT song_id) from the index alone
+ALTER TABLE user_songs
+    ADD UNIQUE KEY uq_user_song (user_id, song_id);
+
+-- Global recommendation filter (valence range with energy/tempo checked in
+-- the index); replaces the single-column valence index it makes redundant
+ALTER TABLE songs
+    ADD INDEX idx_valence_energy_tempo (valence, energy, tempo),
+    DROP INDEX idx_valence;
+
+-- /history and history exports read every selected column from the index
+ALTER TABLE mood_sessions
+    ADD INDEX idx_user_timestamp_covering (user_id, timestamp, session_id, detected_mood, confidence_score),
+    DROP INDEX idx_user_timestamp;
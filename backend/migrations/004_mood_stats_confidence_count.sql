@@ -0,0 +1,52 @@
+-- Migration 004: count non-NULL confidences separately in the mood rollups
+-- avg_confidence was confidence_sum / event_count, which counted events with a
+-- NULL confidence_score (as 1.0 from the flusher, as 0 from the 001 backfill)
+-- and no longer matched AVG(confidence_score). It is now
+-- confidence_sum / confidence_count.
+
+ALTER TABLE mood_stats_hourly
+    ADD COLUMN confidence_count INT NOT NULL DEFAULT 0 AFTER event_count;
+
+ALTER TABLE mood_stats_daily
+    ADD COLUMN confidence_count INT NOT NULL DEFAULT 0 AFTER event_count;
+
+-- Buckets whose raw rows were already dropped by retention keep their sums
+UPDATE mood_stats_hourly SET confidence_count = event_count;
+UPDATE mood_stats_daily SET confidence_count = event_count;
+
+-- Recompute exactly where every event of the bucket is still in mood_sessions
+UPDATE mood_stats_hourly h
+INNER JOIN (
+    SELECT user_id,
+           DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00') AS bucket_start,
+           detected_mood,
+           COUNT(*) AS event_count,
+           COUNT(confidence_score) AS confidence_count,
+           COALESCE(SUM(confidence_score), 0) AS confidence_sum
+    FROM mood_sessions
+    GROUP BY user_id, DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), detected_mood
+) raw
+    ON raw.user_id = h.user_id
+   AND raw.bucket_start = h.bucket_start
+   AND raw.detected_mood = h.detected_mood
+   AND raw.event_count = h.event_count
+SET h.confidence_count = raw.confidence_count,
+    h.confidence_sum = raw.confidence_sum;
+
+UPDATE mood_stats_daily d
+INNER JOIN (
+    SELECT user_id,
+           DATE(timestamp) AS bucket_date,
+           detected_mood,
+           COUNT(*) AS event_count,
+           COUNT(confidence_score) AS confidence_count,
+           COALESCE(SUM(confidence_score), 0) AS confidence_sum
+    FROM mood_sessions
+    GROUP BY user_id, DATE(timestamp), detected_mood
+) raw
+    ON raw.user_id = d.user_id
+   AND raw.bucket_date = d.bucket_date
+   AND raw.detected_mood = d.detected_mood
+   AND raw.event_count = d.event_count
+SET d.confidence_count = raw.confidence_count,
+    d.confidence_sum = raw.confidence_sum;
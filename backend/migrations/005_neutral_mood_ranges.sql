@@ -0,0 +1,10 @@
+-- Migration 005: widen the seeded 'neutral' ranges to the classifier's
+-- The baseline seed had valence/energy 0.4-0.7 and tempo 80-130, while the
+-- classifier always used 0.3-0.7 and 70-140. Thresholds are now read from the
+-- moods table (MoodRegistry), so align the row with the ranges in use.
+
+UPDATE moods
+SET target_valence_min = 0.3, target_valence_max = 0.7,
+    target_energy_min = 0.3, target_energy_max = 0.7,
+    target_tempo_min = 70, target_tempo_max = 140
+WHERE mood_name = 'neutral';
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, session, redirect
 import os
 from services.spotify_service import SpotifyService
-from config.database import execute_query
+from services.user_resolver import user_resolver
+from services.token_manager import token_manager
+from config.database import execute_query, transaction
 
 auth_bp = Blueprint('auth', __name__)
 spotify_service = SpotifyService()
@@ -76,21 +78,28 @@ def callback():
             if profile:
                 session['user_id'] = profile['id']
                 session['display_name'] = profile.get('display_name', 'User')
+                token_manager.remember(profile['id'], token_info)
 
-                # Store user in database (optional)
+                # Store user in database and remember the internal user_id,
+                # so later queries can filter on it without joining users
                 try:
-                    query = """
-                        INSERT INTO users (spotify_id, display_name, email)
-                        VALUES (%s, %s, %s)
-                        ON DUPLICATE KEY UPDATE
-                            display_name = VALUES(display_name),
-                            email = VALUES(email)
-                    """
-                    execute_query(query, (
-                        profile['id'],
-                        profile.get('display_name', 'User'),
-                        profile.get('email', '')
-                    ))
+                    with transaction() as tx:
+                        # LAST_INSERT_ID(user_id) makes lastrowid the existing id on update too
+                        db_user_id = tx.execute("""
+                            INSERT INTO users (spotify_id, display_name, email)
+                            VALUES (%s, %s, %s)
+                            ON DUPLICATE KEY UPDATE
+                                user_id = LAST_INSERT_ID(user_id),
+                                display_name = VALUES(display_name),
+                                email = VALUES(email)
+                        """, (
+                            profile['id'],
+                            profile.get('display_name', 'User'),
+                            profile.get('email', '')
+                        ))
+                    if db_user_id:
+                        session['db_user_id'] = db_user_id
+                        user_resolver.remember(profile['id'], db_user_id)
                 except Exception as db_error:
                     print(f"[WARN] Failed to store user in database: {db_error}")
 
@@ -110,6 +119,11 @@ def logout():
     Logout user by clearing session
     """
     try:
+        from routes.music_routes import playback_queues
+
+        # Queues are keyed by Spotify user ID; drop this user's right away
+        if session.get('user_id'):
+            playback_queues.stop(session['user_id'])
         session.clear()
         return jsonify({
             'success': True,
@@ -139,20 +153,18 @@ def status():
                 'authenticated': False
             }), 200
 
-        # Check if token is expired and refresh if needed
-        if spotify_service.is_token_expired(token_info):
-            print("[INFO] Token expired, refreshing...")
-            new_token_info = spotify_service.refresh_access_token(token_info.get('refresh_token'))
-
-            if new_token_info:
-                session['spotify_token_info'] = new_token_info
-                token_info = new_token_info
-            else:
-                # Refresh failed, clear session
-                session.clear()
-                return jsonify({
-                    'authenticated': False
-                }), 200
+        # Shared per-user refresh (no-op while the token is fresh)
+        new_token_info = spotify_service.get_valid_token(user_id, token_info)
+
+        if not new_token_info:
+            # Refresh failed, clear session
+            session.clear()
+            return jsonify({
+                'authenticated': False
+            }), 200
+
+        if new_token_info is not token_info:
+            session['spotify_token_info'] = new_token_info
 
         return jsonify({
             'authenticated': True,
@@ -1,11 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from services.mood_detector import MoodDetector
-from config.database import execute_query
+from services.mood_log_buffer import mood_log_buffer
+from config.database import mark_written
+from services import export_service, mood_history, mood_stats
 from datetime import datetime
 
 mood_bp = Blueprint('mood', __name__)
 mood_detector = MoodDetector()
 
+
+def _parse_time_arg(name):
+    """Parse an optional ISO 8601 query parameter into a naive UTC datetime"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        # Stored timestamps are naive UTC; an offset (or Z) is converted, not dropped
+        return mood_stats.naive_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 timestamp")
+
+
 @mood_bp.route('/detect', methods=['POST'])
 def detect_mood():
     """Detect mood from an image"""
@@ -40,17 +55,24 @@ def log_mood():
         if not mood:
             return jsonify({'error': 'Mood is required'}), 400
         
-        query = """
-            INSERT INTO mood_sessions (user_id, detected_mood, confidence_score)
-            VALUES (%s, %s, %s)
-        """
+        # Buffered and written in batches by the background flusher
+        try:
+            queued = mood_log_buffer.log(user_id, mood, confidence)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not queued:
+            response = jsonify({'error': 'Mood log is busy, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
         
-        session_id = execute_query(query, (user_id, mood, confidence))
+        # Keep this user's history/stats reads on the primary until the event
+        # has been flushed (within one flush interval) and replicated
+        mark_written(delay=mood_log_buffer.flush_interval)
         
         return jsonify({
             'success': True,
-            'session_id': session_id
-        }), 201
+            'queued': True
+        }), 202
         
     except Exception as e:
         print(f"Error logging mood: {e}")
@@ -58,47 +80,71 @@ def log_mood():
 
 @mood_bp.route('/history', methods=['GET'])
 def get_mood_history():
-    """Get mood detection history"""
+    """Get mood detection history (keyset-paginated with ?cursor=, ?since=, ?until=)"""
     try:
         user_id = request.args.get('user_id', 1)
-        limit = request.args.get('limit', 10)
         
-        query = """
-            SELECT detected_mood, confidence_score, timestamp
-            FROM mood_sessions
-            WHERE user_id = %s
-            ORDER BY timestamp DESC
-            LIMIT %s
-        """
-        
-        history = execute_query(query, (user_id, limit), fetch=True)
+        try:
+            limit = mood_history.parse_limit(request.args.get('limit'))
+            since = _parse_time_arg('since')
+            until = _parse_time_arg('until')
+            page = mood_history.get_history_page(
+                user_id, limit, request.args.get('cursor'), since, until
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'success': True,
-            'history': history
+            'history': page['history'],
+            'next_cursor': page['next_cursor']
         }), 200
         
     except Exception as e:
         print(f"Error fetching mood history: {e}")
         return jsonify({'error': str(e)}), 500
 
+@mood_bp.route('/export', methods=['GET'])
+def export_mood_history():
+    """Stream full mood history as NDJSON or CSV (?format=ndjson|csv, ?since=, ?until=)"""
+    try:
+        user_id = request.args.get('user_id', 1)
+        fmt = request.args.get('format', 'ndjson')
+        
+        if fmt not in export_service.FORMATS:
+            return jsonify({'error': 'format must be ndjson or csv'}), 400
+        
+        try:
+            since = _parse_time_arg('since')
+            until = _parse_time_arg('until')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        chunks = export_service.export_mood_history(user_id, fmt, since, until)
+        
+        return Response(
+            stream_with_context(chunks),
+            mimetype=export_service.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=mood_history.{fmt}'}
+        )
+        
+    except Exception as e:
+        print(f"Error exporting mood history: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @mood_bp.route('/stats', methods=['GET'])
 def get_mood_stats():
-    """Get mood statistics"""
+    """Get mood statistics (optionally limited to ?since=&until= ISO timestamps)"""
     try:
         user_id = request.args.get('user_id', 1)
         
-        query = """
-            SELECT 
-                detected_mood,
-                COUNT(*) as count,
-                AVG(confidence_score) as avg_confidence
-            FROM mood_sessions
-            WHERE user_id = %s
-            GROUP BY detected_mood
-        """
-        
-        stats = execute_query(query, (user_id,), fetch=True)
+        try:
+            since = _parse_time_arg('since')
+            until = _parse_time_arg('until')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        stats = mood_stats.get_mood_stats(user_id, since, until)
         
         return jsonify({
             'success': True,
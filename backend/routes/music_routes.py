@@ -1,8 +1,12 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session, stream_with_context
 from services.spotify_service import SpotifyService
+from services.playback_queue import PlaybackQueueManager
+from services.user_resolver import session_db_user_id
+from services.playback_watcher import playback_watcher
 
 music_bp = Blueprint('music', __name__)
 spotify_service = SpotifyService()
+playback_queues = PlaybackQueueManager(spotify_service)
 
 
 def get_spotify_client():
@@ -19,16 +23,20 @@ def get_spotify_client():
     if not token_info:
         return None, (jsonify({'error': 'Not authenticated. Please connect with Spotify.'}), 401)
 
-    # Create Spotify client (automatically refreshes token if expired)
-    sp_client = spotify_service.create_spotify_client(token_info)
+    # Refreshed once per user (in the background when close to expiry)
+    fresh_token_info = spotify_service.get_valid_token(session.get('user_id'), token_info)
+    if not fresh_token_info:
+        return None, (jsonify({'error': 'Session expired. Please re-authenticate.'}), 401)
+
+    # Write the refreshed token back so later requests start from it
+    if fresh_token_info is not token_info:
+        session['spotify_token_info'] = fresh_token_info
+
+    sp_client = spotify_service.create_spotify_client(fresh_token_info, session.get('user_id'))
 
     if not sp_client:
         return None, (jsonify({'error': 'Failed to create Spotify client. Please re-authenticate.'}), 401)
 
-    # Update session with refreshed token if it was refreshed
-    if not spotify_service.is_token_expired(token_info):
-        session['spotify_token_info'] = token_info
-
     return sp_client, None
 
 @music_bp.route('/recommend', methods=['POST'])
@@ -37,12 +45,16 @@ def recommend_songs():
     try:
         # Get user_id from session (optional - fallback to global if not provided)
         user_id = session.get('user_id')
+        db_user_id = session_db_user_id() if user_id else None
 
         data = request.json
         mood = data.get('mood', 'neutral')
         limit = data.get('limit', 30)
 
-        songs = spotify_service.get_songs_for_mood(mood, limit, user_id)
+        if user_id and db_user_id is None:
+            songs = []  # logged in but library never stored
+        else:
+            songs = spotify_service.get_songs_for_mood(mood, limit, db_user_id)
 
         return jsonify({
             'success': True,
@@ -56,6 +68,108 @@ def recommend_songs():
         print(f"Error recommending songs: {e}")
         return jsonify({'error': str(e)}), 500
 
+@music_bp.route('/queue/start', methods=['POST'])
+def start_queue():
+    """Start a server-side playback queue for the current mood"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'User not authenticated. Please log in.'}), 401
+
+        data = request.json or {}
+        mood = data.get('mood', 'neutral')
+
+        state = playback_queues.start(user_id, mood, session_db_user_id())
+
+        return jsonify({
+            'success': True,
+            **state
+        }), 200
+
+    except Exception as e:
+        print(f"Error starting playback queue: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@music_bp.route('/queue/next', methods=['POST'])
+def next_in_queue():
+    """Pop the next track from the session playback queue"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'User not authenticated. Please log in.'}), 401
+
+        if playback_queues.get_state(user_id) is None:
+            return jsonify({'error': 'No playback queue. Call /queue/start first.'}), 404
+
+        track = playback_queues.next_track(user_id)
+
+        if track:
+            return jsonify({
+                'success': True,
+                'track': track
+            }), 200
+        else:
+            return jsonify({
+                'success': False,
+                'message': 'Queue is empty'
+            }), 200
+
+    except Exception as e:
+        print(f"Error getting next track: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@music_bp.route('/queue/mood', methods=['POST'])
+def update_queue_mood():
+    """Re-rank the session playback queue for a newly detected mood"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'User not authenticated. Please log in.'}), 401
+
+        data = request.json or {}
+        mood = data.get('mood')
+        if not mood:
+            return jsonify({'error': 'mood is required'}), 400
+
+        if playback_queues.get_state(user_id) is None:
+            return jsonify({'error': 'No playback queue. Call /queue/start first.'}), 404
+
+        reranking = playback_queues.set_mood(user_id, mood)
+
+        return jsonify({
+            'success': True,
+            'mood': mood,
+            'reranking': reranking
+        }), 202
+
+    except Exception as e:
+        print(f"Error updating queue mood: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@music_bp.route('/queue', methods=['GET'])
+def get_queue():
+    """Get the session playback queue state"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'User not authenticated. Please log in.'}), 401
+
+        state = playback_queues.get_state(user_id)
+        if state is None:
+            return jsonify({'error': 'No playback queue. Call /queue/start first.'}), 404
+
+        return jsonify({
+            'success': True,
+            **state
+        }), 200
+
+    except Exception as e:
+        print(f"Error getting playback queue: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @music_bp.route('/play', methods=['POST'])
 def play_track():
     """Play a specific track"""
@@ -72,9 +186,10 @@ def play_track():
         if not track_id:
             return jsonify({'error': 'track_id is required'}), 400
 
-        result = spotify_service.play_track(track_id, device_id, sp_client)
+        result = spotify_service.play_track(track_id, device_id, sp_client, session.get('user_id'))
 
         if result['success']:
+            playback_watcher.poke(session.get('user_id'))
             return jsonify(result), 200
         else:
             return jsonify(result), 400
@@ -98,6 +213,7 @@ def pause_playback():
         result = spotify_service.pause_playback(device_id, sp_client)
 
         if result['success']:
+            playback_watcher.poke(session.get('user_id'))
             return jsonify(result), 200
         else:
             return jsonify(result), 400
@@ -121,6 +237,7 @@ def resume_playback():
         result = spotify_service.resume_playback(device_id, sp_client)
 
         if result['success']:
+            playback_watcher.poke(session.get('user_id'))
             return jsonify(result), 200
         else:
             return jsonify(result), 400
@@ -134,12 +251,17 @@ def resume_playback():
 def get_current_track():
     """Get currently playing track"""
     try:
-        # Get authenticated Spotify client from session
-        sp_client, error = get_spotify_client()
-        if error:
-            return error
+        # Served from the playback watcher while one of the user's sockets is watching
+        watched = playback_watcher.snapshot(session.get('user_id'))
+        if watched is not None and 'error' not in watched:
+            playback = watched['playback']
+        else:
+            # Get authenticated Spotify client from session
+            sp_client, error = get_spotify_client()
+            if error:
+                return error
 
-        playback = spotify_service.get_current_playback(sp_client)
+            playback = spotify_service.get_current_playback(sp_client)
 
         if playback:
             return jsonify({
@@ -168,14 +290,16 @@ def get_sync_status():
             return jsonify({'error': 'User not authenticated. Please log in.'}), 401
 
         # Check how many songs the user has synced
-        query = """
-            SELECT COUNT(DISTINCT us.song_id) as song_count
-            FROM user_songs us
-            INNER JOIN users u ON us.user_id = u.user_id
-            WHERE u.spotify_id = %s
-        """
-        result = execute_query(query, (user_id,), fetch=True)
-        song_count = result[0]['song_count'] if result else 0
+        song_count = 0
+        db_user_id = session_db_user_id()
+        if db_user_id is not None:
+            query = """
+                SELECT COUNT(DISTINCT song_id) as song_count
+                FROM user_songs
+                WHERE user_id = %s
+            """
+            result = execute_query(query, (db_user_id,), fetch=True, read_only=True)
+            song_count = result[0]['song_count'] if result else 0
 
         return jsonify({
             'success': True,
@@ -189,6 +313,33 @@ def get_sync_status():
         return jsonify({'error': str(e)}), 500
 
 
+@music_bp.route('/export', methods=['GET'])
+def export_library():
+    """Stream the user's synced library as NDJSON or CSV (?format=ndjson|csv)"""
+    try:
+        from services import export_service
+
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'User not authenticated. Please log in.'}), 401
+
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in export_service.FORMATS:
+            return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+        chunks = export_service.export_library(session_db_user_id(), fmt)
+
+        return Response(
+            stream_with_context(chunks),
+            mimetype=export_service.FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=library.{fmt}'}
+        )
+
+    except Exception as e:
+        print(f"Error exporting library: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @music_bp.route('/sync', methods=['POST'])
 def sync_user_library():
     """Sync user's Spotify library to database"""
@@ -206,7 +357,11 @@ def sync_user_library():
         data = request.json or {}
         limit = data.get('limit', 25)
 
-        result = spotify_service.fetch_and_store_user_tracks(limit, sp_client, user_id)
+        db_user_id = session_db_user_id()
+        if db_user_id is None:
+            return jsonify({'error': 'User not found. Please log in again.'}), 401
+
+        result = spotify_service.fetch_and_store_user_tracks(limit, sp_client, db_user_id)
 
         if result['success']:
             return jsonify(result), 200
@@ -219,7 +374,7 @@ def sync_user_library():
 
 @music_bp.route('/playlist/create', methods=['POST'])
 def create_playlist():
-    """Create a mood-based playlist"""
+    """Create a mood-based playlist, or update the user's existing one for that mood"""
     try:
         # Get authenticated Spotify client from session
         sp_client, error = get_spotify_client()
@@ -230,11 +385,12 @@ def create_playlist():
         user_id = data.get('user_id') or session.get('user_id')  # Get from session if not provided
         mood = data.get('mood')
         track_ids = data.get('track_ids', [])
+        update_existing = data.get('update_existing', True)
 
         if not user_id or not mood:
             return jsonify({'error': 'user_id and mood are required'}), 400
 
-        result = spotify_service.create_mood_playlist(user_id, mood, track_ids, sp_client)
+        result = spotify_service.create_mood_playlist(user_id, mood, track_ids, sp_client, update_existing)
 
         if result['success']:
             return jsonify(result), 201
@@ -251,26 +407,20 @@ def reset_library():
     """Reset user's synced library - delete all their synced songs"""
     try:
         from config.database import execute_query
+        from services.orphan_gc import orphan_collector
 
         # Get user_id from session
         user_id = session.get('user_id')
         if not user_id:
             return jsonify({'success': False, 'error': 'Not authenticated'}), 401
 
-        # Delete user's song links from user_songs table
-        delete_user_songs = """
-            DELETE us FROM user_songs us
-            INNER JOIN users u ON us.user_id = u.user_id
-            WHERE u.spotify_id = %s
-        """
-        execute_query(delete_user_songs, (user_id,))
-
-        # Clean up orphaned songs (songs not linked to any user)
-        delete_orphaned = """
-            DELETE FROM songs
-            WHERE song_id NOT IN (SELECT DISTINCT song_id FROM user_songs)
-        """
-        execute_query(delete_orphaned)
+        db_user_id = session_db_user_id()
+
+        # Delete user's song links (indexed on uq_user_song); songs left without
+        # any link are removed by the background orphan collector
+        if db_user_id is not None:
+            execute_query("DELETE FROM user_songs WHERE user_id = %s", (db_user_id,))
+            orphan_collector.request()
 
         return jsonify({
             'success': True,
@@ -22,6 +22,8 @@ import requests
 from typing import Optional, Dict
 from dotenv import load_dotenv
 
+from services import metrics
+
 load_dotenv()
 
 
@@ -32,6 +34,7 @@ class AudioFeaturesService:
         """Initialize the audio features service"""
         self.rapidapi_key = os.getenv("RAPIDAPI_KEY")
         self.rapidapi_host = os.getenv("RAPIDAPI_HOST", "track-analysis.p.rapidapi.com")
+        self.base_url = os.getenv("SOUNDNET_BASE_URL", f"https://{self.rapidapi_host}").rstrip('/')
         self.enabled = bool(self.rapidapi_key and self.rapidapi_key != "your_rapidapi_key_here")
 
         if not self.enabled:
@@ -59,10 +62,12 @@ class AudioFeaturesService:
             "x-rapidapi-host": self.rapidapi_host
         }
 
-        url = f"https://{self.rapidapi_host}/pktx/spotify/{track_id}"
+        url = f"{self.base_url}/pktx/spotify/{track_id}"
 
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            with metrics.SOUNDNET_LATENCY.time():
+                response = requests.get(url, headers=headers, timeout=15)
+            metrics.SOUNDNET_REQUESTS.inc(status=response.status_code)
 
             if response.status_code == 200:
                 return self._parse_response(response.json(), track_id)
@@ -72,6 +77,7 @@ class AudioFeaturesService:
                 return None
 
             elif response.status_code == 429:
+                metrics.SOUNDNET_RATE_LIMITED.inc()
                 if retry_on_rate_limit and retry_count < max_retries:
                     retry_after = response.headers.get('Retry-After', '3')
                     wait_time = int(retry_after) if retry_after.isdigit() else 3
@@ -96,10 +102,12 @@ class AudioFeaturesService:
                 return None
 
         except requests.exceptions.Timeout:
+            metrics.SOUNDNET_REQUESTS.inc(status='timeout')
             print(f"[ERROR] Request timeout for track {track_id}")
             return None
 
         except requests.exceptions.RequestException as e:
+            metrics.SOUNDNET_REQUESTS.inc(status='error')
             print(f"[ERROR] Request failed for track {track_id}: {e}")
             return None
 
@@ -0,0 +1,151 @@
+"""
+Device Cache
+Remembers each user's playback device so starting a track is one Spotify call
+
+play_track used to list the user's devices before every play when the
+client did not name one. The device a track last started on is kept per
+user for DEVICE_CACHE_TTL seconds (refreshed on every successful play);
+when Spotify reports that device as gone, the entry is dropped and the
+caller lists devices again.
+
+Entries are kept in Redis when one is configured (DEVICE_CACHE_REDIS, else
+the session or Socket.IO Redis) so every worker and node shares them, and
+in this process otherwise or while Redis is unavailable.
+
+Usage:
+    from services.device_cache import device_cache, pick_device
+
+    device_id = device_cache.get(user_id) or pick_device(sp_client.devices())
+    device_cache.remember(user_id, device_id)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import redis
+
+from services import metrics
+
+KEY_PREFIX = 'mooddj:device:'
+REDIS_RETRY_AFTER = 5.0
+
+
+def _default_redis_url() -> Optional[str]:
+    if os.getenv('DEVICE_CACHE_REDIS'):
+        return os.getenv('DEVICE_CACHE_REDIS')
+    if os.getenv('SESSION_TYPE') == 'redis':
+        return os.getenv('SESSION_REDIS', 'redis://localhost:6379')
+    queue = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+    return queue if queue.startswith('redis') else None
+
+
+def pick_device(devices: dict) -> Optional[str]:
+    """
+    Choose a device from a devices() response: the active one, else the first
+
+    Returns:
+        str: Device ID, or None if the user has no devices
+    """
+    available = [device for device in devices.get('devices', []) if not device.get('is_restricted')]
+    if not available:
+        return None
+    active = [device for device in available if device.get('is_active')]
+    return (active or available)[0]['id']
+
+
+def is_device_gone(error) -> bool:
+    """Whether a SpotifyException means the target device is no longer available"""
+    if getattr(error, 'http_status', None) != 404:
+        return False
+    text = f"{getattr(error, 'reason', '')} {getattr(error, 'msg', '')}".lower()
+    return 'device' in text or 'no_active_device' in text
+
+
+class DeviceCache:
+    """Per-user last-used device with a short TTL"""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: int = 10000, redis_url: Optional[str] = None):
+        """
+        Args:
+            ttl: Seconds a remembered device is trusted (DEVICE_CACHE_TTL, default 300)
+            max_size: Users kept in memory
+            redis_url: Shared store ('' for this process only; defaults to
+                DEVICE_CACHE_REDIS, the session Redis or a redis:// Socket.IO queue)
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv('DEVICE_CACHE_TTL', '300'))
+        self.max_size = max_size
+        self.redis_url = redis_url if redis_url is not None else _default_redis_url()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._devices: OrderedDict = OrderedDict()  # user_id -> (device_id, remembered_at)
+        self._lock = threading.Lock()
+
+    def get(self, user_id: Optional[str]) -> Optional[str]:
+        """Remembered device for a user, or None if unknown or expired"""
+        if not user_id:
+            return None
+        client = self._client()
+        if client is not None:
+            try:
+                device_id = client.get(KEY_PREFIX + user_id)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+            else:
+                metrics.CACHE_REQUESTS.inc(cache='device', result='hit' if device_id else 'miss')
+                return device_id.decode() if device_id else None
+        with self._lock:
+            entry = self._devices.get(user_id)
+            if entry and time.monotonic() - entry[1] < self.ttl:
+                self._devices.move_to_end(user_id)
+                metrics.CACHE_REQUESTS.inc(cache='device', result='hit')
+                return entry[0]
+            self._devices.pop(user_id, None)
+        metrics.CACHE_REQUESTS.inc(cache='device', result='miss')
+        return None
+
+    def remember(self, user_id: Optional[str], device_id: str):
+        """Store the device a track was just started on"""
+        if not user_id or not device_id:
+            return
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(KEY_PREFIX + user_id, device_id, ex=max(int(self.ttl), 1))
+                return
+            except redis.RedisError as e:
+                self._redis_failed(e)
+        with self._lock:
+            self._devices[user_id] = (device_id, time.monotonic())
+            self._devices.move_to_end(user_id)
+            while len(self._devices) > self.max_size:
+                self._devices.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[str]):
+        """Forget a user's device (it disappeared)"""
+        with self._lock:
+            self._devices.pop(user_id, None)
+        client = self._client()
+        if client is not None and user_id:
+            try:
+                client.delete(KEY_PREFIX + user_id)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=1)
+        return self._redis
+
+    def _redis_failed(self, error):
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        print(f"[WARN] Device cache store unavailable, using this process "
+              f"for {REDIS_RETRY_AFTER:.0f}s: {error}")
+
+
+# Singleton instance for easy import
+device_cache = DeviceCache()
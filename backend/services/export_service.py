@@ -0,0 +1,126 @@
+"""
+Export Service
+Streams mood history and synced libraries as NDJSON or CSV
+
+Rows come from config.database.stream_query() in chunks and are serialized
+chunk by chunk, so memory use stays flat regardless of export size.
+
+Usage:
+    from services.export_service import export_mood_history
+
+    for chunk in export_mood_history(user_id, 'ndjson'):
+        ...  # write chunk to the response
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional
+
+from config.database import stream_query
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+MOOD_HISTORY_COLUMNS = ['session_id', 'detected_mood', 'confidence_score', 'timestamp']
+LIBRARY_COLUMNS = ['spotify_song_id', 'title', 'artist', 'album', 'duration_ms',
+                   'valence', 'energy', 'tempo', 'mood', 'added_at']
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def to_ndjson(chunks: Iterable[List[dict]]) -> Iterator[str]:
+    """Serialize row chunks as newline-delimited JSON, one string per chunk"""
+    for rows in chunks:
+        yield ''.join(json.dumps(row, default=_json_default) + '\n' for row in rows)
+
+
+def to_csv(chunks: Iterable[List[dict]], columns: List[str]) -> Iterator[str]:
+    """Serialize row chunks as CSV (header first), one string per chunk"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, (datetime, date)) else value
+                for key, value in row.items()
+            })
+        yield buffer.getvalue()
+
+
+def _serialize(chunks: Iterable[List[dict]], fmt: str, columns: List[str]) -> Iterator[str]:
+    if fmt == 'csv':
+        return to_csv(chunks, columns)
+    return to_ndjson(chunks)
+
+
+def export_mood_history(user_id, fmt: str = 'ndjson', since: Optional[datetime] = None,
+                        until: Optional[datetime] = None, chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Stream a user's mood history, oldest first
+
+    Args:
+        user_id: Internal user ID
+        fmt: 'ndjson' or 'csv'
+        since: Only include events at or after this time
+        until: Only include events before this time
+        chunk_size: Rows fetched and serialized per chunk
+
+    Yields:
+        str: Serialized chunks
+    """
+    conditions = ["user_id = %s"]
+    params = [user_id]
+    if since is not None:
+        conditions.append("timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("timestamp < %s")
+        params.append(until)
+
+    query = f"""
+        SELECT {', '.join(MOOD_HISTORY_COLUMNS)}
+        FROM mood_sessions
+        WHERE {' AND '.join(conditions)}
+        ORDER BY timestamp, session_id
+    """
+    return _serialize(stream_query(query, tuple(params), chunk_size, read_only=True), fmt, MOOD_HISTORY_COLUMNS)
+
+
+def export_library(user_id, fmt: str = 'ndjson', chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Stream a user's synced library with detected moods
+
+    Args:
+        user_id: Internal user ID
+        fmt: 'ndjson' or 'csv'
+        chunk_size: Rows fetched and serialized per chunk
+
+    Yields:
+        str: Serialized chunks
+    """
+    query = """
+        SELECT s.spotify_song_id, s.title, s.artist, s.album, s.duration_ms,
+               s.valence, s.energy, s.tempo, m.mood_name AS mood, us.added_at
+        FROM user_songs us
+        INNER JOIN songs s ON us.song_id = s.song_id
+        LEFT JOIN moods m ON us.mood_id = m.mood_id
+        WHERE us.user_id = %s
+        ORDER BY us.user_song_id
+    """
+    return _serialize(stream_query(query, (user_id,), chunk_size, read_only=True), fmt, LIBRARY_COLUMNS)
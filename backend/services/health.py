@@ -0,0 +1,126 @@
+"""
+Health Checks
+Cached dependency probes for the readiness endpoint
+
+Each probe is a callable that raises (or returns False) when its dependency
+is unusable. check() runs all probes at most once every HEALTH_CACHE_TTL
+seconds (HEALTH_FAILURE_TTL when something failed, so recovery is noticed
+sooner); concurrent callers during a refresh wait for that one run instead
+of probing again, so frequent load balancer checks never pile onto MySQL or
+Redis. Probes run in parallel, each bounded by HEALTH_PROBE_TIMEOUT: a probe
+that hangs is reported as failed and is not started again until it returns.
+
+Usage:
+    from services.health import HealthChecker
+
+    checker = HealthChecker()
+    checker.register('database', lambda: execute_query('SELECT 1', fetch=True))
+    result = checker.check()  # {'ready': bool, 'checks': {...}, 'cached': bool}
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class HealthChecker:
+    """Runs registered dependency probes and caches the result"""
+
+    def __init__(self, ttl: Optional[float] = None, failure_ttl: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            ttl: Seconds a passing result is reused (HEALTH_CACHE_TTL, default 5)
+            failure_ttl: Seconds a failing result is reused (HEALTH_FAILURE_TTL, default 1)
+            timeout: Seconds each probe may take before it counts as failed
+                (HEALTH_PROBE_TIMEOUT, default 2)
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv('HEALTH_CACHE_TTL', '5'))
+        self.failure_ttl = failure_ttl if failure_ttl is not None else float(os.getenv('HEALTH_FAILURE_TTL', '1'))
+        self.timeout = timeout if timeout is not None else float(os.getenv('HEALTH_PROBE_TIMEOUT', '2'))
+        self._probes: Dict[str, Callable] = {}
+        self._result: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()          # guards the cached result
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._running: Dict[str, threading.Thread] = {}  # probes still running (timed out earlier)
+
+    def register(self, name: str, probe: Callable):
+        """Add a probe; it fails by raising or returning False"""
+        self._probes[name] = probe
+
+    def check(self, force: bool = False) -> Dict:
+        """
+        Get dependency status, probing only if the cached result has expired
+
+        Returns:
+            dict: {'ready': bool, 'checks': {name: {'ok', 'latency_ms', 'error'?}}, 'cached': bool}
+        """
+        if not force:
+            cached = self._cached()
+            if cached is not None:
+                return cached
+
+        with self._refresh_lock:
+            if not force:
+                cached = self._cached()  # Refreshed while we waited
+                if cached is not None:
+                    return cached
+
+            checks = self._run_all()
+            result = {
+                'ready': all(check['ok'] for check in checks.values()),
+                'checks': checks
+            }
+            with self._lock:
+                self._result = result
+                self._checked_at = time.monotonic()
+            return {**result, 'cached': False}
+
+    def _cached(self) -> Optional[Dict]:
+        with self._lock:
+            if self._result is None:
+                return None
+            ttl = self.ttl if self._result['ready'] else self.failure_ttl
+            if time.monotonic() - self._checked_at >= ttl:
+                return None
+            return {**self._result, 'cached': True}
+
+    def _run_all(self) -> Dict[str, Dict]:
+        """Run every probe in its own thread and wait up to `timeout` for them"""
+        results: Dict[str, Dict] = {}
+        started = {}
+        for name, probe in self._probes.items():
+            previous = self._running.get(name)
+            if previous is not None and previous.is_alive():
+                results[name] = {'ok': False, 'error': 'previous probe still running', 'latency_ms': 0.0}
+                continue
+            thread = threading.Thread(target=self._run, args=(probe, results, name),
+                                      name=f'health-{name}', daemon=True)
+            thread.start()
+            started[name] = thread
+
+        deadline = time.monotonic() + self.timeout
+        for name, thread in started.items():
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                self._running[name] = thread
+                results[name] = {'ok': False, 'error': f'timed out after {self.timeout}s',
+                                 'latency_ms': round(self.timeout * 1000, 1)}
+            else:
+                self._running.pop(name, None)
+        return {name: results[name] for name in self._probes if name in results}
+
+    @staticmethod
+    def _run(probe: Callable, results: Dict, name: str):
+        start = time.perf_counter()
+        try:
+            ok = probe() is not False
+            result = {'ok': ok}
+            if not ok:
+                result['error'] = 'probe reported not ready'
+        except Exception as e:
+            result = {'ok': False, 'error': str(e)[:200]}
+        result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        results.setdefault(name, result)
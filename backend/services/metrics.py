@@ -0,0 +1,329 @@
+"""
+Metrics
+Thread-safe counters, gauges and histograms rendered in the Prometheus text format
+
+Instrumented code updates module-level metrics (a dict update under a lock);
+GET /metrics renders them. Metrics backed by a callback (pool usage, buffer
+size) are only evaluated at scrape time.
+
+Values are kept per process and every series carries a `worker` label (the
+process id). With GUNICORN_WORKERS > 1 each scrape of /metrics is answered by
+whichever worker accepts it, so every worker's series is sampled only every
+few scrapes: the label keeps those series apart, and rate()/increase() over a
+window of several scrape intervals per worker stay correct. Aggregate across
+workers in queries, e.g. sum without (worker) (rate(...[5m])); gauges show
+the last value each worker reported.
+
+Usage:
+    from services import metrics
+
+    metrics.SOUNDNET_REQUESTS.inc(status='200')
+    with metrics.SPOTIFY_LATENCY.time(operation='devices'):
+        sp_client.devices()
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Set of metrics rendered together"""
+
+    def __init__(self, worker_label: bool = True):
+        """
+        Args:
+            worker_label: Add worker="<pid>" to every series
+        """
+        self.worker_label = worker_label
+        self._metrics: List['_Metric'] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric'):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        const = (('worker', os.getpid()),) if self.worker_label else ()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(const))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = None):
+        """
+        Args:
+            registry: Registry to render in (default: the application REGISTRY)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def _read_callback(self):
+        """Values from the scrape-time callback as [(label_value_tuple, number)], or None on error"""
+        try:
+            result = self._callback()
+        except Exception as e:
+            print(f"[WARN] Metric {self.name} callback failed: {e}")
+            return None
+        return list(result.items()) if isinstance(result, dict) else [((), result)]
+
+    def render(self, const: Sequence[Tuple[str, str]] = ()) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, kept here or read from a callback at scrape time"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable] = None,
+                 registry: Optional[Registry] = None):
+        """
+        Args:
+            callback: Called at scrape time; returns a running total, or {label_value_tuple: total}
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: Dict[Tuple, float] = {}
+        self._callback = callback
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self, const=()):
+        if self._callback is not None:
+            values = self._read_callback()
+            if values is None:
+                return []
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key, const)} {_format_value(value)}'
+            for key, value in values
+        ]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is read from a callback at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback: Optional[Callable] = None,
+                 registry: Optional[Registry] = None):
+        """
+        Args:
+            callback: Called at scrape time; returns a number, or {label_value_tuple: number}
+        """
+        super().__init__(name, documentation, labelnames, registry)
+        self._values: Dict[Tuple, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self, const=()):
+        if self._callback is not None:
+            values = self._read_callback()
+            if values is None:
+                return []
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key, const)} {_format_value(value)}'
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional[Registry] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return sum(series[:-1]) if series else 0
+
+    def render(self, const=()):
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        lines = self._header()
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = _format_value(bound) if bound != float('inf') else '+Inf'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, tuple(const) + (("le", le),))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key, const)} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key, const)} {cumulative}')
+        return lines
+
+
+def render() -> str:
+    """Render the application metrics in the Prometheus text exposition format"""
+    return REGISTRY.render()
+
+
+def _pool_stats(field: str) -> Callable:
+    def read():
+        from config.database import get_pool_stats
+        return get_pool_stats()[field]
+    return read
+
+
+def _mood_log_pending():
+    from services.mood_log_buffer import mood_log_buffer
+    return mood_log_buffer.pending()
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_LATENCY = Histogram(
+    'mooddj_http_request_duration_seconds', 'HTTP request latency by route',
+    ['method', 'route', 'status']
+)
+
+DETECTOR_INFERENCE = Histogram(
+    'mooddj_detector_inference_seconds', 'Face mesh inference time per frame',
+    buckets=(0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+)
+DETECTOR_FRAMES = Counter(
+    'mooddj_detector_frames_total', 'Frames processed by the mood detector',
+    ['result']  # detected, no_face, decode_error
+)
+
+SOUNDNET_REQUESTS = Counter(
+    'mooddj_soundnet_requests_total', 'SoundNet audio feature requests by HTTP status',
+    ['status']
+)
+SOUNDNET_LATENCY = Histogram(
+    'mooddj_soundnet_request_duration_seconds', 'SoundNet request latency'
+)
+SOUNDNET_RATE_LIMITED = Counter(
+    'mooddj_soundnet_rate_limited_total', 'SoundNet 429 responses'
+)
+
+SPOTIFY_LATENCY = Histogram(
+    'mooddj_spotify_api_duration_seconds', 'Spotify Web API call latency',
+    ['operation']
+)
+
+TOKEN_REFRESHES = Counter(
+    'mooddj_spotify_token_refreshes_total', 'Spotify access token refresh attempts',
+    ['result']  # refreshed, reused, failed
+)
+
+CACHE_REQUESTS = Counter(
+    'mooddj_cache_requests_total', 'In-process cache lookups',
+    ['cache', 'result']  # result: hit, miss
+)
+
+SOCKETIO_CONNECTIONS = Gauge(
+    'mooddj_socketio_connections', 'Open Socket.IO connections in this process'
+)
+
+DB_POOL_IN_USE = Gauge('mooddj_db_pool_in_use', 'Checked-out database connections',
+                       callback=_pool_stats('in_use'))
+DB_POOL_WAITING = Gauge('mooddj_db_pool_waiting', 'Threads waiting for a database connection',
+                        callback=_pool_stats('waiting'))
+DB_POOL_OVERFLOW_IN_USE = Gauge('mooddj_db_pool_overflow_in_use', 'Overflow connections in use',
+                                callback=_pool_stats('overflow_in_use'))
+DB_POOL_SIZE = Gauge('mooddj_db_pool_size', 'Persistent pool size',
+                     callback=_pool_stats('pool_size'))
+DB_POOL_TIMEOUTS = Counter('mooddj_db_pool_timeouts_total', 'Checkouts that timed out',
+                           callback=_pool_stats('timeouts'))
+
+MOOD_LOG_PENDING = Gauge('mooddj_mood_log_pending', 'Mood events waiting to be written',
+                         callback=_mood_log_pending)
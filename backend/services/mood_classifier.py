@@ -0,0 +1,133 @@
+"""
+Mood Classifier
+Vectorized mapping from audio features (valence, energy, tempo) to mood names
+
+A mood scores one point for each feature that falls inside its range. The mood
+with the highest score wins; ties go to the mood listed first, and a song that
+matches no range (or is missing features) is 'neutral'.
+
+Usage:
+    from services.mood_classifier import classify_moods
+
+    moods = classify_moods(valences, energies, tempos)  # NumPy array of mood names
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from config.database import execute_query, transaction
+from services.mood_config import mood_registry, DEFAULT_MOOD
+
+
+def classify_moods(valence, energy, tempo, mood_params: Optional[Dict] = None) -> np.ndarray:
+    """
+    Classify a batch of songs in one NumPy pass
+
+    Args:
+        valence: Sequence of valence values (None/NaN allowed)
+        energy: Sequence of energy values (None/NaN allowed)
+        tempo: Sequence of tempo values (None/NaN allowed)
+        mood_params: Ordered {mood: {'valence': (min, max), ...}} (defaults to the mood registry)
+
+    Returns:
+        np.ndarray: Mood name for each song
+    """
+    mood_params = mood_params or mood_registry.get_params()
+    names = np.array(list(mood_params.keys()), dtype=object)
+
+    features = {
+        'valence': np.asarray(valence, dtype=float).reshape(-1),
+        'energy': np.asarray(energy, dtype=float).reshape(-1),
+        'tempo': np.asarray(tempo, dtype=float).reshape(-1)
+    }
+
+    # scores[m, i] = number of features of song i inside the ranges of mood m
+    scores = np.zeros((len(names), features['valence'].shape[0]), dtype=np.int8)
+    for m, params in enumerate(mood_params.values()):
+        for feature, values in features.items():
+            low, high = params[feature]
+            scores[m] += (values >= low) & (values <= high)
+
+    # argmax returns the first maximum, matching "first mood wins ties"
+    moods = names[np.argmax(scores, axis=0)]
+
+    missing = np.isnan(features['valence']) | np.isnan(features['energy']) | np.isnan(features['tempo'])
+    moods[missing | (scores.max(axis=0) == 0)] = DEFAULT_MOOD
+
+    return moods
+
+
+def classify_mood(valence, energy, tempo, mood_params: Optional[Dict] = None) -> str:
+    """Classify a single song (see classify_moods)"""
+    if valence is None or energy is None or tempo is None:
+        return DEFAULT_MOOD
+    return str(classify_moods([valence], [energy], [tempo], mood_params)[0])
+
+
+def reclassify_user_songs(batch_size: int = 1000, mood_params: Optional[Dict] = None) -> Dict[str, int]:
+    """
+    Recompute user_songs.mood_id for the whole library
+
+    Walks user_songs in primary-key order, classifies each batch in one pass
+    and issues one UPDATE per mood for rows whose mood changed. Run it after
+    changing the mood thresholds.
+
+    Args:
+        batch_size: Number of user_songs rows classified per pass
+        mood_params: Mood ranges to classify with (defaults to the moods table)
+
+    Returns:
+        dict: Number of rows scanned and updated
+    """
+    # Thresholds were just changed, so don't trust the cached copy
+    mood_registry.refresh()
+    mood_params = mood_params or mood_registry.get_params()
+
+    scanned = 0
+    updated = 0
+    last_id = 0
+
+    while True:
+        rows = execute_query(
+            """
+                SELECT us.user_song_id, us.mood_id, s.valence, s.energy, s.tempo
+                FROM user_songs us
+                INNER JOIN songs s ON us.song_id = s.song_id
+                WHERE us.user_song_id > %s
+                ORDER BY us.user_song_id
+                LIMIT %s
+            """,
+            (last_id, batch_size),
+            fetch=True
+        )
+        if not rows:
+            break
+
+        moods = classify_moods(
+            [row['valence'] for row in rows],
+            [row['energy'] for row in rows],
+            [row['tempo'] for row in rows],
+            mood_params
+        )
+
+        changes: Dict[int, list] = {}
+        for row, mood in zip(rows, moods):
+            mood_id = mood_registry.get_mood_id(mood)
+            if mood_id is not None and mood_id != row['mood_id']:
+                changes.setdefault(mood_id, []).append(row['user_song_id'])
+
+        with transaction() as tx:
+            for mood_id, user_song_ids in changes.items():
+                placeholders = ', '.join(['%s'] * len(user_song_ids))
+                tx.execute(
+                    f"UPDATE user_songs SET mood_id = %s WHERE user_song_id IN ({placeholders})",
+                    (mood_id, *user_song_ids)
+                )
+                updated += len(user_song_ids)
+
+        scanned += len(rows)
+        last_id = rows[-1]['user_song_id']
+        print(f"[INFO] Reclassified {scanned} songs ({updated} changed)")
+
+    return {'scanned': scanned, 'updated': updated}
@@ -0,0 +1,121 @@
+"""
+Mood Config Registry
+Single in-process source of mood ids and audio-feature ranges
+
+Loads every row of the moods table once, caches name -> id and the
+target_*_min/max ranges, and reloads them after MOOD_CONFIG_TTL seconds or
+when invalidate() is called. Both the song classifier and the recommendation
+query read their thresholds from here.
+
+Usage:
+    from services.mood_config import mood_registry
+
+    mood_id = mood_registry.get_mood_id('happy')
+    params = mood_registry.get_range('happy')  # {'valence': (0.6, 1.0), ...}
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from config.database import execute_query
+
+DEFAULT_MOOD = 'neutral'
+
+# Moods produced by the detector, in tie-breaking order, with the ranges used
+# when the moods table is unavailable
+DEFAULT_MOOD_PARAMS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    'happy': {'valence': (0.6, 1.0), 'energy': (0.5, 1.0), 'tempo': (100, 180)},
+    'angry': {'valence': (0.0, 0.4), 'energy': (0.6, 1.0), 'tempo': (120, 180)},
+    'neutral': {'valence': (0.3, 0.7), 'energy': (0.3, 0.7), 'tempo': (70, 140)}
+}
+
+
+class MoodRegistry:
+    """Caches the moods table in memory"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        """
+        Args:
+            ttl: Seconds before the cache is reloaded (MOOD_CONFIG_TTL, default 300)
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv('MOOD_CONFIG_TTL', '300'))
+        self._lock = threading.Lock()
+        self._mood_ids: Dict[str, int] = {}
+        self._params: Dict[str, Dict[str, Tuple[float, float]]] = dict(DEFAULT_MOOD_PARAMS)
+        self._loaded_at: Optional[float] = None
+
+    def refresh(self):
+        """Reload all mood rows from the database"""
+        with self._lock:
+            self._load()
+
+    def invalidate(self):
+        """Force a reload on next access (call after editing the moods table)"""
+        with self._lock:
+            self._loaded_at = None
+
+    def get_params(self) -> Dict[str, Dict[str, Tuple[float, float]]]:
+        """
+        Get ranges for the detector moods, in tie-breaking order
+
+        Returns:
+            dict: {mood_name: {'valence': (min, max), 'energy': ..., 'tempo': ...}}
+        """
+        self._ensure_loaded()
+        return self._params
+
+    def get_range(self, mood: str) -> Dict[str, Tuple[float, float]]:
+        """Get ranges for a mood, falling back to neutral for unknown moods"""
+        params = self.get_params()
+        return params.get(mood, params[DEFAULT_MOOD])
+
+    def get_mood_id(self, mood: str) -> Optional[int]:
+        """Get moods.mood_id for a mood name, or None if it is not in the table"""
+        self._ensure_loaded()
+        return self._mood_ids.get(mood)
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._load()
+
+    def _load(self):
+        """Load the moods table (caller holds the lock)"""
+        try:
+            rows = execute_query("SELECT * FROM moods", fetch=True)
+        except Exception as e:
+            # Keep serving the last known config; retry after the next TTL
+            print(f"[ERROR] Failed to load moods table, using cached mood config: {e}")
+            self._loaded_at = time.monotonic()
+            return
+
+        by_name = {row['mood_name']: row for row in rows}
+        params = {}
+        for mood, defaults in DEFAULT_MOOD_PARAMS.items():
+            row = by_name.get(mood)
+            if row is None:
+                params[mood] = defaults
+                continue
+            params[mood] = {
+                feature: (_as_float(row[f'target_{feature}_min']), _as_float(row[f'target_{feature}_max']))
+                for feature in ('valence', 'energy', 'tempo')
+            }
+
+        self._mood_ids = {name: row['mood_id'] for name, row in by_name.items()}
+        self._params = params
+        self._loaded_at = time.monotonic()
+
+
+def _as_float(value) -> float:
+    # FLOAT columns come back with single-precision noise (0.6 -> 0.6000000238)
+    return round(float(value), 6)
+
+
+# Singleton instance for easy import
+mood_registry = MoodRegistry()
@@ -4,9 +4,12 @@ from collections import deque, Counter
 import mediapipe as mp
 import numpy as np
 import base64
+import threading
 from io import BytesIO
 from PIL import Image
 
+from services import metrics
+
 
 # ------------- Landmark helpers -------------
 def dist(p, q):
@@ -77,9 +80,29 @@ class MoodDetector:
             min_tracking_confidence=0.5
         )
 
+        # A FaceMesh graph is not safe to run from several request threads at once
+        self._inference_lock = threading.Lock()
+
         # Mood history for majority voting (simplified to 3 moods)
         self.mood_history = deque(maxlen=WIN)
 
+        # Set once the model has run its first (slow) inference
+        self.warmed_up = False
+
+    def warm_up(self):
+        """
+        Run one inference on a blank frame so the model is loaded before real traffic
+
+        Returns:
+            bool: True once the detector is ready
+        """
+        if not self.warmed_up:
+            blank = np.zeros((64, 64, 3), dtype=np.uint8)
+            with self._inference_lock:
+                self.face_mesh.process(blank)
+            self.warmed_up = True
+        return self.warmed_up
+
     def detect_from_base64(self, image_base64):
         """Detect mood from base64 encoded image (for API)"""
         try:
@@ -93,6 +116,7 @@ class MoodDetector:
 
             return self.detect_from_frame(frame)
         except Exception as e:
+            metrics.DETECTOR_FRAMES.inc(result='decode_error')
             print(f"Error detecting mood from base64: {e}")
             return None
 
@@ -139,8 +163,10 @@ class MoodDetector:
         """
         h, w = frame.shape[:2]
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb)
+        with self._inference_lock, metrics.DETECTOR_INFERENCE.time():
+            results = self.face_mesh.process(rgb)
         faces = getattr(results, "multi_face_landmarks", None)
+        metrics.DETECTOR_FRAMES.inc(result='detected' if faces else 'no_face')
 
         if faces:
             lm = faces[0].landmark
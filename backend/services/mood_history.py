@@ -0,0 +1,113 @@
+"""
+Mood History Service
+Keyset-paginated reads of a user's mood_sessions history
+
+Pages are ordered newest first by (timestamp, session_id) and continue from
+an opaque cursor that encodes the last row of the previous page, so every
+page is a bounded range scan on idx_user_timestamp_covering no matter how
+deep the client has paged.
+
+Usage:
+    from services.mood_history import get_history_page
+
+    page = get_history_page(user_id, limit=100)
+    next_page = get_history_page(user_id, limit=100, cursor=page['next_cursor'])
+"""
+
+import base64
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config.database import execute_query
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 500
+
+
+def encode_cursor(timestamp: datetime, session_id: int) -> str:
+    """Encode the position after a row as an opaque cursor"""
+    raw = f"{timestamp.isoformat()}|{session_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, session_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(session_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_limit(value, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """
+    Validate a page size query parameter
+
+    Raises:
+        ValueError: If the value is not an integer between 1 and maximum
+    """
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= maximum:
+        raise ValueError(f'limit must be between 1 and {maximum}')
+    return limit
+
+
+def get_history_page(user_id, limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None,
+                     since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict:
+    """
+    Get one page of mood history, newest first
+
+    Args:
+        user_id: Internal user ID
+        limit: Page size (1..MAX_LIMIT)
+        cursor: next_cursor from the previous page
+        since: Only include events at or after this time
+        until: Only include events before this time
+
+    Returns:
+        dict: {'history': [...], 'next_cursor': str or None}
+    """
+    conditions = ["user_id = %s"]
+    params = [user_id]
+
+    if since is not None:
+        conditions.append("timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append("timestamp < %s")
+        params.append(until)
+    if cursor:
+        last_timestamp, last_session_id = decode_cursor(cursor)
+        conditions.append("(timestamp < %s OR (timestamp = %s AND session_id < %s))")
+        params.extend([last_timestamp, last_timestamp, last_session_id])
+
+    query = f"""
+        SELECT session_id, detected_mood, confidence_score, timestamp
+        FROM mood_sessions
+        WHERE {' AND '.join(conditions)}
+        ORDER BY timestamp DESC, session_id DESC
+        LIMIT %s
+    """
+    # Fetch one extra row to know whether another page exists
+    params.append(limit + 1)
+
+    rows = execute_query(query, tuple(params), fetch=True, read_only=True)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['timestamp'], last['session_id'])
+
+    return {'history': rows, 'next_cursor': next_cursor}
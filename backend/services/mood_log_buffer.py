@@ -0,0 +1,264 @@
+"""
+Mood Log Buffer
+Write-behind buffer for mood_sessions inserts
+
+POST /api/mood/log is called for every detection, so instead of one INSERT,
+checkout and commit per call, events are queued in memory and written by a
+background thread as multi-row inserts once MOOD_LOG_BATCH_SIZE events are
+waiting or MOOD_LOG_FLUSH_INTERVAL seconds have passed. When the buffer holds
+MOOD_LOG_MAX_BUFFER events, log() waits up to MOOD_LOG_PUT_TIMEOUT seconds
+for room and then reports the buffer as full so the caller can back off.
+
+Events are validated in log() so one malformed event cannot fail every batch
+it lands in. A batch that still fails is re-queued; once its events have
+failed MOOD_LOG_MAX_ATTEMPTS times they are inserted one row at a time and
+rows the database rejects are dead-lettered (logged and kept in
+dead_letters) instead of being retried forever.
+
+Usage:
+    from services.mood_log_buffer import mood_log_buffer
+
+    if not mood_log_buffer.log(user_id, 'happy', 0.9):  # ValueError if invalid
+        ...  # buffer full, ask the client to retry later
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from config.database import CONNECTION_ERRORS, transaction
+from services import mood_stats
+
+INSERT_QUERY = """
+    INSERT INTO mood_sessions (user_id, detected_mood, confidence_score, timestamp)
+    VALUES (%s, %s, %s, %s)
+"""
+
+MAX_MOOD_LENGTH = 50  # mood_sessions.detected_mood VARCHAR(50)
+
+
+def parse_event(user_id, mood, confidence) -> Tuple[int, str, float]:
+    """
+    Validate and coerce a mood event's fields to their column types
+
+    Raises:
+        ValueError: If a field is missing, the wrong type or out of range
+    """
+    if isinstance(user_id, bool):
+        raise ValueError("user_id must be an integer")
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        raise ValueError("user_id must be an integer")
+
+    if not isinstance(mood, str) or not mood.strip():
+        raise ValueError("mood must be a non-empty string")
+    mood = mood.strip()
+    if len(mood) > MAX_MOOD_LENGTH:
+        raise ValueError(f"mood must be at most {MAX_MOOD_LENGTH} characters")
+
+    if isinstance(confidence, bool):
+        raise ValueError("confidence must be a number between 0 and 1")
+    try:
+        confidence = float(confidence)
+    except (TypeError, ValueError):
+        raise ValueError("confidence must be a number between 0 and 1")
+    if not 0.0 <= confidence <= 1.0:  # also rejects NaN
+        raise ValueError("confidence must be a number between 0 and 1")
+
+    return user_id, mood, confidence
+
+
+class MoodLogBuffer:
+    """Buffers mood events and flushes them to mood_sessions in batches"""
+
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 max_size: Optional[int] = None, put_timeout: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        """
+        Args:
+            batch_size: Events per multi-row insert (MOOD_LOG_BATCH_SIZE, default 200)
+            flush_interval: Max seconds an event waits before being written (MOOD_LOG_FLUSH_INTERVAL, default 2)
+            max_size: Max buffered events before log() blocks (MOOD_LOG_MAX_BUFFER, default 10000)
+            put_timeout: Seconds log() waits for room when full (MOOD_LOG_PUT_TIMEOUT, default 0.5)
+            max_attempts: Failed batch writes before events are written row by row
+                (MOOD_LOG_MAX_ATTEMPTS, default 3)
+        """
+        self.batch_size = batch_size or int(os.getenv('MOOD_LOG_BATCH_SIZE', '200'))
+        self.flush_interval = flush_interval or float(os.getenv('MOOD_LOG_FLUSH_INTERVAL', '2'))
+        self.max_size = max_size or int(os.getenv('MOOD_LOG_MAX_BUFFER', '10000'))
+        self.put_timeout = put_timeout if put_timeout is not None else float(os.getenv('MOOD_LOG_PUT_TIMEOUT', '0.5'))
+        self.max_attempts = max_attempts or int(os.getenv('MOOD_LOG_MAX_ATTEMPTS', '3'))
+
+        # Items are (event, failed attempts)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self.written = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.dead_letters: deque = deque(maxlen=1000)  # (event, error) of rows the database rejected
+
+    def log(self, user_id, mood: str, confidence: float, timestamp: Optional[datetime] = None) -> bool:
+        """
+        Queue a mood event for writing
+
+        Returns:
+            bool: True if queued, False if the buffer stayed full for put_timeout seconds
+
+        Raises:
+            ValueError: If the event is invalid (see parse_event)
+        """
+        timestamp = mood_stats.naive_utc(timestamp) if timestamp else mood_stats.utc_now()
+        event = (*parse_event(user_id, mood, confidence), timestamp)
+        self._ensure_started()
+        try:
+            self._queue.put((event, 0), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+
+    def flush(self) -> int:
+        """
+        Write every buffered event now
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        while True:
+            batch = self._take(self.batch_size)
+            if not batch:
+                return written
+            count = self._write(batch)
+            if not count:
+                # Write failed and the batch was re-queued; leave it for the next flush
+                return written
+            written += count
+
+    def pending(self) -> int:
+        """Number of events waiting to be written"""
+        return self._queue.qsize()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stop the flusher thread and drain the buffer"""
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='mood-log-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Flush when batch_size events are waiting or flush_interval has passed"""
+        while not self._stop.is_set():
+            batch: List[Tuple] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch and not self._write(batch):
+                # Database unavailable: back off instead of retrying in a tight loop
+                self._stop.wait(self.flush_interval)
+
+    def _take(self, limit: int) -> List[Tuple]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, items: List[Tuple]) -> int:
+        """
+        Insert a batch and update its rollups in one transaction
+
+        When the batch fails, events that have now failed max_attempts times
+        are written one by one (see _write_rows) and the rest are re-queued.
+
+        Returns:
+            int: Number of events written
+        """
+        with self._flush_lock:
+            try:
+                self._insert([event for event, _ in items])
+                self.written += len(items)
+                return len(items)
+            except Exception as e:
+                print(f"[ERROR] Failed to flush {len(items)} mood events: {e}")
+
+            retry = [(event, attempts + 1) for event, attempts in items]
+            self._requeue([item for item in retry if item[1] < self.max_attempts])
+            exhausted = [item for item in retry if item[1] >= self.max_attempts]
+            return self._write_rows(exhausted) if exhausted else 0
+
+    def _write_rows(self, items: List[Tuple]) -> int:
+        """Insert events one at a time, dead-lettering rows the database rejects"""
+        written = 0
+        for index, (event, attempts) in enumerate(items):
+            try:
+                self._insert([event])
+                written += 1
+            except CONNECTION_ERRORS as e:
+                # The server, not the row, is the problem: keep the rest for later
+                print(f"[ERROR] Mood log database unavailable: {e}")
+                self._requeue(items[index:])
+                break
+            except Exception as e:
+                self.dead_letters.append((event, str(e)))
+                print(f"[ERROR] Dead-lettered mood event {event}: {e}")
+        self.written += written
+        return written
+
+    def _insert(self, batch: List[Tuple]):
+        with transaction() as tx:
+            tx.executemany(INSERT_QUERY, batch)
+            mood_stats.record_events(tx, batch)
+
+    def _requeue(self, items: List[Tuple]):
+        dropped = 0
+        for item in items:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                dropped += 1
+        if dropped:
+            self.dropped += dropped
+            print(f"[WARN] Mood log buffer full, dropped {dropped} events")
+
+    def stats(self) -> dict:
+        """Buffer counters"""
+        return {
+            'pending': self.pending(),
+            'written': self.written,
+            'rejected': self.rejected,
+            'dropped': self.dropped,
+            'dead_lettered': len(self.dead_letters)
+        }
+
+
+# Singleton instance for easy import
+mood_log_buffer = MoodLogBuffer()
+atexit.register(mood_log_buffer.shutdown)
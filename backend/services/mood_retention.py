@@ -0,0 +1,165 @@
+"""
+Mood Retention Service
+Keeps the partitioned mood_sessions table (migrations/002) bounded
+
+mood_sessions is range-partitioned by month. The retention job:
+  * splits new monthly partitions off p_future so upcoming months never
+    land in the catch-all partition (MOOD_PARTITION_MONTHS_AHEAD, default 3)
+  * drops every partition entirely older than MOOD_RETENTION_DAYS (default
+    180) - a metadata operation instead of a large DELETE
+
+Stats keep working for dropped months because they are served from the
+hourly/daily rollups, which the mood log flusher maintains as events are
+written and which retention never touches (anything inserting into
+mood_sessions some other way must update the rollups itself, see
+services/mood_stats.record_events). /history and exports only return events
+inside the retention window.
+
+Usage:
+    from services.mood_retention import run_retention
+
+    result = run_retention(retention_days=180)
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config.database import execute_query
+from services.mood_stats import utc_now
+
+RETENTION_DAYS = int(os.getenv('MOOD_RETENTION_DAYS', '180'))
+MONTHS_AHEAD = int(os.getenv('MOOD_PARTITION_MONTHS_AHEAD', '3'))
+
+FUTURE_PARTITION = 'p_future'
+
+PARTITIONS_QUERY = """
+    SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS description
+    FROM INFORMATION_SCHEMA.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'mood_sessions'
+      AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+def get_partitions() -> List[Dict]:
+    """
+    Get mood_sessions partitions in order
+
+    Returns:
+        list: [{'name': str, 'upper': int or None}, ...] where upper is the
+              exclusive UNIX_TIMESTAMP bound (None for MAXVALUE); empty if
+              the table is not partitioned
+    """
+    partitions = []
+    for row in execute_query(PARTITIONS_QUERY, fetch=True):
+        description = str(row['description'])
+        partitions.append({
+            'name': row['name'],
+            'upper': None if description.upper() == 'MAXVALUE' else int(description)
+        })
+    return partitions
+
+
+def _add_months(moment: datetime, months: int) -> datetime:
+    month_index = moment.year * 12 + moment.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_month(partition: Dict) -> Optional[datetime]:
+    """Start of the month a pYYYYMM partition holds"""
+    try:
+        return datetime.strptime(partition['name'], 'p%Y%m')
+    except ValueError:
+        return None
+
+
+def ensure_future_partitions(months_ahead: int = MONTHS_AHEAD, now: Optional[datetime] = None) -> List[str]:
+    """
+    Split monthly partitions off p_future up to `months_ahead` months from now
+
+    Args:
+        months_ahead: How many months past the current one must have their own partition
+        now: Current naive UTC time (for tests)
+
+    Returns:
+        list: Names of the partitions created
+    """
+    partitions = get_partitions()
+    if not partitions or partitions[-1]['name'] != FUTURE_PARTITION:
+        return []
+
+    bounded = [p for p in partitions if p['upper'] is not None]
+    months = [m for m in (_partition_month(p) for p in bounded) if m is not None]
+    if months:
+        next_month = _add_months(max(months), 1)
+    elif bounded:
+        upper = datetime.fromtimestamp(bounded[-1]['upper'], timezone.utc).replace(tzinfo=None)
+        next_month = upper.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        return []
+
+    horizon = _add_months(now or utc_now(), months_ahead)
+    created = []
+    while next_month <= horizon:
+        name = next_month.strftime('p%Y%m')
+        upper = _add_months(next_month, 1).strftime('%Y-%m-%d %H:%M:%S')
+        # p_future is (nearly) empty, so reorganizing it only moves a handful of rows
+        execute_query(f"""
+            ALTER TABLE mood_sessions REORGANIZE PARTITION {FUTURE_PARTITION} INTO (
+                PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{upper}')),
+                PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE
+            )
+        """)
+        created.append(name)
+        next_month = _add_months(next_month, 1)
+
+    if created:
+        print(f"[INFO] Created mood_sessions partitions: {', '.join(created)}")
+    return created
+
+
+def drop_expired_partitions(retention_days: int = RETENTION_DAYS, now: Optional[float] = None) -> List[str]:
+    """
+    Drop partitions whose whole range is older than retention_days
+
+    Args:
+        retention_days: Raw events younger than this are always kept
+        now: Current UNIX time (for tests)
+
+    Returns:
+        list: Names of the partitions dropped
+    """
+    cutoff = (now if now is not None else time.time()) - retention_days * 86400
+    partitions = get_partitions()
+
+    dropped = []
+    for partition in partitions:
+        upper = partition['upper']
+        if upper is None or upper > cutoff:
+            break
+        execute_query(f"ALTER TABLE mood_sessions DROP PARTITION {partition['name']}")
+        dropped.append(partition['name'])
+
+    if dropped:
+        print(f"[INFO] Dropped mood_sessions partitions: {', '.join(dropped)}")
+    return dropped
+
+
+def run_retention(retention_days: int = RETENTION_DAYS, months_ahead: int = MONTHS_AHEAD) -> Dict:
+    """
+    Run the full retention pass: add upcoming partitions, then drop expired ones
+
+    Returns:
+        dict: {'created': [...], 'dropped': [...]}
+    """
+    if not get_partitions():
+        print("[WARN] mood_sessions is not partitioned; apply migrations/002_partition_mood_sessions.sql")
+        return {'created': [], 'dropped': []}
+
+    return {
+        'created': ensure_future_partitions(months_ahead),
+        'dropped': drop_expired_partitions(retention_days)
+    }
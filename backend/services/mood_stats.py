@@ -0,0 +1,155 @@
+"""
+Mood Stats Service
+Incrementally maintained mood statistics (migrations/001_mood_stats_rollups.sql)
+
+Every batch of mood events written to mood_sessions also adds its counts and
+confidence sums to per-user, per-mood hourly and daily rollup rows, in the
+same transaction. NULL confidences are counted as events but left out of the
+confidence sum and count (migrations/004), so the average matches
+AVG(confidence_score). Stats queries then read a handful of pre-aggregated
+rows instead of scanning the user's whole history.
+
+Timestamps are naive UTC throughout (see naive_utc and utc_now).
+
+Usage:
+    from services.mood_stats import get_mood_stats
+
+    stats = get_mood_stats(user_id, since=datetime(2025, 1, 1))
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.database import execute_query
+
+HOURLY_UPSERT = """
+    INSERT INTO mood_stats_hourly (user_id, bucket_start, detected_mood, event_count, confidence_count, confidence_sum)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        event_count = event_count + VALUES(event_count),
+        confidence_count = confidence_count + VALUES(confidence_count),
+        confidence_sum = confidence_sum + VALUES(confidence_sum)
+"""
+
+DAILY_UPSERT = """
+    INSERT INTO mood_stats_daily (user_id, bucket_date, detected_mood, event_count, confidence_count, confidence_sum)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        event_count = event_count + VALUES(event_count),
+        confidence_count = confidence_count + VALUES(confidence_count),
+        confidence_sum = confidence_sum + VALUES(confidence_sum)
+"""
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """Convert a timezone-aware datetime to naive UTC (naive ones are returned as is)"""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_now() -> datetime:
+    """Current time as naive UTC"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def aggregate_events(events: Iterable[Tuple]) -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    Aggregate mood events into hourly and daily rollup rows
+
+    Args:
+        events: (user_id, mood, confidence, timestamp) tuples
+
+    Returns:
+        tuple: (hourly_rows, daily_rows) ready for HOURLY_UPSERT / DAILY_UPSERT
+    """
+    # [event_count, confidence_count, confidence_sum]
+    hourly: Dict[Tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+    daily: Dict[Tuple, List[float]] = defaultdict(lambda: [0, 0, 0.0])
+
+    for user_id, mood, confidence, timestamp in events:
+        timestamp = naive_utc(timestamp)
+        for totals in (hourly[(user_id, timestamp.replace(minute=0, second=0, microsecond=0), mood)],
+                       daily[(user_id, timestamp.date(), mood)]):
+            totals[0] += 1
+            if confidence is not None:
+                totals[1] += 1
+                totals[2] += float(confidence)
+
+    return (
+        [(*key, *totals) for key, totals in hourly.items()],
+        [(*key, *totals) for key, totals in daily.items()]
+    )
+
+
+def record_events(tx, events: List[Tuple]):
+    """
+    Add a batch of mood events to the rollups
+
+    Args:
+        tx: UnitOfWork the events themselves are being inserted with
+        events: (user_id, mood, confidence, timestamp) tuples
+    """
+    hourly_rows, daily_rows = aggregate_events(events)
+    tx.executemany(HOURLY_UPSERT, hourly_rows)
+    tx.executemany(DAILY_UPSERT, daily_rows)
+
+
+def get_mood_stats(user_id, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict]:
+    """
+    Get per-mood counts and average confidence for a user
+
+    Without a time range the daily rollup is read; with one, the hourly
+    rollup is read (bounds are applied at hour granularity).
+
+    Args:
+        user_id: Internal user ID
+        since: Only include events at or after this time
+        until: Only include events before this time
+
+    Returns:
+        list: [{'detected_mood', 'count', 'avg_confidence'}, ...]
+    """
+    if since is None and until is None:
+        query = """
+            SELECT detected_mood,
+                   SUM(event_count) AS count,
+                   SUM(confidence_count) AS confidence_count,
+                   SUM(confidence_sum) AS confidence_sum
+            FROM mood_stats_daily
+            WHERE user_id = %s
+            GROUP BY detected_mood
+        """
+        params = (user_id,)
+    else:
+        conditions = ["user_id = %s"]
+        params = [user_id]
+        if since is not None:
+            conditions.append("bucket_start >= %s")
+            params.append(naive_utc(since).replace(minute=0, second=0, microsecond=0))
+        if until is not None:
+            conditions.append("bucket_start < %s")
+            params.append(naive_utc(until))
+        query = f"""
+            SELECT detected_mood,
+                   SUM(event_count) AS count,
+                   SUM(confidence_count) AS confidence_count,
+                   SUM(confidence_sum) AS confidence_sum
+            FROM mood_stats_hourly
+            WHERE {' AND '.join(conditions)}
+            GROUP BY detected_mood
+        """
+        params = tuple(params)
+
+    rows = execute_query(query, params, fetch=True, read_only=True)
+
+    stats = []
+    for row in rows:
+        confidence_count = int(row['confidence_count'] or 0)
+        stats.append({
+            'detected_mood': row['detected_mood'],
+            'count': int(row['count'] or 0),
+            'avg_confidence': float(row['confidence_sum']) / confidence_count if confidence_count else None
+        })
+    return stats
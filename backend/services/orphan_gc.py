@@ -0,0 +1,142 @@
+"""
+Orphan Song Collector
+Batched background cleanup of songs no user links to anymore
+
+Resetting a library only unlinks the user's own user_songs rows (an indexed
+delete). Songs left without any link are removed here, off the request path:
+orphans are found with an anti-join in song_id order and deleted in chunks of
+ORPHAN_GC_BATCH_SIZE, each chunk in its own short transaction, so the shared
+songs table is never locked for a full scan.
+
+Resets call orphan_collector.request(); the collector waits ORPHAN_GC_DELAY
+seconds so resets arriving close together share one pass.
+
+Usage:
+    from services.orphan_gc import orphan_collector, collect_orphan_songs
+
+    orphan_collector.request()      # schedule a pass in the background
+    deleted = collect_orphan_songs()  # run a pass now (CLI / cron)
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+from config.database import execute_query, transaction
+
+BATCH_SIZE = int(os.getenv('ORPHAN_GC_BATCH_SIZE', '500'))
+DELAY = float(os.getenv('ORPHAN_GC_DELAY', '30'))
+
+FIND_ORPHANS = """
+    SELECT s.song_id
+    FROM songs s
+    LEFT JOIN user_songs us ON us.song_id = s.song_id
+    WHERE us.song_id IS NULL
+      AND s.song_id > %s
+    ORDER BY s.song_id
+    LIMIT %s
+"""
+
+
+def collect_orphan_songs(batch_size: int = BATCH_SIZE, pause: float = 0.0,
+                         max_batches: Optional[int] = None) -> int:
+    """
+    Delete songs that are not linked to any user, one chunk at a time
+
+    Args:
+        batch_size: Songs examined and deleted per chunk
+        pause: Seconds to sleep between chunks (spreads load during peaks)
+        max_batches: Stop after this many chunks (default: until done)
+
+    Returns:
+        int: Number of songs deleted
+    """
+    deleted = 0
+    last_id = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = execute_query(FIND_ORPHANS, (last_id, batch_size), fetch=True)
+        if not rows:
+            break
+
+        song_ids = [row['song_id'] for row in rows]
+        last_id = song_ids[-1]
+        placeholders = ', '.join(['%s'] * len(song_ids))
+
+        with transaction() as tx:
+            # Re-check the anti-join: a sync may have linked a song since it was selected
+            tx.execute(f"""
+                DELETE s FROM songs s
+                LEFT JOIN user_songs us ON us.song_id = s.song_id
+                WHERE s.song_id IN ({placeholders})
+                  AND us.song_id IS NULL
+            """, tuple(song_ids))
+            deleted += tx.rowcount
+
+        batches += 1
+        if len(song_ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if deleted:
+        print(f"[INFO] Removed {deleted} orphaned songs")
+    return deleted
+
+
+class OrphanSongCollector:
+    """Runs collect_orphan_songs() on a background thread when requested"""
+
+    def __init__(self, delay: Optional[float] = None, batch_size: Optional[int] = None):
+        """
+        Args:
+            delay: Seconds to wait after a request before collecting (ORPHAN_GC_DELAY, default 30)
+            batch_size: Songs deleted per chunk (ORPHAN_GC_BATCH_SIZE, default 500)
+        """
+        self.delay = delay if delay is not None else DELAY
+        self.batch_size = batch_size or BATCH_SIZE
+
+        self._requested = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.runs = 0
+        self.deleted = 0
+
+    def request(self):
+        """Schedule a collection pass (requests made before it starts are coalesced)"""
+        self._ensure_started()
+        self._requested.set()
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='orphan-song-gc', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._requested.wait()
+            time.sleep(self.delay)
+            self._requested.clear()
+            try:
+                self.deleted += collect_orphan_songs(self.batch_size)
+                self.runs += 1
+            except Exception as e:
+                print(f"[ERROR] Orphan song cleanup failed: {e}")
+
+    def stats(self) -> dict:
+        """Collector counters"""
+        return {
+            'pending': self._requested.is_set(),
+            'runs': self.runs,
+            'deleted': self.deleted
+        }
+
+
+# Singleton instance for easy import
+orphan_collector = OrphanSongCollector()
@@ -0,0 +1,402 @@
+"""
+Playback Queue Service
+Server-side queue of prefetched mood recommendations for each listening session
+
+The queue is filled from SpotifyService.get_songs_for_mood() ahead of time, so
+moving to the next song is a deque pop instead of a new ranked database query.
+Refills and mood changes are handled on a background thread. Only the last
+PLAYBACK_QUEUE_HISTORY played tracks are skipped by refills, so the ranked
+query's LIMIT stays bounded however long a session runs. Queues idle for
+PLAYBACK_QUEUE_TTL seconds are dropped; logout drops the user's queue.
+
+With Redis configured (PLAYBACK_QUEUE_REDIS, else the session or Socket.IO
+Redis) each queue is stored there as one small JSON document and changed
+under a short per-session Redis lock, so any worker or node can serve the
+session's next track. Without Redis, or while Redis is unavailable, queues
+live in this process and at most PLAYBACK_QUEUE_MAX are kept (least recently
+used go first).
+
+Usage:
+    from services.playback_queue import PlaybackQueueManager
+
+    queues = PlaybackQueueManager(spotify_service)
+    queues.start(session_key, 'happy', user_id)
+    track = queues.next_track(session_key)
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Dict, List
+
+import redis
+
+KEY_PREFIX = 'mooddj:playback-queue:'
+LOCK_PREFIX = 'mooddj:playback-queue-lock:'
+LOCK_TTL = 5.0       # seconds a crashed holder can block a session
+LOCK_WAIT = 6.0      # longer than LOCK_TTL, so a stale lock is always outwaited
+REDIS_RETRY_AFTER = 5.0
+
+
+def _default_redis_url() -> Optional[str]:
+    if os.getenv('PLAYBACK_QUEUE_REDIS'):
+        return os.getenv('PLAYBACK_QUEUE_REDIS')
+    if os.getenv('SESSION_TYPE') == 'redis':
+        return os.getenv('SESSION_REDIS', 'redis://localhost:6379')
+    queue = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+    return queue if queue.startswith('redis') else None
+
+
+def _plain(song: Dict) -> Dict:
+    """Song row with DECIMAL/DATETIME columns as JSON types, the same in memory and in Redis"""
+    row = {}
+    for key, value in song.items():
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        row[key] = value
+    return row
+
+
+class PlaybackQueue:
+    """Prefetched tracks and play history for one listening session"""
+
+    def __init__(self, mood: str, user_id=None, history_size: int = 100):
+        self.id = uuid.uuid4().hex  # a restarted session gets a new id, so old refills are discarded
+        self.mood = mood
+        self.user_id = user_id
+        self.tracks = deque()
+        self.played = deque(maxlen=history_size)  # most recent spotify_song_ids handed out
+        self.played_count = 0
+        self.generation = 0  # bumped on mood change so stale refills are discarded
+        self.refilling = False
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def queued_ids(self) -> set:
+        return {track['spotify_song_id'] for track in self.tracks}
+
+    def ticket(self) -> tuple:
+        """Identifies the queue contents a background refill was started for"""
+        return (self.id, self.generation)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'id': self.id,
+            'mood': self.mood,
+            'user_id': self.user_id,
+            'tracks': list(self.tracks),
+            'played': list(self.played),
+            'history_size': self.played.maxlen,
+            'played_count': self.played_count,
+            'generation': self.generation,
+            'refilling': self.refilling
+        })
+
+    @classmethod
+    def from_json(cls, value) -> 'PlaybackQueue':
+        data = json.loads(value)
+        queue = cls(data['mood'], data['user_id'], data['history_size'])
+        queue.id = data['id']
+        queue.tracks = deque(data['tracks'])
+        queue.played.extend(data['played'])
+        queue.played_count = data['played_count']
+        queue.generation = data['generation']
+        queue.refilling = data['refilling']
+        return queue
+
+
+class PlaybackQueueManager:
+    """Keeps one PlaybackQueue per session and refills them in the background"""
+
+    def __init__(self, spotify_service, prefetch_size: Optional[int] = None, low_watermark: Optional[int] = None,
+                 max_queues: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 history_size: Optional[int] = None, redis_url: Optional[str] = None):
+        """
+        Args:
+            spotify_service: SpotifyService used to fetch ranked songs for a mood
+            prefetch_size: Number of tracks to keep queued (PLAYBACK_QUEUE_PREFETCH)
+            low_watermark: Refill once fewer tracks than this remain (PLAYBACK_QUEUE_LOW_WATERMARK)
+            max_queues: Session queues kept in memory (PLAYBACK_QUEUE_MAX, default 10000)
+            idle_ttl: Seconds an unused queue is kept (PLAYBACK_QUEUE_TTL, default 3600)
+            history_size: Recently played tracks refills skip (PLAYBACK_QUEUE_HISTORY, default 100)
+            redis_url: Shared queue store ('' to keep queues in this process; defaults
+                to PLAYBACK_QUEUE_REDIS, the session Redis or a redis:// Socket.IO queue)
+        """
+        self.spotify_service = spotify_service
+        self.prefetch_size = prefetch_size or int(os.getenv('PLAYBACK_QUEUE_PREFETCH', '20'))
+        self.low_watermark = low_watermark or int(os.getenv('PLAYBACK_QUEUE_LOW_WATERMARK', '5'))
+        self.max_queues = max_queues or int(os.getenv('PLAYBACK_QUEUE_MAX', '10000'))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv('PLAYBACK_QUEUE_TTL', '3600'))
+        self.history_size = history_size or int(os.getenv('PLAYBACK_QUEUE_HISTORY', '100'))
+        self.redis_url = redis_url if redis_url is not None else _default_redis_url()
+        self.queues: Dict[str, PlaybackQueue] = OrderedDict()  # in-process store, least recently used first
+        self.lock = threading.Lock()
+        self._redis = None
+        self._redis_down_until = 0.0
+
+    def start(self, session_key: str, mood: str, user_id=None) -> Dict:
+        """
+        Start (or restart) a session queue and prefetch the first batch synchronously
+
+        Args:
+            session_key: Identifier of the listening session
+            mood: Mood to queue songs for
+            user_id: User ID passed through to get_songs_for_mood
+
+        Returns:
+            dict: Queue state (see get_state)
+        """
+        tracks = self._fetch(mood, user_id)
+        queue = PlaybackQueue(mood, user_id, self.history_size)
+        queue.tracks.extend(tracks)
+        with self._session(session_key, replace=queue):
+            pass
+
+        return self.get_state(session_key)
+
+    def next_track(self, session_key: str) -> Optional[Dict]:
+        """
+        Pop the next track for a session
+
+        Triggers a background refill when the queue runs low.
+
+        Returns:
+            dict: Song row, or None if the session has no queue or it is empty
+        """
+        with self._session(session_key) as queue:
+            if not queue:
+                return None
+            track = queue.tracks.popleft() if queue.tracks else None
+            if track:
+                queue.played.append(track['spotify_song_id'])
+                queue.played_count += 1
+            needs_refill = len(queue.tracks) < self.low_watermark and not queue.refilling
+            if needs_refill:
+                queue.refilling = True
+                ticket = queue.ticket()
+
+        if needs_refill:
+            self._spawn(self._refill, session_key, ticket)
+
+        return track
+
+    def set_mood(self, session_key: str, mood: str) -> bool:
+        """
+        Update the detected mood for a session
+
+        Tracks for the previous mood keep being served until the re-ranked
+        queue for the new mood has been fetched in the background.
+
+        Returns:
+            bool: True if a re-rank was scheduled, False if the mood is unchanged
+                  or the session has no queue
+        """
+        with self._session(session_key) as queue:
+            if not queue or queue.mood == mood:
+                return False
+            queue.mood = mood
+            queue.generation += 1
+            queue.refilling = True
+            ticket = queue.ticket()
+
+        self._spawn(self._rerank, session_key, ticket)
+        return True
+
+    def get_state(self, session_key: str, preview: int = 5) -> Optional[Dict]:
+        """
+        Get a snapshot of a session queue
+
+        Returns:
+            dict: mood, number of queued/played tracks and the next few tracks,
+                  or None if the session has no queue
+        """
+        with self._session(session_key) as queue:
+            if not queue:
+                return None
+            return {
+                'mood': queue.mood,
+                'queued': len(queue.tracks),
+                'played': queue.played_count,
+                'refilling': queue.refilling,
+                'upcoming': list(queue.tracks)[:preview]
+            }
+
+    def stop(self, session_key: str):
+        """Drop a session queue"""
+        with self.lock:
+            self.queues.pop(session_key, None)
+        client = self._client()
+        if client is not None:
+            try:
+                token = self._acquire(client, session_key)
+                client.delete(KEY_PREFIX + session_key)
+                self._release(client, session_key, token)
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+    @contextmanager
+    def _session(self, session_key: str, replace: Optional[PlaybackQueue] = None):
+        """
+        Exclusive access to a session's queue (None if missing or idle too long)
+
+        Changes made to the yielded queue are kept when the block exits.
+        With replace, that queue is stored for the session instead.
+        """
+        client = self._client()
+        if client is not None:
+            try:
+                token = self._acquire(client, session_key)
+                value = client.get(KEY_PREFIX + session_key) if replace is None else None
+            except redis.RedisError as e:
+                self._redis_failed(e)
+            else:
+                queue = replace if replace is not None else (
+                    PlaybackQueue.from_json(value) if value else None)
+                try:
+                    yield queue
+                finally:
+                    try:
+                        if queue is not None:
+                            client.set(KEY_PREFIX + session_key, queue.to_json(),
+                                       ex=max(int(self.idle_ttl), 1))
+                        self._release(client, session_key, token)
+                    except redis.RedisError as e:
+                        self._redis_failed(e)
+                return
+
+        if replace is not None:
+            with self.lock:
+                self.queues[session_key] = replace
+                self.queues.move_to_end(session_key)
+                self._evict()
+            queue = replace
+        else:
+            queue = self._get(session_key)
+        if queue is None:
+            yield None
+            return
+        with queue.lock:
+            yield queue
+
+    def _acquire(self, client, session_key: str) -> str:
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not client.set(LOCK_PREFIX + session_key, token, nx=True, px=int(LOCK_TTL * 1000)):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Playback queue for {session_key} is locked")
+            time.sleep(0.01)
+        return token
+
+    def _release(self, client, session_key: str, token: str):
+        key = LOCK_PREFIX + session_key
+        if client.get(key) == token.encode():
+            client.delete(key)
+
+    def _client(self):
+        if not self.redis_url or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=2)
+        return self._redis
+
+    def _redis_failed(self, error):
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        print(f"[WARN] Playback queue store unavailable, using this process "
+              f"for {REDIS_RETRY_AFTER:.0f}s: {error}")
+
+    def _get(self, session_key: str) -> Optional[PlaybackQueue]:
+        """In-process queue for a session, marking it recently used; None if missing or idle too long"""
+        now = time.monotonic()
+        with self.lock:
+            queue = self.queues.get(session_key)
+            if queue is None:
+                return None
+            if now - queue.last_used > self.idle_ttl:
+                del self.queues[session_key]
+                return None
+            queue.last_used = now
+            self.queues.move_to_end(session_key)
+            return queue
+
+    def _evict(self):
+        """Drop idle and least recently used queues (called with self.lock held)"""
+        now = time.monotonic()
+        while self.queues:
+            key, oldest = next(iter(self.queues.items()))
+            if len(self.queues) <= self.max_queues and now - oldest.last_used <= self.idle_ttl:
+                break
+            del self.queues[key]
+
+    def _fetch(self, mood: str, user_id, exclude: Optional[set] = None) -> List[Dict]:
+        """Fetch ranked songs for a mood, skipping the given (recently played and queued) tracks"""
+        exclude = set(exclude or ())
+        # Over-fetch by the number of tracks we are going to drop; at most
+        # prefetch_size queued + history_size played, however long the session
+        limit = self.prefetch_size + len(exclude)
+        songs = self.spotify_service.get_songs_for_mood(mood, limit, user_id)
+
+        tracks = []
+        for song in songs:
+            if song['spotify_song_id'] in exclude:
+                continue
+            exclude.add(song['spotify_song_id'])
+            tracks.append(_plain(song))
+        return tracks
+
+    def _refill(self, session_key: str, ticket: tuple):
+        """Top the queue back up to prefetch_size for the current mood"""
+        try:
+            with self._session(session_key) as queue:
+                if queue is None or queue.ticket() != ticket:
+                    return
+                mood, user_id = queue.mood, queue.user_id
+                exclude = queue.queued_ids() | set(queue.played)
+            tracks = self._fetch(mood, user_id, exclude)
+            with self._session(session_key) as queue:
+                if queue is None or queue.ticket() != ticket:
+                    return
+                missing = self.prefetch_size - len(queue.tracks)
+                queue.tracks.extend(tracks[:max(missing, 0)])
+        except Exception as e:
+            print(f"[ERROR] Playback queue refill failed: {e}")
+        finally:
+            self._finish(session_key, ticket)
+
+    def _rerank(self, session_key: str, ticket: tuple):
+        """Replace the queued tracks with a fresh ranking for the new mood"""
+        try:
+            with self._session(session_key) as queue:
+                if queue is None or queue.ticket() != ticket:
+                    return
+                mood, user_id = queue.mood, queue.user_id
+                exclude = set(queue.played)
+            tracks = self._fetch(mood, user_id, exclude)
+            with self._session(session_key) as queue:
+                if queue is None or queue.ticket() != ticket:
+                    return
+                queue.tracks = deque(tracks[:self.prefetch_size])
+        except Exception as e:
+            print(f"[ERROR] Playback queue re-rank failed: {e}")
+        finally:
+            self._finish(session_key, ticket)
+
+    def _finish(self, session_key: str, ticket: tuple):
+        try:
+            with self._session(session_key) as queue:
+                if queue is not None and queue.ticket() == ticket:
+                    queue.refilling = False
+        except Exception as e:
+            print(f"[ERROR] Playback queue refill could not be marked done: {e}")
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        return thread
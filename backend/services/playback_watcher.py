@@ -0,0 +1,325 @@
+"""
+Playback Watcher
+Server-side Spotify playback polling shared by all of a user's tabs
+
+Instead of every open player polling GET /api/music/current (session lookup,
+client setup and a live current_playback call per tab), a socket sends
+'watch_playback' and the server runs one watcher per user. It polls Spotify
+at an adaptive rate and emits 'playback_state' to the user's Socket.IO room
+only when something changed (track, play/pause, or a seek the client could
+not have predicted from progress_ms).
+
+Poll interval:
+    playing  PLAYBACK_POLL_PLAYING (5s), or just after the track ends if sooner
+    paused   PLAYBACK_POLL_PAUSED (15s), also when nothing is playing
+    errors   doubling up to PLAYBACK_POLL_MAX (60s)
+Playback commands call poke() so the new state is read right away.
+
+With several workers sharing a Redis message queue, a short Redis lease
+makes sure only one worker polls each user; the others' tabs still get the
+emits through the queue. The lease holder also stores the last state next to
+the lease, so a tab subscribing on another worker gets it at once and
+snapshot() there is as fresh as the poller's.
+
+Usage:
+    from services.playback_watcher import playback_watcher
+
+    playback_watcher.init_app(socketio, fetch, room)  # once, in app.py
+    playback_watcher.subscribe(user_id, request.sid, token_info)
+    playback_watcher.poke(user_id)                     # after play/pause
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+import redis
+
+PLAYING_INTERVAL = float(os.getenv('PLAYBACK_POLL_PLAYING', '5'))
+PAUSED_INTERVAL = float(os.getenv('PLAYBACK_POLL_PAUSED', '15'))
+MAX_INTERVAL = float(os.getenv('PLAYBACK_POLL_MAX', '60'))
+MIN_INTERVAL = 1.0
+TRACK_END_SLACK = 0.5    # poll this long after the predicted track end
+POKE_DELAY = 0.5         # let Spotify apply a command before reading it back
+SEEK_TOLERANCE_MS = 3000
+
+LEASE_PREFIX = 'mooddj:playback-watcher:'
+STATE_PREFIX = 'mooddj:playback-state:'
+
+
+def next_interval(playback: Optional[dict], failures: int = 0) -> float:
+    """
+    Seconds until the next poll
+
+    Args:
+        playback: Latest get_current_playback() result (None if nothing is playing)
+        failures: Consecutive failed polls
+
+    Returns:
+        float: Poll delay
+    """
+    if failures:
+        return min(PLAYING_INTERVAL * (2 ** failures), MAX_INTERVAL)
+    if not playback or not playback.get('is_playing'):
+        return PAUSED_INTERVAL
+
+    track = playback.get('track') or {}
+    remaining = (track.get('duration_ms', 0) - track.get('progress_ms', 0)) / 1000
+    if 0 < remaining + TRACK_END_SLACK < PLAYING_INTERVAL:
+        return max(remaining + TRACK_END_SLACK, MIN_INTERVAL)
+    return PLAYING_INTERVAL
+
+
+def has_changed(previous: Optional[dict], current: Optional[dict], elapsed: float) -> bool:
+    """
+    Whether clients need a new state, given they extrapolate progress while playing
+
+    Args:
+        previous: Last emitted playback
+        current: Newly polled playback
+        elapsed: Seconds since previous was emitted
+    """
+    if (previous is None) != (current is None):
+        return True
+    if current is None:
+        return False
+    if previous['is_playing'] != current['is_playing']:
+        return True
+    old_track, new_track = previous.get('track') or {}, current.get('track') or {}
+    if old_track.get('id') != new_track.get('id'):
+        return True
+    expected = old_track.get('progress_ms', 0) + (elapsed * 1000 if previous['is_playing'] else 0)
+    return abs(new_track.get('progress_ms', 0) - expected) > SEEK_TOLERANCE_MS
+
+
+class _UserWatch:
+    def __init__(self, token_info: dict):
+        self.token_info = token_info
+        self.sids = set()
+        self.wake = threading.Event()
+        self.state: Optional[dict] = None   # last emitted payload
+        self.running = False
+
+
+class PlaybackWatcher:
+    """One adaptive Spotify poller per watched user"""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        """
+        Args:
+            redis_url: Lease store for multi-worker deployments (defaults to a
+                redis:// SOCKETIO_MESSAGE_QUEUE; none means every worker polls)
+        """
+        if redis_url is None:
+            queue = os.getenv('SOCKETIO_MESSAGE_QUEUE', '')
+            redis_url = queue if queue.startswith('redis') else ''
+        self.redis_url = redis_url
+        self._redis = None
+        self._worker_id = uuid.uuid4().hex
+        self._socketio = None
+        self._fetch: Optional[Callable] = None
+        self._room: Optional[Callable] = None
+        self._watches: Dict[str, _UserWatch] = {}
+        self._lock = threading.Lock()
+        self.polls = 0
+
+    def init_app(self, socketio, fetch: Callable, room: Callable):
+        """
+        Args:
+            socketio: Flask-SocketIO instance (background tasks and emits)
+            fetch: fetch(user_id, token_info) -> (playback or None, token_info or None);
+                raises on a failed Spotify call, returns a None token when re-login is needed
+            room: room(user_id) -> Socket.IO room name
+        """
+        self._socketio = socketio
+        self._fetch = fetch
+        self._room = room
+
+    def subscribe(self, user_id: str, sid: str, token_info: dict):
+        """Start (or join) the watcher for a user; the socket gets the current state at once"""
+        with self._lock:
+            watch = self._watches.get(user_id)
+            if watch is None:
+                watch = self._watches[user_id] = _UserWatch(token_info)
+            watch.token_info = token_info or watch.token_info
+            watch.sids.add(sid)
+            start = not watch.running
+            watch.running = True
+            state = watch.state
+
+        if start:
+            self._socketio.start_background_task(self._run, user_id, watch)
+        # Another worker may hold the lease and be the one polling
+        state = self._load_state(user_id) or state
+        if state is not None:
+            self._socketio.emit('playback_state', state, to=sid)
+
+    def unsubscribe(self, sid: str):
+        """Remove a socket from every watch; a watcher with no sockets stops on its next wake"""
+        with self._lock:
+            for watch in self._watches.values():
+                if sid in watch.sids:
+                    watch.sids.discard(sid)
+                    if not watch.sids:
+                        watch.wake.set()
+
+    def poke(self, user_id: Optional[str]):
+        """Read playback again shortly (after a play/pause/skip); no-op if the user is not watched"""
+        with self._lock:
+            watch = self._watches.get(user_id)
+        if watch is not None:
+            watch.wake.set()
+
+    def snapshot(self, user_id: Optional[str]) -> Optional[dict]:
+        """
+        Last emitted state for a watched user, with progress advanced to now
+
+        Returns:
+            dict: {'playback': ..., 'updated_at': ms} or None if the user is not watched
+        """
+        with self._lock:
+            watch = self._watches.get(user_id)
+            state = watch.state if watch is not None and watch.running else None
+        if watch is not None:
+            state = self._load_state(user_id) or state
+        if not state or not state.get('playback') or not state['playback'].get('is_playing'):
+            return state
+
+        track = dict(state['playback']['track'])
+        elapsed_ms = int(time.time() * 1000) - state['updated_at']
+        track['progress_ms'] = min(track['progress_ms'] + elapsed_ms, track['duration_ms'])
+        return {**state, 'playback': {**state['playback'], 'track': track}}
+
+    def _run(self, user_id: str, watch: _UserWatch):
+        failures = 0
+        try:
+            while True:
+                with self._lock:
+                    if not watch.sids:
+                        self._stop(user_id, watch)
+                        break
+                    token_info = watch.token_info
+
+                delay = PAUSED_INTERVAL
+                if self._hold_lease(user_id):
+                    try:
+                        playback, token_info = self._fetch(user_id, token_info)
+                        self.polls += 1
+                    except Exception as e:
+                        failures += 1
+                        print(f"[WARN] Playback poll failed for {user_id}: {e}")
+                    else:
+                        if token_info is None:
+                            # Sockets watch again after logging back in
+                            self._emit(user_id, watch, {'playback': None, 'error': 'reauthenticate'})
+                            self._clear_state(user_id)
+                            with self._lock:
+                                self._stop(user_id, watch)
+                            break
+                        failures = 0
+                        now_ms = int(time.time() * 1000)
+                        with self._lock:
+                            watch.token_info = token_info
+                            last = watch.state
+                        if (last is None or 'error' in last
+                                or has_changed(last['playback'], playback, (now_ms - last['updated_at']) / 1000)):
+                            self._emit(user_id, watch, {'playback': playback, 'updated_at': now_ms})
+                    delay = next_interval(playback if not failures else None, failures)
+                else:
+                    # Keep up with the lease holder so a takeover does not re-emit
+                    shared = self._load_state(user_id)
+                    if shared is not None:
+                        with self._lock:
+                            watch.state = shared
+
+                # Poked: wait briefly so the command has landed, then poll
+                if watch.wake.wait(delay):
+                    watch.wake.clear()
+                    time.sleep(POKE_DELAY)
+        finally:
+            with self._lock:
+                if watch.running:
+                    self._stop(user_id, watch)
+            self._release_lease(user_id)
+
+    def _stop(self, user_id: str, watch: _UserWatch):
+        # Called under self._lock, in the same critical section as the decision
+        # to stop, so a socket subscribing afterwards gets a fresh watcher
+        watch.running = False
+        if self._watches.get(user_id) is watch:
+            del self._watches[user_id]
+
+    def _emit(self, user_id: str, watch: _UserWatch, payload: dict):
+        with self._lock:
+            watch.state = payload
+        if 'error' not in payload:
+            self._store_state(user_id, payload)
+        self._socketio.emit('playback_state', payload, to=self._room(user_id))
+
+    def _store_state(self, user_id: str, payload: dict):
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.set(STATE_PREFIX + user_id, json.dumps(payload, default=str), ex=int(MAX_INTERVAL * 2))
+        except redis.RedisError as e:
+            print(f"[WARN] Could not share playback state for {user_id}: {e}")
+
+    def _load_state(self, user_id: str) -> Optional[dict]:
+        """Last state stored by whichever worker holds the lease (None without Redis)"""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            value = client.get(STATE_PREFIX + user_id)
+            return json.loads(value) if value else None
+        except (redis.RedisError, ValueError):
+            return None
+
+    def _clear_state(self, user_id: str):
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.delete(STATE_PREFIX + user_id)
+        except redis.RedisError:
+            pass  # Expires on its own
+
+    def _client(self):
+        if self.redis_url and self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=2)
+        return self._redis
+
+    def _hold_lease(self, user_id: str) -> bool:
+        client = self._client()
+        if client is None:
+            return True
+        key, ttl = LEASE_PREFIX + user_id, int(MAX_INTERVAL * 2)
+        try:
+            if client.set(key, self._worker_id, nx=True, ex=ttl):
+                return True
+            if client.get(key) == self._worker_id.encode():
+                client.expire(key, ttl)
+                return True
+            return False
+        except redis.RedisError as e:
+            print(f"[WARN] Playback lease unavailable, polling anyway: {e}")
+            return True
+
+    def _release_lease(self, user_id: str):
+        client = self._client()
+        if client is None:
+            return
+        try:
+            key = LEASE_PREFIX + user_id
+            if client.get(key) == self._worker_id.encode():
+                client.delete(key)
+        except redis.RedisError:
+            pass  # Expires on its own
+
+
+# Singleton instance for easy import
+playback_watcher = PlaybackWatcher()
@@ -0,0 +1,124 @@
+"""
+Spotify Client Cache
+Reuses authenticated spotipy clients across requests on one pooled HTTP session
+
+A new spotipy.Spotify per request opened a new requests.Session, so every
+playback call paid a fresh TCP + TLS handshake to api.spotify.com. Clients
+are now cached per user (LRU, SPOTIFY_CLIENT_CACHE_SIZE) for as long as
+their access token is valid, and all of them share one keep-alive session
+whose connection pool is sized for the worker's threads.
+
+Usage:
+    from services.spotify_clients import spotify_clients
+
+    sp_client = spotify_clients.get(token_info, user_id=spotify_user_id)
+    sp_client = spotify_clients.get(token_info)  # not cached (user not known yet)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import requests
+import spotipy
+from urllib3.util.retry import Retry
+
+from services import metrics
+
+
+class _SharedSessionSpotify(spotipy.Spotify):
+    """spotipy client that leaves the shared session open when it is discarded"""
+
+    def __del__(self):
+        pass  # spotipy closes its session here; ours is shared by every cached client
+
+
+def build_session(pool_size: int) -> requests.Session:
+    """Keep-alive session with spotipy's retry policy and a pool of pool_size connections"""
+    session = requests.Session()
+    retry = Retry(
+        total=spotipy.Spotify.max_retries,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=spotipy.Spotify.max_retries,
+        backoff_factor=0.3,
+        status_forcelist=spotipy.Spotify.default_retry_codes
+    )
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SpotifyClientCache:
+    """Bounded LRU of authenticated clients keyed by user"""
+
+    def __init__(self, max_size: Optional[int] = None, pool_size: Optional[int] = None,
+                 api_url: Optional[str] = None):
+        """
+        Args:
+            max_size: Cached clients (SPOTIFY_CLIENT_CACHE_SIZE, default 1000)
+            pool_size: Keep-alive connections to Spotify (SPOTIFY_HTTP_POOL_SIZE,
+                default GUNICORN_THREADS or 50)
+            api_url: Web API base URL override (SPOTIFY_API_URL)
+        """
+        self.max_size = max_size or int(os.getenv('SPOTIFY_CLIENT_CACHE_SIZE', '1000'))
+        pool_size = pool_size or int(os.getenv('SPOTIFY_HTTP_POOL_SIZE', os.getenv('GUNICORN_THREADS', '50')))
+        self.api_url = api_url if api_url is not None else os.getenv('SPOTIFY_API_URL')
+        self.session = build_session(pool_size)
+        self._clients: OrderedDict = OrderedDict()  # key -> (access_token, expires_at, client)
+        self._lock = threading.Lock()
+
+    def get(self, token_info: dict, user_id: Optional[str] = None) -> spotipy.Spotify:
+        """
+        Get a client for a (valid) access token, reusing the cached one if the token matches
+
+        Args:
+            token_info: Token information with access_token and expires_at
+            user_id: Spotify user ID (cache key); without one (e.g. the login
+                callback) a client is built on the shared session but not cached
+
+        Returns:
+            spotipy.Spotify: Client on the shared session
+        """
+        access_token = token_info['access_token']
+        expires_at = token_info.get('expires_at', 0)
+        if not user_id:
+            return self._build(access_token)
+        key = user_id
+
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry and entry[0] == access_token and entry[1] > time.time():
+                self._clients.move_to_end(key)
+                metrics.CACHE_REQUESTS.inc(cache='spotify_client', result='hit')
+                return entry[2]
+        metrics.CACHE_REQUESTS.inc(cache='spotify_client', result='miss')
+
+        client = self._build(access_token)
+
+        with self._lock:
+            # A refreshed token replaces the user's old client
+            self._clients[key] = (access_token, expires_at, client)
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def _build(self, access_token: str) -> spotipy.Spotify:
+        client = _SharedSessionSpotify(auth=access_token, requests_session=self.session)
+        if self.api_url:
+            client.prefix = f"{self.api_url.rstrip('/')}/"
+        return client
+
+    def stats(self) -> dict:
+        """Cache size"""
+        with self._lock:
+            return {'size': len(self._clients), 'max_size': self.max_size}
+
+
+# Singleton instance for easy import
+spotify_clients = SpotifyClientCache()
@@ -1,19 +1,56 @@
 import logging
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 import requests
-import spotipy
 from spotipy.exceptions import SpotifyException
+from spotipy.cache_handler import CacheHandler
 from spotipy.oauth2 import SpotifyOAuth
 from dotenv import load_dotenv
 
-from config.database import execute_query
+from config.database import execute_query, transaction
+from services import metrics
 from services.audio_features_service import AudioFeaturesService
+from services.device_cache import device_cache, is_device_gone, pick_device
+from services.mood_classifier import classify_mood, classify_moods
+from services.mood_config import mood_registry
+from services.spotify_clients import spotify_clients
+from services.token_manager import token_manager
 
 load_dotenv()
 
+# Pause between SoundNet calls during a library sync (free tier rate limits)
+SOUNDNET_REQUEST_DELAY = float(os.getenv('SOUNDNET_REQUEST_DELAY', '2.5'))
+
+# Spotify accepts at most 100 tracks per playlist edit; reads and removals of
+# big playlists run this many chunks at once
+PLAYLIST_CHUNK_SIZE = 100
+PLAYLIST_WORKERS = int(os.getenv('PLAYLIST_WORKERS', '4'))
+
+
+def chunked(items: list, size: int = PLAYLIST_CHUNK_SIZE) -> List[list]:
+    """Split items into consecutive lists of at most size"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class NoTokenCache(CacheHandler):
+    """
+    OAuth cache handler that keeps no tokens
+
+    The SpotifyOAuth manager is shared by every user, so any token it cached
+    could be handed to the next caller; tokens live in each user's session
+    and the token manager instead.
+    """
+
+    def get_cached_token(self):
+        return None
+
+    def save_token_to_cache(self, token_info):
+        pass
+
+
 class SpotifyService:
     """Handles all Spotify API interactions with web-based OAuth support"""
 
@@ -26,6 +63,11 @@ class SpotifyService:
         self.redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI", "http://127.0.0.1:5000/api/auth/callback")
         self.scope = "user-library-read playlist-modify-private user-modify-playback-state user-read-playback-state"
 
+        # Accounts URL override, e.g. the local fake used by the load-test harness
+        # (SPOTIFY_API_URL is applied by the client cache)
+        self.accounts_url = os.getenv("SPOTIFY_ACCOUNTS_URL")
+        self._oauth_manager = None
+
         # Audio features service (RapidAPI SoundNet - primary source)
         self.audio_features_service = AudioFeaturesService()
 
@@ -34,15 +76,23 @@ class SpotifyService:
             print("[WARN] Add RAPIDAPI_KEY to .env to enable audio features.")
 
     def get_oauth_manager(self):
-        """Get SpotifyOAuth instance for web OAuth flow"""
-        return SpotifyOAuth(
+        """Get the (cached) SpotifyOAuth instance for web OAuth flow"""
+        if self._oauth_manager is not None:
+            return self._oauth_manager
+
+        oauth = SpotifyOAuth(
             client_id=self.client_id,
             client_secret=self.client_secret,
             redirect_uri=self.redirect_uri,
             scope=self.scope,
-            cache_path=None,  # No file cache for web OAuth
+            cache_handler=NoTokenCache(),  # No shared token cache for web OAuth
             show_dialog=True  # Always show Spotify auth dialog
         )
+        if self.accounts_url:
+            oauth.OAUTH_AUTHORIZE_URL = f"{self.accounts_url.rstrip('/')}/authorize"
+            oauth.OAUTH_TOKEN_URL = f"{self.accounts_url.rstrip('/')}/api/token"
+        self._oauth_manager = oauth
+        return oauth
 
     def get_auth_url(self):
         """
@@ -116,29 +166,39 @@ class SpotifyService:
         import time
         return token_info['expires_at'] < int(time.time())
 
-    def create_spotify_client(self, token_info: dict):
+    def get_valid_token(self, user_id: str, token_info: dict):
         """
-        Create Spotify client from token information
+        Get a usable access token for a user, refreshed at most once across requests
 
         Args:
+            user_id: User's Spotify ID
             token_info: Token information from session
 
+        Returns:
+            dict: Newest token information (write it back to the session if it
+            differs from token_info), or None if the token could not be refreshed
+        """
+        return token_manager.get_token(user_id, token_info, self.refresh_access_token)
+
+    def create_spotify_client(self, token_info: dict, user_id: str = None):
+        """
+        Get a Spotify client for token information (cached while the token is valid)
+
+        Tokens are not refreshed here: pass one from get_valid_token (or a
+        freshly exchanged one), so refreshes go through the token manager.
+
+        Args:
+            token_info: Valid token information
+            user_id: User's Spotify ID (cache key; without one the client is not cached)
+
         Returns:
             spotipy.Spotify: Authenticated Spotify client or None if failed
         """
         if not token_info:
             return None
 
-        # Refresh token if expired
-        if self.is_token_expired(token_info):
-            print("[INFO] Token expired, refreshing...")
-            token_info = self.refresh_access_token(token_info.get('refresh_token'))
-            if not token_info:
-                return None
-
         try:
-            sp = spotipy.Spotify(auth=token_info['access_token'])
-            return sp
+            return spotify_clients.get(token_info, user_id)
         except Exception as e:
             print(f"[ERROR] Failed to create Spotify client: {e}")
             return None
@@ -157,7 +217,8 @@ class SpotifyService:
             return None
 
         try:
-            return sp_client.current_user()
+            with metrics.SPOTIFY_LATENCY.time(operation='current_user'):
+                return sp_client.current_user()
         except Exception as e:
             print(f"[ERROR] Error fetching user profile: {e}")
             return None
@@ -170,35 +231,7 @@ class SpotifyService:
         Returns:
             str: mood name that best matches the audio features
         """
-        # Handle NULL values
-        if valence is None or energy is None or tempo is None:
-            return 'neutral'
-
-        # Simplified 3-mood system
-        mood_params = {
-            'happy': {'valence': (0.6, 1.0), 'energy': (0.5, 1.0), 'tempo': (100, 180)},
-            'angry': {'valence': (0.0, 0.4), 'energy': (0.6, 1.0), 'tempo': (120, 180)},
-            'neutral': {'valence': (0.3, 0.7), 'energy': (0.3, 0.7), 'tempo': (70, 140)}
-        }
-
-        # Find best matching mood
-        best_mood = 'neutral'
-        best_score = 0
-
-        for mood_name, params in mood_params.items():
-            score = 0
-            if params['valence'][0] <= valence <= params['valence'][1]:
-                score += 1
-            if params['energy'][0] <= energy <= params['energy'][1]:
-                score += 1
-            if params['tempo'][0] <= tempo <= params['tempo'][1]:
-                score += 1
-
-            if score > best_score:
-                best_score = score
-                best_mood = mood_name
-
-        return best_mood
+        return classify_mood(valence, energy, tempo)
 
     def get_songs_for_mood(self, mood, limit=50, user_id=None):
         """
@@ -208,28 +241,20 @@ class SpotifyService:
         Args:
             mood: Mood name (happy, angry, neutral)
             limit: Maximum number of songs to return
-            user_id: Spotify user ID to filter songs by user's library
+            user_id: Internal user ID (users.user_id) to filter songs by user's library
 
         Returns:
             list: Songs matching the mood criteria for this user
         """
         try:
-            # Simplified 3-mood system
-            mood_params = {
-                'happy': {'valence': (0.6, 1.0), 'energy': (0.5, 1.0), 'tempo': (100, 180)},
-                'angry': {'valence': (0.0, 0.4), 'energy': (0.6, 1.0), 'tempo': (120, 180)},
-                'neutral': {'valence': (0.3, 0.7), 'energy': (0.3, 0.7), 'tempo': (70, 140)}
-            }
-
-            params = mood_params.get(mood, mood_params['neutral'])
+            params = mood_registry.get_range(mood)
 
             # Query user-specific songs with mood matching
             if user_id:
                 query = """
                     SELECT s.* FROM songs s
                     INNER JOIN user_songs us ON s.song_id = us.song_id
-                    INNER JOIN users u ON us.user_id = u.user_id
-                    WHERE u.spotify_id = %s
+                    WHERE us.user_id = %s
                     AND s.valence BETWEEN %s AND %s
                     AND s.energy BETWEEN %s AND %s
                     AND s.tempo BETWEEN %s AND %s
@@ -246,7 +271,8 @@ class SpotifyService:
                         params['tempo'][0], params['tempo'][1],
                         limit
                     ),
-                    fetch=True
+                    fetch=True,
+                    read_only=True
                 )
             else:
                 # Fallback to global songs if user_id not provided (for backward compatibility)
@@ -267,7 +293,8 @@ class SpotifyService:
                         params['tempo'][0], params['tempo'][1],
                         limit
                     ),
-                    fetch=True
+                    fetch=True,
+                    read_only=True
                 )
 
             return songs
@@ -282,7 +309,7 @@ class SpotifyService:
         Args:
             limit: Number of tracks to fetch
             sp_client: Spotify client instance (from session token)
-            user_id: User's Spotify ID for multi-user support
+            user_id: Internal user ID (users.user_id) for multi-user support
 
         Flow:
         1. Get track metadata from Spotify (id, title, artist, album, duration)
@@ -308,7 +335,8 @@ class SpotifyService:
 
             while offset < limit:
                 # Fetch tracks metadata from Spotify
-                results = sp_client.current_user_saved_tracks(limit=min(50, limit - offset), offset=offset)
+                with metrics.SPOTIFY_LATENCY.time(operation='saved_tracks'):
+                    results = sp_client.current_user_saved_tracks(limit=min(50, limit - offset), offset=offset)
 
                 if not results['items']:
                     break
@@ -316,74 +344,27 @@ class SpotifyService:
                 print(f"[INFO] Processing batch: tracks {offset + 1} to {offset + len(results['items'])}")
 
                 # Process each track: metadata + audio features
+                batch = []
                 for idx, item in enumerate(results['items'], 1):
                     track = item['track']
-                    track_id = track['id']
                     title = track['name']
                     artist = track['artists'][0]['name'] if track['artists'] else 'Unknown'
-                    album = track['album']['name']
-                    duration_ms = track['duration_ms']
 
                     print(f"  [{offset + idx}] {title} by {artist}...", end=' ')
 
                     # Fetch audio features from RapidAPI (primary and only source)
-                    features = self.audio_features_service.get_audio_features(track_id)
-
-                    # Store track in songs table
-                    query = """
-                        INSERT INTO songs (spotify_song_id, title, artist, album, duration_ms, valence, energy, tempo)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        ON DUPLICATE KEY UPDATE
-                            title=VALUES(title),
-                            artist=VALUES(artist),
-                            album=VALUES(album),
-                            duration_ms=VALUES(duration_ms),
-                            valence=VALUES(valence),
-                            energy=VALUES(energy),
-                            tempo=VALUES(tempo),
-                            song_id=LAST_INSERT_ID(song_id)
-                    """
-
-                    execute_query(query, (
-                        track_id,
-                        title,
-                        artist,
-                        album,
-                        duration_ms,
-                        features['valence'] if features else None,
-                        features['energy'] if features else None,
-                        features['tempo'] if features else None
-                    ))
-
-                    # Get the song_id
-                    song_id_query = "SELECT song_id FROM songs WHERE spotify_song_id = %s"
-                    song_result = execute_query(song_id_query, (track_id,), fetch=True)
-
-                    if song_result and len(song_result) > 0:
-                        song_id = song_result[0]['song_id']
-
-                        # Determine mood from audio features (if available)
-                        mood_id = None
-                        if features:
-                            detected_mood = self._detect_mood_from_features(
-                                features['valence'],
-                                features['energy'],
-                                features['tempo']
-                            )
-                            # Get mood_id from mood name
-                            mood_query = "SELECT mood_id FROM moods WHERE mood_name = %s"
-                            mood_result = execute_query(mood_query, (detected_mood,), fetch=True)
-                            if mood_result and len(mood_result) > 0:
-                                mood_id = mood_result[0]['mood_id']
-
-                        # Link song to user in user_songs table
-                        if mood_id:
-                            user_song_query = """
-                                INSERT INTO user_songs (user_id, song_id, mood_id)
-                                SELECT u.user_id, %s, %s FROM users u WHERE u.spotify_id = %s
-                                ON DUPLICATE KEY UPDATE mood_id=VALUES(mood_id)
-                            """
-                            execute_query(user_song_query, (song_id, mood_id, user_id))
+                    features = self.audio_features_service.get_audio_features(track['id'])
+
+                    batch.append({
+                        'spotify_song_id': track['id'],
+                        'title': title,
+                        'artist': artist,
+                        'album': track['album']['name'],
+                        'duration_ms': track['duration_ms'],
+                        'valence': features['valence'] if features else None,
+                        'energy': features['energy'] if features else None,
+                        'tempo': features['tempo'] if features else None
+                    })
 
                     total_processed += 1
 
@@ -394,10 +375,13 @@ class SpotifyService:
                         tracks_without_features += 1
                         print(f"✗ No features")
 
-                    # Rate limiting: 2.5 seconds between RapidAPI calls to avoid rate limiting
+                    # Rate limiting: pause between RapidAPI calls (2.5s by default)
                     # RapidAPI free tier has strict limits, this delay helps prevent 429 errors
-                    if idx < len(results['items']):  # Don't delay after last track in batch
-                        time.sleep(2.5)
+                    if idx < len(results['items']) and SOUNDNET_REQUEST_DELAY > 0:  # Don't delay after last track in batch
+                        time.sleep(SOUNDNET_REQUEST_DELAY)
+
+                # Store the whole batch in one transaction
+                self._store_track_batch(batch, user_id)
 
                 offset += len(results['items'])
                 print(f"[INFO] Batch complete. Progress: {total_processed}/{limit}")
@@ -415,7 +399,72 @@ class SpotifyService:
             print(f"[ERROR] Error fetching tracks: {e}")
             return {'success': False, 'error': str(e)}
     
-    def play_track(self, track_id, device_id=None, sp_client=None):
+    def _store_track_batch(self, batch, user_id):
+        """
+        Upsert a batch of tracks and link them to the user in one transaction
+
+        Args:
+            batch: List of song dicts (spotify_song_id, title, artist, album,
+                   duration_ms, valence, energy, tempo)
+            user_id: Internal user ID (users.user_id)
+        """
+        if not batch:
+            return
+
+        song_query = """
+            INSERT INTO songs (spotify_song_id, title, artist, album, duration_ms, valence, energy, tempo)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                title=VALUES(title),
+                artist=VALUES(artist),
+                album=VALUES(album),
+                duration_ms=VALUES(duration_ms),
+                valence=VALUES(valence),
+                energy=VALUES(energy),
+                tempo=VALUES(tempo)
+        """
+
+        # Classify the whole batch in one pass (only songs with features get a mood)
+        with_features = [song for song in batch if song['valence'] is not None
+                         and song['energy'] is not None and song['tempo'] is not None]
+        moods = classify_moods(
+            [song['valence'] for song in with_features],
+            [song['energy'] for song in with_features],
+            [song['tempo'] for song in with_features]
+        )
+        mood_ids = {
+            song['spotify_song_id']: mood_registry.get_mood_id(mood)
+            for song, mood in zip(with_features, moods)
+        }
+
+        with transaction() as tx:
+            tx.executemany(song_query, [
+                (song['spotify_song_id'], song['title'], song['artist'], song['album'],
+                 song['duration_ms'], song['valence'], song['energy'], song['tempo'])
+                for song in batch
+            ])
+
+            if not mood_ids:
+                return
+
+            placeholders = ', '.join(['%s'] * len(mood_ids))
+            song_rows = tx.fetchall(
+                f"SELECT song_id, spotify_song_id FROM songs WHERE spotify_song_id IN ({placeholders})",
+                tuple(mood_ids)
+            )
+
+            # Link songs to user in user_songs table
+            tx.executemany("""
+                INSERT INTO user_songs (user_id, song_id, mood_id)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE mood_id=VALUES(mood_id)
+            """, [
+                (user_id, row['song_id'], mood_ids[row['spotify_song_id']])
+                for row in song_rows
+                if mood_ids.get(row['spotify_song_id'])
+            ])
+
+    def play_track(self, track_id, device_id=None, sp_client=None, user_id=None):
         """
         Play a specific track
 
@@ -423,6 +472,7 @@ class SpotifyService:
             track_id: Spotify track ID
             device_id: Optional device ID to play on
             sp_client: Spotify client instance (from session token)
+            user_id: User's Spotify ID; enables the remembered-device cache
 
         Returns:
             dict: Success status
@@ -431,20 +481,41 @@ class SpotifyService:
             return {'success': False, 'error': 'Not authenticated'}
 
         try:
-            if not device_id:
-                devices = sp_client.devices()
-                if devices['devices']:
-                    device_id = devices['devices'][0]['id']
-                else:
+            # Without a device, start on the one this user last played on (one API
+            # call) and only list devices when nothing is remembered
+            cached_device = None if device_id else device_cache.get(user_id)
+            target = device_id or cached_device or self._find_device(sp_client)
+            if not target:
+                return {'success': False, 'error': 'No active devices found'}
+
+            try:
+                self._start_track(sp_client, target, track_id)
+            except SpotifyException as e:
+                if not cached_device or not is_device_gone(e):
+                    raise
+                # Remembered device was closed or switched off; look again once
+                device_cache.invalidate(user_id)
+                target = self._find_device(sp_client)
+                if not target:
                     return {'success': False, 'error': 'No active devices found'}
+                self._start_track(sp_client, target, track_id)
 
+            device_cache.remember(user_id, target)
+            return {'success': True}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _find_device(self, sp_client):
+        with metrics.SPOTIFY_LATENCY.time(operation='devices'):
+            devices = sp_client.devices()
+        return pick_device(devices)
+
+    def _start_track(self, sp_client, device_id, track_id):
+        with metrics.SPOTIFY_LATENCY.time(operation='start_playback'):
             sp_client.start_playback(
                 device_id=device_id,
                 uris=[f"spotify:track:{track_id}"]
             )
-            return {'success': True}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
 
     def pause_playback(self, device_id=None, sp_client=None):
         """
@@ -461,7 +532,8 @@ class SpotifyService:
             return {'success': False, 'error': 'Not authenticated'}
 
         try:
-            sp_client.pause_playback(device_id=device_id)
+            with metrics.SPOTIFY_LATENCY.time(operation='pause_playback'):
+                sp_client.pause_playback(device_id=device_id)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -481,7 +553,8 @@ class SpotifyService:
             return {'success': False, 'error': 'Not authenticated'}
 
         try:
-            sp_client.start_playback(device_id=device_id)
+            with metrics.SPOTIFY_LATENCY.time(operation='start_playback'):
+                sp_client.start_playback(device_id=device_id)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -500,7 +573,8 @@ class SpotifyService:
             return None
 
         try:
-            playback = sp_client.current_playback()
+            with metrics.SPOTIFY_LATENCY.time(operation='current_playback'):
+                playback = sp_client.current_playback()
             if playback and playback.get('item'):
                 return {
                     'is_playing': playback['is_playing'],
@@ -519,41 +593,127 @@ class SpotifyService:
             print(f"[ERROR] Error getting playback: {e}")
             return None
 
-    def create_mood_playlist(self, user_id, mood, track_ids, sp_client=None):
+    def create_mood_playlist(self, user_id, mood, track_ids, sp_client=None, update_existing=True):
         """
-        Create a Spotify playlist for a mood
+        Create a Spotify playlist for a mood, or bring the existing one up to date
+
+        Tracks are sent in 100-item chunks (Spotify's limit), so any number of
+        tracks can be added. When the user already has this mood's MoodDJ
+        playlist it is diffed and edited in place instead of making another one.
 
         Args:
             user_id: Spotify user ID
             mood: Mood name
-            track_ids: List of track IDs to add
+            track_ids: List of track IDs, in playlist order
             sp_client: Spotify client instance (from session token)
+            update_existing: Reuse the user's MoodDJ playlist for this mood if there is one
 
         Returns:
-            dict: Success status and playlist info
+            dict: Success status, playlist info and how many tracks were added/removed
         """
         if not sp_client:
             return {'success': False, 'error': 'Not authenticated'}
 
         try:
             playlist_name = f"MoodDJ - {mood.capitalize()} Vibes"
-            playlist = sp_client.user_playlist_create(
-                user_id,
-                playlist_name,
-                public=False,
-                description=f"Auto-generated playlist for {mood} mood by MoodDJ"
-            )
-
-            # Add tracks in batches of 100 (Spotify limit)
-            track_uris = [f"spotify:track:{tid}" for tid in track_ids[:100]]
+            # Duplicates would make the diff ambiguous; keep the first occurrence
+            desired = list(dict.fromkeys(f"spotify:track:{tid}" for tid in track_ids))
+
+            playlist = self._find_playlist(sp_client, user_id, playlist_name) if update_existing else None
+            created = playlist is None
+            if created:
+                with metrics.SPOTIFY_LATENCY.time(operation='playlist_create'):
+                    playlist = sp_client.user_playlist_create(
+                        user_id,
+                        playlist_name,
+                        public=False,
+                        description=f"Auto-generated playlist for {mood} mood by MoodDJ"
+                    )
+                current = []
+            else:
+                current = self._playlist_uris(sp_client, playlist['id'])
 
-            if track_uris:
-                sp_client.playlist_add_items(playlist['id'], track_uris)
+            added, removed = self._sync_playlist(sp_client, playlist['id'], current, desired)
 
             return {
                 'success': True,
                 'playlist_id': playlist['id'],
-                'playlist_url': playlist['external_urls']['spotify']
+                'playlist_url': playlist['external_urls']['spotify'],
+                'created': created,
+                'total_tracks': len(desired),
+                'added': added,
+                'removed': removed
             }
         except Exception as e:
             return {'success': False, 'error': str(e)}
+
+    def _find_playlist(self, sp_client, user_id, name):
+        """The user's own playlist called name, or None"""
+        offset = 0
+        while True:
+            with metrics.SPOTIFY_LATENCY.time(operation='playlist_list'):
+                page = sp_client.current_user_playlists(limit=50, offset=offset)
+            for playlist in page.get('items') or []:
+                if playlist and playlist.get('name') == name and (playlist.get('owner') or {}).get('id') == user_id:
+                    return playlist
+            if not page.get('next'):
+                return None
+            offset += 50
+
+    def _playlist_uris(self, sp_client, playlist_id):
+        """Track URIs of a playlist in order; pages after the first are fetched concurrently"""
+        fields = 'items(track(uri)),total,next'
+
+        def fetch(offset):
+            with metrics.SPOTIFY_LATENCY.time(operation='playlist_items'):
+                return sp_client.playlist_items(playlist_id, fields=fields, limit=PLAYLIST_CHUNK_SIZE, offset=offset)
+
+        pages = [fetch(0)]
+        offsets = range(PLAYLIST_CHUNK_SIZE, pages[0].get('total') or 0, PLAYLIST_CHUNK_SIZE)
+        if offsets:
+            with ThreadPoolExecutor(max_workers=PLAYLIST_WORKERS) as pool:
+                pages.extend(pool.map(fetch, offsets))
+
+        # Local files and unavailable tracks have no URI and are left alone
+        uris = [(item.get('track') or {}).get('uri') for page in pages for item in page.get('items') or []]
+        return [uri for uri in uris if uri]
+
+    def _sync_playlist(self, sp_client, playlist_id, current, desired):
+        """
+        Edit a playlist from current to desired with as few calls as possible
+
+        Tracks that should stay are kept when they are already in the desired
+        order: stale tracks are removed (chunks in parallel, removal is order
+        independent) and the missing tail is appended. Otherwise the first
+        chunk replaces the playlist and the rest is appended. Appends go one
+        chunk at a time because Spotify applies them in arrival order.
+
+        Returns:
+            tuple: (tracks added, tracks removed)
+        """
+        wanted = set(desired)
+        kept = [uri for uri in current if uri in wanted]
+
+        if kept == desired[:len(kept)]:
+            stale = list(dict.fromkeys(uri for uri in current if uri not in wanted))
+            tail = desired[len(kept):]
+        else:
+            stale, tail = [], desired[PLAYLIST_CHUNK_SIZE:]
+            with metrics.SPOTIFY_LATENCY.time(operation='playlist_replace_items'):
+                sp_client.playlist_replace_items(playlist_id, desired[:PLAYLIST_CHUNK_SIZE])
+
+        def remove(uris):
+            with metrics.SPOTIFY_LATENCY.time(operation='playlist_remove_items'):
+                sp_client.playlist_remove_all_occurrences_of_items(playlist_id, uris)
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=PLAYLIST_WORKERS) as pool:
+                list(pool.map(remove, chunked(stale)))
+
+        for chunk in chunked(tail):
+            with metrics.SPOTIFY_LATENCY.time(operation='playlist_add_items'):
+                sp_client.playlist_add_items(playlist_id, chunk)
+
+        present = set(current)
+        added = sum(1 for uri in desired if uri not in present)
+        return added, len(current) - (len(desired) - added)
@@ -0,0 +1,217 @@
+"""
+Token Manager
+Shared Spotify access-token refresh with per-user locking
+
+Every request used to refresh an expired token on its own, so the burst of
+parallel dashboard requests right after expiry refreshed the same user's
+token several times. The token manager keeps the newest token per user
+(in Redis when configured, so all workers see it, plus a local copy) and
+refreshes each user at most once at a time:
+
+- More than SPOTIFY_TOKEN_REFRESH_MARGIN seconds left: the token is used as is.
+- Inside the margin but still valid: the current token is returned and a
+  background thread refreshes it, so requests never wait on the refresh.
+- Expired: the request refreshes under a per-user lock (a Redis lock across
+  workers); whoever waited on the lock reuses the token it stored.
+
+Usage:
+    from services.token_manager import token_manager
+
+    token_info = token_manager.get_token(spotify_user_id, session_token_info,
+                                         spotify_service.refresh_access_token)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import redis
+
+from services import metrics
+
+REFRESH_MARGIN = int(os.getenv('SPOTIFY_TOKEN_REFRESH_MARGIN', '300'))
+LOCK_TIMEOUT = 15       # seconds a refresh may hold the Redis lock
+STORE_TTL = 7 * 86400   # matches PERMANENT_SESSION_LIFETIME
+LOCK_STRIPES = 64
+
+KEY_PREFIX = 'mooddj:spotify-token:'
+
+
+def _default_redis_url() -> Optional[str]:
+    if os.getenv('TOKEN_STORE_REDIS'):
+        return os.getenv('TOKEN_STORE_REDIS')
+    if os.getenv('SESSION_TYPE') == 'redis':
+        return os.getenv('SESSION_REDIS', 'redis://localhost:6379')
+    return None
+
+
+def _expires_in(token_info: Optional[dict]) -> float:
+    if not token_info:
+        return float('-inf')
+    return token_info.get('expires_at', 0) - time.time()
+
+
+def _newest(*tokens: Optional[dict]) -> Optional[dict]:
+    candidates = [token for token in tokens if token]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda token: token.get('expires_at', 0))
+
+
+class TokenManager:
+    """Per-user token store with single-flight refresh"""
+
+    def __init__(self, redis_url: Optional[str] = None, margin: Optional[int] = None, max_size: int = 10000):
+        """
+        Args:
+            redis_url: Shared token store (TOKEN_STORE_REDIS, or SESSION_REDIS when
+                SESSION_TYPE=redis); None keeps tokens and locks in this process
+            margin: Seconds before expiry to start refreshing (SPOTIFY_TOKEN_REFRESH_MARGIN, default 300)
+            max_size: Tokens kept in the local store
+        """
+        self.redis_url = redis_url if redis_url is not None else _default_redis_url()
+        self.margin = margin if margin is not None else REFRESH_MARGIN
+        self.max_size = max_size
+        self._redis = None
+        self._tokens: OrderedDict = OrderedDict()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_token(self, user_id: Optional[str], token_info: Optional[dict],
+                  refresh: Callable[[str], Optional[dict]]) -> Optional[dict]:
+        """
+        Get a usable token for a user, refreshing once per user when needed
+
+        Args:
+            user_id: Spotify user ID (the lock and store key)
+            token_info: Token from the caller's session
+            refresh: Called with the refresh token; returns new token info or None
+
+        Returns:
+            dict: The newest valid token info (may differ from token_info; callers
+            should write it back to the session), or None if it cannot be refreshed
+        """
+        if not token_info:
+            return None
+
+        if not user_id:
+            # No key to share on; refresh inline only when it is already expired
+            if _expires_in(token_info) > 0:
+                return token_info
+            return refresh(token_info.get('refresh_token'))
+
+        current = _newest(token_info, self._load(user_id))
+        remaining = _expires_in(current)
+
+        if remaining > self.margin:
+            return current
+        if remaining > 0:
+            self._refresh_in_background(user_id, current, refresh)
+            return current
+        return self._refresh(user_id, current, refresh)
+
+    def remember(self, user_id: str, token_info: dict):
+        """Store a token obtained elsewhere (e.g. the OAuth callback)"""
+        self._store(user_id, token_info)
+
+    def _refresh(self, user_id: str, current: dict, refresh: Callable) -> Optional[dict]:
+        with self._stripe(user_id), self._distributed_lock(user_id):
+            # Another thread or worker may have refreshed while we waited
+            latest = _newest(current, self._load(user_id))
+            if _expires_in(latest) > self.margin:
+                metrics.TOKEN_REFRESHES.inc(result='reused')
+                return latest
+
+            new_token = refresh(latest.get('refresh_token'))
+            if not new_token:
+                metrics.TOKEN_REFRESHES.inc(result='failed')
+                # A token inside the margin is still usable until it actually expires
+                return latest if _expires_in(latest) > 0 else None
+
+            metrics.TOKEN_REFRESHES.inc(result='refreshed')
+            self._store(user_id, new_token)
+            return new_token
+
+    def _refresh_in_background(self, user_id: str, current: dict, refresh: Callable):
+        with self._lock:
+            if user_id in self._refreshing:
+                return
+            self._refreshing.add(user_id)
+
+        def run():
+            try:
+                self._refresh(user_id, current, refresh)
+            except Exception as e:
+                print(f"[WARN] Background token refresh failed for {user_id}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(user_id)
+
+        threading.Thread(target=run, name='token-refresh', daemon=True).start()
+
+    def _stripe(self, user_id: str) -> threading.Lock:
+        return self._stripes[hash(user_id) % LOCK_STRIPES]
+
+    @contextmanager
+    def _distributed_lock(self, user_id: str):
+        client = self._client()
+        lock = None
+        if client is not None:
+            try:
+                lock = client.lock(f'{KEY_PREFIX}lock:{user_id}', timeout=LOCK_TIMEOUT,
+                                   blocking_timeout=LOCK_TIMEOUT)
+                if not lock.acquire():
+                    # Holder is slow or gone; the store re-check still avoids most duplicates
+                    print(f"[WARN] Timed out waiting for token lock of {user_id}")
+                    lock = None
+            except redis.RedisError as e:
+                print(f"[WARN] Token lock unavailable, refreshing without it: {e}")
+                lock = None
+        try:
+            yield
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except redis.RedisError:
+                    pass  # Expired while refreshing; nothing to release
+
+    def _client(self):
+        if self.redis_url and self._redis is None:
+            self._redis = redis.from_url(self.redis_url, socket_timeout=2)
+        return self._redis
+
+    def _load(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            local = self._tokens.get(user_id)
+        client = self._client()
+        if client is None:
+            return local
+        try:
+            raw = client.get(KEY_PREFIX + user_id)
+        except redis.RedisError as e:
+            print(f"[WARN] Token store read failed: {e}")
+            return local
+        return _newest(local, json.loads(raw) if raw else None)
+
+    def _store(self, user_id: str, token_info: dict):
+        with self._lock:
+            self._tokens[user_id] = token_info
+            self._tokens.move_to_end(user_id)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+        client = self._client()
+        if client is not None:
+            try:
+                client.setex(KEY_PREFIX + user_id, STORE_TTL, json.dumps(token_info))
+            except redis.RedisError as e:
+                print(f"[WARN] Token store write failed: {e}")
+
+
+# Singleton instance for easy import
+token_manager = TokenManager()
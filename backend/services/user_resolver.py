@@ -0,0 +1,123 @@
+"""
+User Resolver
+Maps Spotify user IDs to internal users.user_id values
+
+The Flask session identifies users by Spotify ID, while user_songs and
+mood_sessions are keyed by the integer users.user_id. The internal ID is
+resolved once at login and stored in the session as 'db_user_id'; sessions
+created before that (or other callers holding only a Spotify ID) go through
+a process-local LRU cache so queries can filter on the integer key directly
+instead of joining users on spotify_id.
+
+Usage:
+    from services.user_resolver import user_resolver, session_db_user_id
+
+    db_user_id = session_db_user_id()              # inside a request
+    db_user_id = user_resolver.resolve(spotify_id)  # anywhere else
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import session
+
+from config.database import execute_query
+from services import metrics
+
+
+class UserResolver:
+    """LRU cache of spotify_id -> users.user_id"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Args:
+            max_size: Cached users kept in memory (USER_ID_CACHE_SIZE, default 10000)
+        """
+        self.max_size = max_size or int(os.getenv('USER_ID_CACHE_SIZE', '10000'))
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, spotify_id: str) -> Optional[int]:
+        """
+        Get the internal user ID for a Spotify ID
+
+        Args:
+            spotify_id: User's Spotify ID
+
+        Returns:
+            int: users.user_id, or None if the user has not been stored yet
+        """
+        if not spotify_id:
+            return None
+
+        with self._lock:
+            user_id = self._cache.get(spotify_id)
+            if user_id is not None:
+                self._cache.move_to_end(spotify_id)
+                self.hits += 1
+                metrics.CACHE_REQUESTS.inc(cache='user_id', result='hit')
+                return user_id
+            self.misses += 1
+        metrics.CACHE_REQUESTS.inc(cache='user_id', result='miss')
+
+        rows = execute_query(
+            "SELECT user_id FROM users WHERE spotify_id = %s",
+            (spotify_id,),
+            fetch=True
+        )
+        if not rows:
+            # Unknown users are not cached so they resolve as soon as they log in
+            return None
+
+        user_id = rows[0]['user_id']
+        self.remember(spotify_id, user_id)
+        return user_id
+
+    def remember(self, spotify_id: str, user_id: int):
+        """Cache a known mapping (e.g. right after the users upsert at login)"""
+        with self._lock:
+            self._cache[spotify_id] = user_id
+            self._cache.move_to_end(spotify_id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def forget(self, spotify_id: str):
+        """Drop a cached mapping"""
+        with self._lock:
+            self._cache.pop(spotify_id, None)
+
+    def stats(self) -> dict:
+        """Cache counters"""
+        with self._lock:
+            return {
+                'size': len(self._cache),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Singleton instance for easy import
+user_resolver = UserResolver()
+
+
+def session_db_user_id() -> Optional[int]:
+    """
+    Get the logged-in user's internal user ID from the Flask session
+
+    Falls back to resolving session['user_id'] (and stores the result in the
+    session) for sessions created before db_user_id was added at login.
+
+    Returns:
+        int: users.user_id, or None if not logged in or not stored yet
+    """
+    db_user_id = session.get('db_user_id')
+    if db_user_id is None and session.get('user_id'):
+        db_user_id = user_resolver.resolve(session['user_id'])
+        if db_user_id is not None:
+            session['db_user_id'] = db_user_id
+    return db_user_id
@@ -1,10 +1,15 @@
 import pytest
 import sys
 import os
+import threading
+import time
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app, socketio
+from unittest.mock import Mock, patch
+
+from app import app, socketio, health_checker
+from services.health import HealthChecker
 
 
 class TestApp:
@@ -65,9 +70,9 @@ class TestApp:
         """
         Test Case 3: WebSocket Mood Update
         
-        Purpose: Verify mood update broadcasting via WebSocket
+        Purpose: Verify mood update delivery via WebSocket
         Input: Emit 'mood_update' event with mood data
-        Expected Output: 'mood_changed' event broadcast to all clients
+        Expected Output: 'mood_changed' event sent back to the sender
         Tests: Real-time mood synchronization
         """
         # Send mood update
@@ -170,6 +175,106 @@ class TestApp:
         # CORS headers should be present (handled by Flask-CORS)
         print("✅ Test 7 PASSED: CORS configured")
 
+    def _user_socket(self, user_id):
+        http_client = app.test_client()
+        with http_client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        return socketio.test_client(app, flask_test_client=http_client)
+
+    def test_mood_update_reaches_only_own_room(self):
+        """
+        Test Case 8: Per-User Rooms
+        
+        Purpose: Verify mood updates go to the sender's own connections only
+        Input: Two sockets for user_a, one for user_b, one anonymous; user_a sends 'mood_update'
+        Expected Output: Both user_a sockets receive 'mood_changed'; user_b and anonymous do not
+        Tests: Session-authenticated Socket.IO rooms
+        """
+        app.config['TESTING'] = True
+        a1, a2, b = self._user_socket('user_a'), self._user_socket('user_a'), self._user_socket('user_b')
+        anonymous = socketio.test_client(app)
+        for sock in (a1, a2, b, anonymous):
+            sock.get_received()
+        
+        a1.emit('mood_update', {'mood': 'happy', 'confidence': 0.9})
+        
+        def mood_events(sock):
+            return [r for r in sock.get_received() if r['name'] == 'mood_changed']
+        
+        assert len(mood_events(a1)) == 1
+        assert len(mood_events(a2)) == 1
+        assert mood_events(b) == []
+        assert mood_events(anonymous) == []
+        for sock in (a1, a2, b, anonymous):
+            sock.disconnect()
+        print("✅ Test 8 PASSED: Mood updates scoped to the user's room")
+
+    def test_liveness_and_readiness(self, client):
+        """
+        Test Case 9: Liveness and Readiness
+        
+        Purpose: Verify readiness reflects dependency probes and caches their results
+        Input: GET /api/health/live; GET /api/health/ready twice with the database probe failing
+        Expected Output: live 200; ready 503 listing the failed check, probes run once
+        Tests: Load balancer health checks
+        """
+        database_probe = Mock(side_effect=Exception('Lost connection'))
+        detector_probe = Mock(return_value=True)
+        
+        with patch.object(health_checker, '_probes', {'database': database_probe, 'detector': detector_probe}), \
+                patch.object(health_checker, '_result', None):
+            live = client.get('/api/health/live')
+            first = client.get('/api/health/ready')
+            second = client.get('/api/health/ready')
+        
+        assert live.status_code == 200
+        assert first.status_code == 503
+        data = first.get_json()
+        assert data['checks']['database']['ok'] == False
+        assert data['checks']['detector']['ok'] == True
+        assert second.get_json()['cached'] == True
+        assert database_probe.call_count == 1
+        print("✅ Test 9 PASSED: Readiness probes dependencies with caching")
+
+    def test_hung_probe_times_out(self):
+        """
+        Test Case 10: Probe Timeout
+
+        Purpose: Verify a hanging dependency cannot stall readiness and failures are re-probed sooner
+        Input: One probe blocked on an event, one passing; timeout 0.1s, failure TTL 0.2s, TTL 60s
+        Expected Output: Check returns within ~timeout with the hung probe failed; cached briefly,
+                         re-probed after the failure TTL without starting a second hung call
+        Tests: Bounded, parallel probes with a shorter failure TTL
+        """
+        release = threading.Event()
+        hung_calls = []
+
+        def hung_probe():
+            hung_calls.append(1)
+            release.wait(5)
+
+        checker = HealthChecker(ttl=60, failure_ttl=0.2, timeout=0.1)
+        checker.register('database', hung_probe)
+        checker.register('detector', lambda: True)
+
+        start = time.monotonic()
+        first = checker.check()
+        elapsed = time.monotonic() - start
+        cached = checker.check()
+        time.sleep(0.25)
+        second = checker.check()
+        release.set()
+
+        assert elapsed < 1
+        assert first['ready'] == False
+        assert 'timed out' in first['checks']['database']['error']
+        assert first['checks']['detector']['ok'] == True
+        assert cached['cached'] == True
+        assert second['cached'] == False
+        assert second['checks']['database']['error'] == 'previous probe still running'
+        assert len(hung_calls) == 1
+        print("✅ Test 10 PASSED: Hung probe times out and failures expire sooner")
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
@@ -1,7 +1,7 @@
 import pytest
 import sys
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -121,21 +121,54 @@ class TestAuthRoutes:
         """
         Test Case 6: Logout
         
-        Purpose: Verify logout clears session
+        Purpose: Verify logout clears session and drops the user's playback queue
         Input: POST /api/auth/logout
-        Expected Output: {'success': True}
+        Expected Output: {'success': True}, playback queue stopped
         Tests: Session cleanup
         """
         with client.session_transaction() as sess:
             sess['user_id'] = 'test_user'
         
-        response = client.post('/api/auth/logout')
+        with patch('routes.music_routes.playback_queues.stop') as mock_stop:
+            response = client.post('/api/auth/logout')
         data = response.get_json()
         
         assert response.status_code == 200
         assert data['success'] == True
+        mock_stop.assert_called_once_with('test_user')
         print("✅ Test 6 PASSED: Logout works")
 
+    @patch('routes.auth_routes.user_resolver.remember')
+    @patch('routes.auth_routes.transaction')
+    @patch('routes.auth_routes.spotify_service.exchange_code_for_token')
+    @patch('routes.auth_routes.spotify_service.create_spotify_client')
+    @patch('routes.auth_routes.spotify_service.get_user_profile')
+    def test_callback_stores_internal_user_id(self, mock_profile, mock_client, mock_exchange,
+                                              mock_transaction, mock_remember, client):
+        """
+        Test Case 7: Internal User ID at Login
+        
+        Purpose: Verify the callback resolves users.user_id once and keeps it
+        Input: GET /api/auth/callback?code=test_code, users upsert returns id 42
+        Expected Output: session['db_user_id'] == 42, mapping cached in the resolver
+        Tests: User ID resolution at login
+        """
+        mock_exchange.return_value = {'access_token': 'test_token', 'expires_at': 9999999999}
+        mock_client.return_value = Mock()
+        mock_profile.return_value = {'id': 'test_user', 'display_name': 'Test User'}
+        tx = MagicMock()
+        tx.execute.return_value = 42
+        mock_transaction.return_value.__enter__.return_value = tx
+        
+        response = client.get('/api/auth/callback?code=test_code')
+        
+        assert response.status_code == 302
+        assert 'LAST_INSERT_ID(user_id)' in tx.execute.call_args[0][0]
+        with client.session_transaction() as sess:
+            assert sess['db_user_id'] == 42
+        mock_remember.assert_called_once_with('test_user', 42)
+        print("✅ Test 7 PASSED: Internal user ID stored at login")
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
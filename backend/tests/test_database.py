@@ -1,10 +1,24 @@
 import pytest
 import sys
 import os
+import threading
+import time
+from unittest.mock import Mock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from config.database import execute_query, get_db_connection
+from config import database
+from config.database import execute_query, get_db_connection, transaction, stream_query, ConnectionPool, PoolTimeoutError, ReplicaSet, WriteTracker
+from mysql.connector.errors import PoolError, OperationalError
+import redis
+
+
+def mock_connection():
+    """Mock pooled connection reporting real numbers like PooledConnection and a MySQL cursor"""
+    conn = Mock()
+    conn.wait_time = 0.0
+    conn.cursor.return_value.rowcount = 0
+    return conn
 
 
 class TestDatabase:
@@ -108,5 +122,379 @@ class TestDatabase:
         print("✅ Test 4 PASSED: SQL injection prevented")
 
 
+
+class TestConnectionPool:
+    """Unit tests for ConnectionPool (no database required)"""
+    
+    @pytest.fixture
+    def mysql_pool(self):
+        """Mock MySQLConnectionPool with 2 pooled connections"""
+        pool = Mock()
+        state = {'free': 2}
+        
+        def get_connection():
+            if state['free'] == 0:
+                raise PoolError("Failed getting connection; pool exhausted")
+            state['free'] -= 1
+            conn = Mock()
+            conn.close.side_effect = lambda: state.__setitem__('free', state['free'] + 1)
+            return conn
+        
+        pool.get_connection.side_effect = get_connection
+        return pool
+    
+    def test_overflow_connection_when_pool_exhausted(self, mysql_pool):
+        """
+        Test Case 5: Overflow Checkout
+        
+        Purpose: Verify an exhausted pool opens an overflow connection instead of failing
+        Input: 3 checkouts with pool_size=2, max_overflow=1
+        Expected Output: Third checkout is an overflow connection
+        Tests: Pool overflow and in-use metrics
+        """
+        pool = ConnectionPool({}, pool_size=2, max_overflow=1, timeout=0.1)
+        pool._pool = mysql_pool
+        
+        with patch('config.database.mysql.connector.connect', return_value=Mock()) as mock_connect:
+            conns = [pool.get_connection() for _ in range(3)]
+        
+        stats = pool.stats()
+        assert mock_connect.call_count == 1
+        assert stats['in_use'] == 3
+        assert stats['overflow_in_use'] == 1
+        
+        for conn in conns:
+            conn.close()
+        assert pool.stats()['in_use'] == 0
+        print("✅ Test 5 PASSED: Overflow connection used when pool exhausted")
+    
+    def test_checkout_times_out_when_saturated(self, mysql_pool):
+        """
+        Test Case 6: Checkout Timeout
+        
+        Purpose: Verify checkouts block and then time out when pool and overflow are in use
+        Input: 3rd checkout with pool_size=2, max_overflow=0, timeout=0.05s
+        Expected Output: PoolTimeoutError, timeout and wait time recorded
+        Tests: Blocking checkout with timeout
+        """
+        pool = ConnectionPool({}, pool_size=2, max_overflow=0, timeout=0.05)
+        pool._pool = mysql_pool
+        conns = [pool.get_connection() for _ in range(2)]
+        
+        with pytest.raises(PoolTimeoutError):
+            pool.get_connection()
+        
+        stats = pool.stats()
+        assert stats['timeouts'] == 1
+        assert stats['wait_time_max'] >= 0.05
+        for conn in conns:
+            conn.close()
+        print("✅ Test 6 PASSED: Saturated pool timed out")
+    
+    def test_checkout_waits_for_release(self, mysql_pool):
+        """
+        Test Case 7: Blocking Checkout
+        
+        Purpose: Verify a waiting checkout succeeds once a connection is returned
+        Input: Saturated pool, connection released after 50ms
+        Expected Output: Checkout succeeds after waiting
+        Tests: Blocking checkout
+        """
+        pool = ConnectionPool({}, pool_size=2, max_overflow=0, timeout=2)
+        pool._pool = mysql_pool
+        conns = [pool.get_connection() for _ in range(2)]
+        
+        threading.Timer(0.05, conns[0].close).start()
+        conn = pool.get_connection()
+        
+        assert conn.wait_time >= 0.04
+        assert pool.stats()['timeouts'] == 0
+        conn.close()
+        conns[1].close()
+        print("✅ Test 7 PASSED: Checkout waited for a free connection")
+
+    def test_invalidate_closes_socket_and_frees_slot(self, mysql_pool):
+        """
+        Test Case 7b: Invalidated Connection
+
+        Purpose: Verify invalidate() shuts the socket down and still frees the pool slot
+        Input: pool_size=1, invalidate() while the session reset fails
+        Expected Output: shutdown() called, slot reusable, later close() is a no-op
+        Tests: Dropping a connection with an unread result
+        """
+        pool = ConnectionPool({}, pool_size=1, max_overflow=0, timeout=0.05)
+        pool._pool = mysql_pool
+        conn = pool.get_connection()
+        raw = conn._conn
+        raw.close.side_effect = Exception('Unread result found')
+
+        conn.invalidate()
+        conn.close()
+
+        raw.shutdown.assert_called_once()
+        assert pool.stats()['in_use'] == 0
+        pool.get_connection().close()
+        print("✅ Test 7b PASSED: Invalidated connection released")
+
+    
+    @patch('config.database.get_db_connection')
+    def test_transaction_commits_once(self, mock_get_conn):
+        """
+        Test Case 8: Unit of Work Commit
+        
+        Purpose: Verify several statements share one connection and commit once
+        Input: execute + executemany + fetchall inside transaction()
+        Expected Output: One checkout, one cursor, one commit, connection closed
+        Tests: Transaction context manager
+        """
+        conn = mock_connection()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = [{'song_id': 1}]
+        mock_get_conn.return_value = conn
+        
+        with transaction() as tx:
+            tx.execute("DELETE FROM user_songs WHERE user_id = %s", (1,))
+            tx.executemany("INSERT INTO songs (title) VALUES (%s)", [('a',), ('b',)])
+            rows = tx.fetchall("SELECT song_id FROM songs")
+        
+        assert rows == [{'song_id': 1}]
+        assert mock_get_conn.call_count == 1
+        assert conn.cursor.call_count == 1
+        assert cursor.executemany.call_count == 1
+        conn.commit.assert_called_once()
+        conn.rollback.assert_not_called()
+        conn.close.assert_called_once()
+        print("✅ Test 8 PASSED: Unit of work committed once")
+    
+    @patch('config.database.get_db_connection')
+    def test_transaction_rolls_back_on_error(self, mock_get_conn):
+        """
+        Test Case 9: Unit of Work Rollback
+        
+        Purpose: Verify an error inside the block rolls back and releases the connection
+        Input: Statement raising inside transaction()
+        Expected Output: Rollback, no commit, connection closed, error re-raised
+        Tests: Atomicity
+        """
+        conn = mock_connection()
+        conn.cursor.return_value.execute.side_effect = [None, Exception('duplicate key')]
+        mock_get_conn.return_value = conn
+        
+        with pytest.raises(Exception, match='duplicate key'):
+            with transaction() as tx:
+                tx.execute("INSERT INTO users (spotify_id) VALUES (%s)", ('a',))
+                tx.execute("INSERT INTO users (spotify_id) VALUES (%s)", ('a',))
+        
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+        conn.close.assert_called_once()
+        print("✅ Test 9 PASSED: Unit of work rolled back")
+
+    
+    @patch('config.database.get_db_connection')
+    def test_stream_query_yields_chunks(self, mock_get_conn):
+        """
+        Test Case 10: Streaming Query
+        
+        Purpose: Verify stream_query reads an unbuffered cursor in chunks and releases the connection
+        Input: 5 rows with chunk_size=2; a second stream abandoned after the first chunk
+        Expected Output: Chunks of 2, 2, 1; abandoned stream invalidates the connection without draining it
+        Tests: Server-side cursor streaming
+        """
+        conn = mock_connection()
+        cursor = conn.cursor.return_value
+        cursor.fetchmany.side_effect = [[1, 2], [3, 4], [5], []]
+        mock_get_conn.return_value = conn
+        
+        chunks = list(stream_query("SELECT * FROM mood_sessions", chunk_size=2))
+        
+        assert chunks == [[1, 2], [3, 4], [5]]
+        conn.cursor.assert_called_with(dictionary=True, buffered=False)
+        conn.consume_results.assert_not_called()
+        conn.close.assert_called_once()
+        
+        cursor.fetchmany.side_effect = [[1, 2], [3, 4]]
+        stream = stream_query("SELECT * FROM mood_sessions", chunk_size=2)
+        next(stream)
+        stream.close()
+        
+        conn.consume_results.assert_not_called()
+        conn.invalidate.assert_called_once()
+        assert conn.close.call_count == 1
+        print("✅ Test 10 PASSED: Query streamed in chunks")
+
+    def _replica_set(self, conn):
+        replicas = ReplicaSet(['replica-a:3307'], {'host': 'primary', 'port': 3306}, cooldown=30)
+        replicas.replicas[0]['pool'] = Mock()
+        replicas.replicas[0]['pool'].get_connection.return_value = conn
+        return replicas
+
+    @patch('config.database.get_db_connection')
+    def test_read_only_queries_use_replica(self, mock_get_conn):
+        """
+        Test Case 11: Replica Routing
+        
+        Purpose: Verify read-only SELECTs go to a replica and writes pin the user's reads to the primary
+        Input: read_only query; a write in the same read context; another read_only query
+        Expected Output: First read on the replica, read after the write on the primary
+        Tests: Read replica routing and read-your-writes stickiness
+        """
+        primary = mock_connection()
+        primary.cursor.return_value.fetchall.return_value = [{'source': 'primary'}]
+        replica = mock_connection()
+        replica.cursor.return_value.fetchall.return_value = [{'source': 'replica'}]
+        mock_get_conn.return_value = primary
+        replicas = self._replica_set(replica)
+        
+        with patch.object(database, 'replica_set', replicas):
+            database.set_read_context(42)
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'replica'}]
+            assert execute_query("SELECT 1", fetch=True) == [{'source': 'primary'}]
+            
+            execute_query("INSERT INTO mood_sessions (user_id) VALUES (%s)", (42,))
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'primary'}]
+            
+            database.set_read_context(7)
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'replica'}]
+            database.set_read_context(None)
+        print("✅ Test 11 PASSED: Reads routed to replica with read-your-writes")
+
+    @patch('config.database.get_db_connection')
+    def test_failed_replica_falls_back_to_primary(self, mock_get_conn):
+        """
+        Test Case 12: Replica Failover
+        
+        Purpose: Verify a replica that loses its connection is skipped during its cooldown
+        Input: Replica cursor raises OperationalError
+        Expected Output: Query answered by the primary; replica marked unhealthy and not retried
+        Tests: Replica health checking
+        """
+        primary = mock_connection()
+        primary.cursor.return_value.fetchall.return_value = [{'source': 'primary'}]
+        replica = mock_connection()
+        replica.cursor.return_value.execute.side_effect = OperationalError('Lost connection')
+        mock_get_conn.return_value = primary
+        replicas = self._replica_set(replica)
+        
+        with patch.object(database, 'replica_set', replicas):
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'primary'}]
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'primary'}]
+        
+        assert replicas.replicas[0]['pool'].get_connection.call_count == 1
+        assert replicas.stats()[0]['healthy'] is False
+        print("✅ Test 12 PASSED: Failed replica falls back to primary")
+
+    @patch('config.database.get_db_connection')
+    def test_saturated_replica_stays_in_rotation(self, mock_get_conn):
+        """
+        Test Case 12b: Saturated Replica
+        
+        Purpose: Verify a replica checkout timeout only reroutes that read, without a cooldown
+        Input: Replica pool raises PoolTimeoutError once, then returns a connection
+        Expected Output: First read on the primary, second on the replica; replica still healthy
+        Tests: Replica load shedding
+        """
+        primary = mock_connection()
+        primary.cursor.return_value.fetchall.return_value = [{'source': 'primary'}]
+        replica = mock_connection()
+        replica.cursor.return_value.fetchall.return_value = [{'source': 'replica'}]
+        mock_get_conn.return_value = primary
+        replicas = self._replica_set(replica)
+        replicas.replicas[0]['pool'].get_connection.side_effect = [PoolTimeoutError('busy'), replica]
+        
+        with patch.object(database, 'replica_set', replicas):
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'primary'}]
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'replica'}]
+        
+        stats = replicas.stats()[0]
+        assert stats['healthy'] is True
+        assert stats['failures'] == 0
+        assert stats['saturated'] == 1
+        print("✅ Test 12b PASSED: Saturated replica stays in rotation")
+
+    def test_write_pins_shared_across_workers(self):
+        """
+        Test Case 13: Shared Read-Your-Writes Pins
+        
+        Purpose: Verify a write recorded by one worker pins reads on another
+        Input: Two WriteTrackers sharing one (fake) Redis; a buffered write pinned for its flush delay
+        Expected Output: Pin visible to the other tracker; gone once the deadline passes
+        Tests: Cross-process read-your-writes
+        """
+        store = {}
+        shared = Mock()
+        shared.get.side_effect = store.get
+        shared.set.side_effect = lambda name, value, px=None: store.__setitem__(name, value)
+        worker_a = WriteTracker('redis://redis:6379')
+        worker_b = WriteTracker('redis://redis:6379')
+        worker_a._redis = worker_b._redis = shared
+        
+        worker_a.pin(42, 0.5 + 5)
+        assert worker_b.is_pinned(42)
+        assert not worker_b.is_pinned(7)
+        
+        # A shorter pin never cuts an existing one short
+        worker_b.pin(42, 0.01)
+        time.sleep(0.05)
+        assert worker_a.is_pinned(42)
+        
+        worker_a.pin(7, 0.01)
+        time.sleep(0.05)
+        assert not worker_b.is_pinned(7)
+        print("✅ Test 13 PASSED: Read pins shared across workers")
+
+
+    @patch('config.database.get_db_connection')
+    def test_pin_resolved_once_per_request(self, mock_get_conn):
+        """
+        Test Case 14: One Pin Lookup per Request
+        
+        Purpose: Verify the read-your-writes pin is looked up once per request, not per query
+        Input: Three read_only queries in one read context, then a write and another read
+        Expected Output: is_pinned called once; the read after the write goes to the primary
+        Tests: Pin caching in the request context
+        """
+        primary = mock_connection()
+        primary.cursor.return_value.fetchall.return_value = [{'source': 'primary'}]
+        replica = mock_connection()
+        replica.cursor.return_value.fetchall.return_value = [{'source': 'replica'}]
+        mock_get_conn.return_value = primary
+        tracker = Mock()
+        tracker.is_pinned.return_value = False
+        
+        with patch.object(database, 'replica_set', self._replica_set(replica)), \
+                patch.object(database, 'write_tracker', tracker):
+            database.set_read_context(42)
+            for _ in range(3):
+                assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'replica'}]
+            execute_query("INSERT INTO mood_sessions (user_id) VALUES (%s)", (42,))
+            assert execute_query("SELECT 1", fetch=True, read_only=True) == [{'source': 'primary'}]
+            database.set_read_context(None)
+        
+        assert tracker.is_pinned.call_count == 1
+        tracker.pin.assert_called_once()
+        print("✅ Test 14 PASSED: Pin looked up once per request")
+
+    def test_pin_store_outage_backs_off(self):
+        """
+        Test Case 15: Pin Store Outage
+        
+        Purpose: Verify a Redis outage is not retried on every call
+        Input: Redis client raising ConnectionError; pin() then is_pinned() twice
+        Expected Output: Redis tried once; pin kept in process and still honoured
+        Tests: Circuit breaker around the pin store
+        """
+        broken = Mock()
+        broken.get.side_effect = redis.ConnectionError('Connection refused')
+        tracker = WriteTracker('redis://redis:6379', retry_after=30)
+        tracker._redis = broken
+        
+        tracker.pin(42, 5)
+        assert tracker.is_pinned(42)
+        assert not tracker.is_pinned(7)
+        
+        assert broken.get.call_count == 1
+        print("✅ Test 15 PASSED: Pin store outage backs off")
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
@@ -0,0 +1,82 @@
+import pytest
+import sys
+import os
+import csv
+import io
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.export_service import to_ndjson, to_csv, export_mood_history, MOOD_HISTORY_COLUMNS
+
+
+CHUNKS = [
+    [{'session_id': 1, 'detected_mood': 'happy', 'confidence_score': 0.9, 'timestamp': datetime(2024, 1, 1, 8)}],
+    [{'session_id': 2, 'detected_mood': 'angry', 'confidence_score': 0.6, 'timestamp': datetime(2024, 1, 1, 9)},
+     {'session_id': 3, 'detected_mood': 'neutral', 'confidence_score': 1.0, 'timestamp': datetime(2024, 1, 1, 10)}]
+]
+
+
+class TestExportService:
+    """Unit tests for Export Service module"""
+
+    def test_ndjson_one_string_per_chunk(self):
+        """
+        Test Case 1: NDJSON Serialization
+
+        Purpose: Verify rows become one JSON object per line, emitted chunk by chunk
+        Input: Two chunks with 1 and 2 rows
+        Expected Output: Two strings, three parseable lines with ISO timestamps
+        Tests: NDJSON streaming format
+        """
+        parts = list(to_ndjson(iter(CHUNKS)))
+        lines = ''.join(parts).splitlines()
+
+        assert len(parts) == 2
+        assert len(lines) == 3
+        assert json.loads(lines[0])['timestamp'] == '2024-01-01T08:00:00'
+        print("✅ Test 1 PASSED: NDJSON serialized per chunk")
+
+    def test_csv_header_then_rows(self):
+        """
+        Test Case 2: CSV Serialization
+
+        Purpose: Verify CSV output starts with a header and streams each chunk
+        Input: Two chunks with 1 and 2 rows
+        Expected Output: Header + three data rows
+        Tests: CSV streaming format
+        """
+        parts = list(to_csv(iter(CHUNKS), MOOD_HISTORY_COLUMNS))
+        rows = list(csv.DictReader(io.StringIO(''.join(parts))))
+
+        assert len(parts) == 3
+        assert [row['detected_mood'] for row in rows] == ['happy', 'angry', 'neutral']
+        assert rows[1]['timestamp'] == '2024-01-01T09:00:00'
+        print("✅ Test 2 PASSED: CSV serialized per chunk")
+
+    @patch('services.export_service.stream_query')
+    def test_export_streams_from_cursor(self, mock_stream):
+        """
+        Test Case 3: Export Uses Streaming Cursor
+
+        Purpose: Verify exports read through stream_query with the time filters
+        Input: export_mood_history(1, 'ndjson', since=...)
+        Expected Output: stream_query called lazily with user and since bound
+        Tests: Flat-memory export path
+        """
+        mock_stream.return_value = iter(CHUNKS)
+
+        chunks = export_mood_history(1, 'ndjson', since=datetime(2024, 1, 1))
+        body = ''.join(chunks)
+
+        query, params, chunk_size = mock_stream.call_args[0]
+        assert 'timestamp >= %s' in query
+        assert params == (1, datetime(2024, 1, 1))
+        assert body.count('\n') == 3
+        print("✅ Test 3 PASSED: Export streamed from cursor")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
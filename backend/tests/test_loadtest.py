@@ -0,0 +1,113 @@
+import pytest
+import sys
+import os
+import requests
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from loadtest.fakes import FakeSpotify, FakeSoundNet
+from loadtest.run import Recorder, percentile
+from services.audio_features_service import AudioFeaturesService
+from services.spotify_service import SpotifyService
+from services.spotify_clients import spotify_clients
+
+
+class TestLoadTest:
+    """Unit tests for the load-test fakes and report"""
+
+    @pytest.fixture
+    def spotify(self):
+        """Fake Spotify on a free port"""
+        server = FakeSpotify(library_size=60).start()
+        yield server
+        server.stop()
+
+    def test_backend_services_talk_to_fake_spotify(self, spotify):
+        """
+        Test Case 1: Spotify Fake Through the Real Client
+
+        Purpose: Verify SpotifyService can log in and page saved tracks against the fake
+        Input: SPOTIFY_ACCOUNTS_URL / SPOTIFY_API_URL pointing at the fake, code 'alice'
+        Expected Output: Token for alice, profile id 'alice', 60 saved tracks over two pages
+        Tests: Base URL overrides and fake payloads
+        """
+        env = {
+            'SPOTIFY_ACCOUNTS_URL': spotify.url,
+            'SPOTIFY_API_URL': f'{spotify.url}/v1',
+            'SPOTIFY_CLIENT_ID': 'loadtest-client',
+            'SPOTIFY_CLIENT_SECRET': 'loadtest-secret'
+        }
+        with patch.dict(os.environ, env), patch.object(spotify_clients, 'api_url', env['SPOTIFY_API_URL']):
+            service = SpotifyService()
+            token_info = service.exchange_code_for_token('alice')
+            sp_client = service.create_spotify_client(token_info)
+
+            assert token_info['access_token'] == 'fake-token-alice'
+            assert service.get_user_profile(sp_client)['id'] == 'alice'
+            first = sp_client.current_user_saved_tracks(limit=50, offset=0)
+            second = sp_client.current_user_saved_tracks(limit=50, offset=50)
+
+        assert len(first['items']) == 50
+        assert len(second['items']) == 10
+        assert len(first['items'][0]['track']['id']) == 22
+        print("✅ Test 1 PASSED: SpotifyService works against the fake")
+
+    def test_soundnet_fake_latency_and_rate_limit(self):
+        """
+        Test Case 2: SoundNet Fake Behaviour
+
+        Purpose: Verify deterministic features and the 429 + Retry-After mode
+        Input: One fake answering normally, one throttling every request
+        Expected Output: Same features for the same track; 429 with Retry-After header
+        Tests: Configurable upstream behaviour
+        """
+        soundnet = FakeSoundNet(missing_rate=0).start()
+        throttled = FakeSoundNet(rate_limit=1.0, retry_after=3).start()
+        try:
+            with patch.dict(os.environ, {'SOUNDNET_BASE_URL': soundnet.url, 'RAPIDAPI_KEY': 'loadtest'}):
+                service = AudioFeaturesService()
+                first = service.get_audio_features('lt00000000000000000042')
+                second = service.get_audio_features('lt00000000000000000042')
+
+            response = requests.get(f'{throttled.url}/pktx/spotify/lt00000000000000000042', timeout=5)
+        finally:
+            soundnet.stop()
+            throttled.stop()
+
+        assert first == second
+        assert 0.0 <= first['valence'] <= 1.0
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '3'
+        assert throttled.stats() == {'requests': 1, 'rate_limited': 1}
+        print("✅ Test 2 PASSED: SoundNet fake is deterministic and can throttle")
+
+    def test_report_percentiles(self):
+        """
+        Test Case 3: Per-Endpoint Report
+
+        Purpose: Verify percentile interpolation and error counting
+        Input: 100 detect samples of 1..100 ms, one failed
+        Expected Output: p50 50.5 ms, p99 99.0 ms, max 100 ms, 1 error
+        Tests: Report math
+        """
+        assert percentile([], 50) == 0.0
+        assert percentile([3, 1, 2], 50) == 2
+
+        recorder = Recorder()
+        for ms in range(1, 101):
+            recorder.record('detect', ms / 1000, 200 if ms != 7 else 500, ms != 7)
+
+        row = recorder.report()[0]
+        assert row['endpoint'] == 'detect'
+        assert row['count'] == 100
+        assert row['errors'] == 1
+        assert row['p50_ms'] == 50.5
+        assert row['p99_ms'] == 99.0
+        assert row['max_ms'] == 100.0
+        assert row['statuses'] == {'200': 99, '500': 1}
+        print("✅ Test 3 PASSED: Percentiles and errors reported")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,93 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.metrics import Counter, Histogram, Gauge, Registry, REGISTRY
+from app import app
+
+
+class TestMetrics:
+    """Unit tests for Metrics module"""
+
+    @pytest.fixture
+    def client(self):
+        """Create Flask test client"""
+        app.config['TESTING'] = True
+        with app.test_client() as client:
+            yield client
+
+    def test_histogram_and_counter_rendering(self):
+        """
+        Test Case 1: Prometheus Text Format
+
+        Purpose: Verify counters and cumulative histogram buckets render correctly
+        Input: Counter incremented twice; histogram observations 0.02 and 0.3 (own registry)
+        Expected Output: Counter value 2; buckets cumulative, _count 2, _sum 0.32
+        Tests: Exposition format
+        """
+        registry = Registry(worker_label=False)
+        counter = Counter('test_events_total', 'Test events', ['kind'], registry=registry)
+        counter.inc(kind='a')
+        counter.inc(kind='a')
+        histogram = Histogram('test_latency_seconds', 'Test latency', buckets=(0.05, 0.5), registry=registry)
+        histogram.observe(0.02)
+        histogram.observe(0.3)
+        Gauge('test_callback_value', 'Callback gauge', callback=lambda: 7, registry=registry)
+        Counter('test_callback_total', 'Callback counter', callback=lambda: 3, registry=registry)
+
+        text = registry.render()
+
+        assert 'test_events_total{kind="a"} 2' in text
+        assert 'test_latency_seconds_bucket{le="0.05"} 1' in text
+        assert 'test_latency_seconds_bucket{le="0.5"} 2' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 2' in text
+        assert 'test_latency_seconds_count 2' in text
+        assert 'test_latency_seconds_sum 0.32' in text
+        assert 'test_callback_value 7' in text
+        assert 'test_callback_total 3' in text
+        assert '# TYPE test_latency_seconds histogram' in text
+        assert '# TYPE test_callback_total counter' in text
+        assert 'test_' not in REGISTRY.render()
+        print("✅ Test 1 PASSED: Metrics rendered in Prometheus format")
+
+    def test_labels_are_validated(self):
+        """
+        Test Case 2: Label Validation
+
+        Purpose: Verify a metric rejects label sets it was not declared with
+        Input: Counter declared with 'kind', incremented with 'other'
+        Expected Output: ValueError
+        Tests: Cardinality safety
+        """
+        counter = Counter('test_labelled_total', 'Test', ['kind'], registry=Registry())
+
+        with pytest.raises(ValueError):
+            counter.inc(other='x')
+        print("✅ Test 2 PASSED: Unknown labels rejected")
+
+    def test_metrics_endpoint_reports_route_latency(self, client):
+        """
+        Test Case 3: /metrics Endpoint
+
+        Purpose: Verify requests are timed per route pattern and exposed at /metrics
+        Input: GET /api/health, then GET /metrics
+        Expected Output: Latency series for route /api/health labelled with the worker pid; DB pool metrics
+        Tests: Request instrumentation
+        """
+        client.get('/api/health')
+        response = client.get('/metrics')
+        text = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        assert (f'mooddj_http_request_duration_seconds_count{{method="GET",route="/api/health",'
+                f'status="200",worker="{os.getpid()}"}}') in text
+        assert 'mooddj_db_pool_in_use' in text
+        assert '# TYPE mooddj_db_pool_timeouts_total counter' in text
+        print("✅ Test 3 PASSED: /metrics exposes route latency")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,85 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.migrations import list_migrations, split_statements, migrate
+
+
+class TestMigrations:
+    """Unit tests for Schema Migrations module"""
+
+    def test_migration_files_are_ordered_and_parse(self):
+        """
+        Test Case 1: Migration Files
+
+        Purpose: Verify every shipped migration is numbered uniquely and splits into statements
+        Input: backend/migrations
+        Expected Output: Versions 1..N in order, each with at least one statement
+        Tests: Migration file conventions
+        """
+        migrations = list_migrations()
+
+        assert [m['version'] for m in migrations] == list(range(1, len(migrations) + 1))
+        for migration in migrations:
+            with open(migration['path']) as f:
+                statements = split_statements(f.read())
+            assert statements
+            assert not any(s.lstrip().startswith('--') for s in statements)
+        print("✅ Test 1 PASSED: Migration files ordered and parseable")
+
+    def test_split_statements(self):
+        """
+        Test Case 2: Statement Splitting
+
+        Purpose: Verify comments are dropped and multi-line statements are kept whole
+        Input: Two statements with comments between them
+        Expected Output: Two statements without trailing semicolons
+        Tests: SQL file parsing
+        """
+        sql = """
+            -- header comment
+            CREATE TABLE t (
+                id INT  -- inline comments stay
+            );
+
+            -- second
+            INSERT INTO t VALUES (1);
+        """
+        statements = split_statements(sql)
+
+        assert len(statements) == 2
+        assert statements[0].startswith('CREATE TABLE t (')
+        assert statements[1] == 'INSERT INTO t VALUES (1)'
+        print("✅ Test 2 PASSED: Statements split correctly")
+
+    @patch('config.migrations.execute_query')
+    def test_migrate_applies_only_pending(self, mock_query, tmp_path):
+        """
+        Test Case 3: Pending Migrations
+
+        Purpose: Verify already-applied versions are skipped and new ones recorded
+        Input: Versions 001 and 002 on disk, 001 already applied
+        Expected Output: Only 002's statements run, then 002 is recorded
+        Tests: Versioned migration runner
+        """
+        (tmp_path / '001_first.sql').write_text("CREATE TABLE a (id INT);\n")
+        (tmp_path / '002_second.sql').write_text("CREATE TABLE b (id INT);\nCREATE TABLE c (id INT);\n")
+        mock_query.side_effect = lambda query, params=None, fetch=False: (
+            [{'version': 1}] if fetch else None
+        )
+
+        applied = migrate(directory=str(tmp_path))
+
+        assert [m['version'] for m in applied] == [2]
+        executed = [c.args[0] for c in mock_query.call_args_list]
+        assert 'CREATE TABLE b (id INT)' in executed
+        assert 'CREATE TABLE a (id INT)' not in executed
+        assert mock_query.call_args_list[-1].args[1] == (2, 'second')
+        print("✅ Test 3 PASSED: Only pending migrations applied")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,109 @@
+import pytest
+import sys
+import os
+import itertools
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.mood_classifier import classify_moods, classify_mood, reclassify_user_songs
+from services.mood_config import DEFAULT_MOOD_PARAMS as MOOD_PARAMS
+
+
+def reference_mood(valence, energy, tempo):
+    """Original per-song loop the vectorized classifier must match"""
+    if valence is None or energy is None or tempo is None:
+        return 'neutral'
+    best_mood, best_score = 'neutral', 0
+    for mood_name, params in MOOD_PARAMS.items():
+        score = sum([
+            params['valence'][0] <= valence <= params['valence'][1],
+            params['energy'][0] <= energy <= params['energy'][1],
+            params['tempo'][0] <= tempo <= params['tempo'][1]
+        ])
+        if score > best_score:
+            best_score, best_mood = score, mood_name
+    return best_mood
+
+
+class TestMoodClassifier:
+    """Unit tests for Mood Classifier module"""
+
+    def test_batch_matches_reference_loop(self):
+        """
+        Test Case 1: Batch Matches Per-Song Loop
+
+        Purpose: Verify vectorized labels equal the per-song loop, including ties
+        Input: Grid of valence/energy/tempo values covering every range boundary
+        Expected Output: Identical mood for every song
+        Tests: Tie-breaking and boundary semantics
+        """
+        valences = [0.0, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.9, 1.0]
+        energies = [0.0, 0.3, 0.5, 0.6, 0.7, 1.0]
+        tempos = [60, 70, 100, 120, 140, 180, 200]
+        grid = list(itertools.product(valences, energies, tempos))
+
+        moods = classify_moods(*zip(*grid), mood_params=MOOD_PARAMS)
+
+        assert len(moods) == len(grid)
+        assert list(moods) == [reference_mood(*song) for song in grid]
+        print(f"✅ Test 1 PASSED: {len(grid)} songs match the reference loop")
+
+    def test_missing_features_are_neutral(self):
+        """
+        Test Case 2: Missing Features
+
+        Purpose: Verify songs with NULL features fall back to neutral
+        Input: Batch with a None tempo and a None valence
+        Expected Output: 'neutral' for incomplete songs, normal label otherwise
+        Tests: NULL handling
+        """
+        moods = classify_moods([0.8, None, 0.2], [0.7, 0.8, 0.8], [130, 150, None], MOOD_PARAMS)
+
+        assert list(moods) == ['happy', 'neutral', 'neutral']
+        assert classify_mood(0.2, 0.8, None) == 'neutral'
+        print("✅ Test 2 PASSED: Missing features classified as neutral")
+
+    @patch('services.mood_config.execute_query')
+    @patch('services.mood_classifier.transaction')
+    @patch('services.mood_classifier.execute_query')
+    def test_reclassify_updates_changed_rows(self, mock_query, mock_transaction, mock_moods_query):
+        """
+        Test Case 3: Bulk Reclassification
+
+        Purpose: Verify only rows whose mood changed are updated, one UPDATE per mood
+        Input: Two user_songs rows, one already correct
+        Expected Output: Single UPDATE for the changed row
+        Tests: Maintenance reclassification
+        """
+        mock_moods_query.return_value = [
+            {
+                'mood_id': mood_id, 'mood_name': name,
+                **{f'target_{feature}_{bound}': MOOD_PARAMS[name][feature][i]
+                   for feature in ('valence', 'energy', 'tempo')
+                   for i, bound in enumerate(('min', 'max'))}
+            }
+            for mood_id, name in [(1, 'happy'), (5, 'neutral'), (6, 'angry')]
+        ]
+        mock_query.side_effect = [
+            [
+                {'user_song_id': 10, 'mood_id': 1, 'valence': 0.8, 'energy': 0.7, 'tempo': 130},
+                {'user_song_id': 11, 'mood_id': 1, 'valence': 0.2, 'energy': 0.8, 'tempo': 150}
+            ],
+            []
+        ]
+        tx = MagicMock()
+        mock_transaction.return_value.__enter__.return_value = tx
+
+        result = reclassify_user_songs(batch_size=2)
+
+        assert result == {'scanned': 2, 'updated': 1}
+        assert tx.execute.call_count == 1
+        update_call = tx.execute.call_args
+        assert update_call[0][0].startswith('UPDATE user_songs')
+        assert update_call[0][1] == (6, 11)
+        print("✅ Test 3 PASSED: Changed rows reclassified")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,107 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.mood_config import MoodRegistry, DEFAULT_MOOD_PARAMS
+
+
+MOOD_ROWS = [
+    {
+        'mood_id': 1, 'mood_name': 'happy',
+        'target_valence_min': 0.6000000238418579, 'target_valence_max': 1.0,
+        'target_energy_min': 0.5, 'target_energy_max': 1.0,
+        'target_tempo_min': 100.0, 'target_tempo_max': 180.0
+    },
+    {
+        'mood_id': 2, 'mood_name': 'sad',
+        'target_valence_min': 0.0, 'target_valence_max': 0.4,
+        'target_energy_min': 0.2, 'target_energy_max': 0.5,
+        'target_tempo_min': 60.0, 'target_tempo_max': 100.0
+    }
+]
+
+
+class TestMoodConfig:
+    """Unit tests for Mood Config Registry module"""
+
+    @patch('services.mood_config.execute_query')
+    def test_loads_moods_once(self, mock_query):
+        """
+        Test Case 1: Single Load
+
+        Purpose: Verify the moods table is read once and cached
+        Input: Several get_mood_id/get_range calls within the TTL
+        Expected Output: One database query, ids and ranges from the table
+        Tests: In-process caching
+        """
+        mock_query.return_value = MOOD_ROWS
+        registry = MoodRegistry(ttl=300)
+
+        assert registry.get_mood_id('happy') == 1
+        assert registry.get_mood_id('sad') == 2
+        assert registry.get_range('happy')['valence'] == (0.6, 1.0)
+        assert mock_query.call_count == 1
+        print("✅ Test 1 PASSED: Moods loaded once")
+
+    @patch('services.mood_config.execute_query')
+    def test_missing_rows_use_defaults(self, mock_query):
+        """
+        Test Case 2: Defaults for Missing Moods
+
+        Purpose: Verify detector moods absent from the table keep default ranges
+        Input: Table without 'angry'/'neutral'; unknown mood lookup
+        Expected Output: Default ranges; unknown moods fall back to neutral
+        Tests: Fallback behavior
+        """
+        mock_query.return_value = MOOD_ROWS
+        registry = MoodRegistry(ttl=300)
+
+        assert registry.get_range('angry') == DEFAULT_MOOD_PARAMS['angry']
+        assert registry.get_range('bored') == DEFAULT_MOOD_PARAMS['neutral']
+        assert list(registry.get_params()) == ['happy', 'angry', 'neutral']
+        print("✅ Test 2 PASSED: Defaults used for missing moods")
+
+    @patch('services.mood_config.execute_query')
+    def test_invalidate_reloads(self, mock_query):
+        """
+        Test Case 3: Invalidate
+
+        Purpose: Verify invalidate() forces a reload on next access
+        Input: get_mood_id, invalidate, get_mood_id
+        Expected Output: Two database queries
+        Tests: Change signal
+        """
+        mock_query.return_value = MOOD_ROWS
+        registry = MoodRegistry(ttl=300)
+
+        registry.get_mood_id('happy')
+        registry.invalidate()
+        registry.get_mood_id('happy')
+
+        assert mock_query.call_count == 2
+        print("✅ Test 3 PASSED: Invalidate reloads moods")
+
+    @patch('services.mood_config.execute_query')
+    def test_database_error_keeps_defaults(self, mock_query):
+        """
+        Test Case 4: Database Unavailable
+
+        Purpose: Verify a failed load keeps serving defaults without retrying every call
+        Input: execute_query raising an error
+        Expected Output: Default ranges, no mood ids, one query attempt
+        Tests: Error handling
+        """
+        mock_query.side_effect = Exception('db down')
+        registry = MoodRegistry(ttl=300)
+
+        assert registry.get_params() == DEFAULT_MOOD_PARAMS
+        assert registry.get_mood_id('happy') is None
+        assert mock_query.call_count == 1
+        print("✅ Test 4 PASSED: Database error handled")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
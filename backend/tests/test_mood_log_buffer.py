@@ -0,0 +1,232 @@
+import pytest
+import sys
+import os
+import time
+from datetime import datetime, date, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.mood_log_buffer import MoodLogBuffer, parse_event
+from services.mood_stats import aggregate_events
+
+
+class TestMoodLogBuffer:
+    """Unit tests for MoodLogBuffer module"""
+
+    @pytest.fixture
+    def tx(self):
+        """Mock transaction() yielding a recording unit of work"""
+        tx = MagicMock()
+        with patch('services.mood_log_buffer.transaction') as mock_transaction:
+            mock_transaction.return_value.__enter__.return_value = tx
+            yield tx
+
+    def test_flush_writes_multi_row_batches(self, tx):
+        """
+        Test Case 1: Batched Flush
+
+        Purpose: Verify buffered events are written as multi-row inserts of batch_size
+        Input: 5 events, batch_size=2, explicit flush()
+        Expected Output: 3 executemany calls covering all 5 events
+        Tests: Write-behind batching
+        """
+        buffer = MoodLogBuffer(batch_size=2, flush_interval=60, max_size=100)
+        buffer._ensure_started = lambda: None  # flush manually
+        for i in range(5):
+            assert buffer.log(1, 'happy', 0.5 + i / 10)
+
+        written = buffer.flush()
+
+        inserts = [call for call in tx.executemany.call_args_list if 'mood_sessions' in call[0][0]]
+        assert written == 5
+        assert len(inserts) == 3
+        assert [len(call[0][1]) for call in inserts] == [2, 2, 1]
+        assert buffer.pending() == 0
+        print("✅ Test 1 PASSED: Events flushed in batches")
+
+    def test_background_flush_on_interval(self, tx):
+        """
+        Test Case 2: Time-Based Flush
+
+        Purpose: Verify the flusher thread writes a partial batch after flush_interval
+        Input: 1 event, flush_interval=0.05s
+        Expected Output: Event written without calling flush()
+        Tests: Background flusher
+        """
+        buffer = MoodLogBuffer(batch_size=100, flush_interval=0.05, max_size=100)
+        buffer.log(1, 'neutral', 0.9)
+
+        deadline = time.monotonic() + 2
+        while buffer.written == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        buffer.shutdown()
+
+        assert buffer.written == 1
+        assert tx.executemany.call_args_list[0][0][1][0][:3] == (1, 'neutral', 0.9)
+        print("✅ Test 2 PASSED: Flushed on interval")
+
+    def test_backpressure_when_full(self, tx):
+        """
+        Test Case 3: Backpressure
+
+        Purpose: Verify log() rejects events once the buffer is full
+        Input: max_size=2, three events with no flusher
+        Expected Output: Third log() returns False and is counted as rejected
+        Tests: Bounded buffer
+        """
+        buffer = MoodLogBuffer(batch_size=10, flush_interval=60, max_size=2, put_timeout=0.01)
+        buffer._ensure_started = lambda: None
+
+        assert buffer.log(1, 'happy', 1.0)
+        assert buffer.log(1, 'happy', 1.0)
+        assert buffer.log(1, 'happy', 1.0) is False
+        assert buffer.stats()['rejected'] == 1
+        print("✅ Test 3 PASSED: Backpressure applied when full")
+
+    def test_failed_write_is_requeued(self, tx):
+        """
+        Test Case 4: Failed Flush
+
+        Purpose: Verify events survive a failed write and are drained on shutdown
+        Input: First executemany raises, then succeeds
+        Expected Output: Events re-queued, written by shutdown()
+        Tests: Error handling and clean drain
+        """
+        tx.executemany.side_effect = [Exception('db down'), None, None, None]
+        buffer = MoodLogBuffer(batch_size=10, flush_interval=60, max_size=10)
+        buffer._ensure_started = lambda: None
+        buffer.log(1, 'angry', 0.7)
+        buffer.log(1, 'angry', 0.8)
+
+        assert buffer.flush() == 0
+        assert buffer.pending() == 2
+
+        buffer.shutdown()
+        assert buffer.written == 2
+        assert buffer.pending() == 0
+        print("✅ Test 4 PASSED: Failed batch re-queued and drained")
+
+
+    def test_rollups_updated_with_events(self, tx):
+        """
+        Test Case 5: Rollups Updated on Write
+
+        Purpose: Verify each flushed batch also upserts hourly and daily rollups
+        Input: Three events for one user across two hours of the same day
+        Expected Output: Two hourly rows and one daily row with summed counts
+        Tests: Incremental stats maintenance
+        """
+        buffer = MoodLogBuffer(batch_size=10, flush_interval=60, max_size=10)
+        buffer._ensure_started = lambda: None
+        buffer.log(1, 'happy', 0.5, datetime(2025, 1, 1, 10, 5))
+        buffer.log(1, 'happy', 0.7, datetime(2025, 1, 1, 10, 55))
+        buffer.log(1, 'happy', 0.9, datetime(2025, 1, 1, 11, 0))
+
+        buffer.flush()
+
+        calls = {('hourly' if 'hourly' in c[0][0] else 'daily' if 'daily' in c[0][0] else 'raw'): c[0][1]
+                 for c in tx.executemany.call_args_list}
+        assert sorted(row[3] for row in calls['hourly']) == [1, 2]
+        assert calls['daily'] == [(1, date(2025, 1, 1), 'happy', 3, 3, pytest.approx(2.1))]
+        print("✅ Test 5 PASSED: Rollups updated with events")
+
+    def test_event_validation(self):
+        """
+        Test Case 6: Event Validation
+
+        Purpose: Verify events are coerced to column types and bad ones rejected
+        Input: String user_id/confidence, then bad confidence, empty and over-long moods
+        Expected Output: (7, 'happy', 0.5); ValueError for each bad event
+        Tests: parse_event()
+        """
+        assert parse_event('7', ' happy ', '0.5') == (7, 'happy', 0.5)
+
+        for user_id, mood, confidence in ((1, 'happy', 'high'), (1, 'happy', float('nan')),
+                                          (1, 'happy', -0.1), (1, 'happy', True), (1, '', 0.5),
+                                          (1, 'x' * 51, 0.5), (1, ['happy'], 0.5), ('me', 'happy', 0.5)):
+            with pytest.raises(ValueError):
+                parse_event(user_id, mood, confidence)
+        print("✅ Test 6 PASSED: Events validated")
+
+    def test_failing_row_dead_lettered(self, tx):
+        """
+        Test Case 7: Poison Event
+
+        Purpose: Verify an event the database keeps rejecting stops blocking the others
+        Input: max_attempts=2; every insert containing the 'bad' event fails
+        Expected Output: Good events written row by row, the bad one dead-lettered, buffer empty
+        Tests: Bounded retries and dead-lettering
+        """
+        def executemany(query, rows):
+            if 'mood_sessions' in query and any(row[1] == 'bad' for row in rows):
+                raise Exception('Data too long')
+        tx.executemany.side_effect = executemany
+
+        buffer = MoodLogBuffer(batch_size=10, flush_interval=60, max_size=10, max_attempts=2)
+        buffer._ensure_started = lambda: None
+        buffer.log(1, 'happy', 0.5)
+        buffer.log(1, 'bad', 0.5)
+        buffer.log(1, 'sad', 0.5)
+
+        assert buffer.flush() == 0  # first failure: re-queued
+        assert buffer.flush() == 2  # second failure: written row by row
+
+        assert buffer.pending() == 0
+        assert buffer.written == 2
+        assert [event[1] for event, _ in buffer.dead_letters] == ['bad']
+        assert buffer.stats()['dead_lettered'] == 1
+        print("✅ Test 7 PASSED: Poison event dead-lettered")
+
+    def test_rollups_skip_null_confidence_and_normalize_timezones(self):
+        """
+        Test Case 8: Rollup Averages and Time Zones
+
+        Purpose: Verify NULL confidences do not skew the average and aware timestamps land in UTC buckets
+        Input: 0.5 and NULL at 10:00 UTC, 0.9 at 12:30+02:00 (10:30 UTC)
+        Expected Output: One hourly bucket at 10:00 with 3 events, 2 confidences summing to 1.4
+        Tests: aggregate_events()
+        """
+        plus_two = timezone(timedelta(hours=2))
+        hourly, daily = aggregate_events([
+            (1, 'calm', 0.5, datetime(2025, 1, 1, 10, 0)),
+            (1, 'calm', None, datetime(2025, 1, 1, 10, 5)),
+            (1, 'calm', 0.9, datetime(2025, 1, 1, 12, 30, tzinfo=plus_two))
+        ])
+
+        assert hourly == [(1, datetime(2025, 1, 1, 10, 0), 'calm', 3, 2, pytest.approx(1.4))]
+        assert daily == [(1, date(2025, 1, 1), 'calm', 3, 2, pytest.approx(1.4))]
+        print("✅ Test 8 PASSED: NULL confidences and time zones handled")
+
+    def test_default_timestamp_is_utc(self):
+        """
+        Test Case 9: Default Timestamp
+
+        Purpose: Verify events logged without a timestamp are stamped in naive UTC on a non-UTC host
+        Input: TZ=Asia/Kolkata (UTC+05:30), log() without a timestamp
+        Expected Output: Queued timestamp naive and within seconds of the current UTC time
+        Tests: Naive-UTC convention
+        """
+        original_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'Asia/Kolkata'
+        time.tzset()
+        try:
+            buffer = MoodLogBuffer(flush_interval=60, max_size=10)
+            buffer._ensure_started = lambda: None
+            buffer.log(1, 'happy', 0.8)
+            (_, _, _, timestamp), _ = buffer._queue.get_nowait()
+        finally:
+            if original_tz is None:
+                os.environ.pop('TZ', None)
+            else:
+                os.environ['TZ'] = original_tz
+            time.tzset()
+
+        assert timestamp.tzinfo is None
+        utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+        assert abs((utc_now - timestamp).total_seconds()) < 60
+        print("✅ Test 9 PASSED: Default timestamps are naive UTC")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
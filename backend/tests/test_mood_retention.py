@@ -0,0 +1,146 @@
+import pytest
+import sys
+import os
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import mood_retention
+
+
+def _ts(year, month):
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+PARTITION_ROWS = [
+    {'name': 'p_archive', 'description': str(_ts(2026, 1))},
+    {'name': 'p202601', 'description': str(_ts(2026, 2))},
+    {'name': 'p202602', 'description': str(_ts(2026, 3))},
+    {'name': 'p202603', 'description': str(_ts(2026, 4))},
+    {'name': 'p_future', 'description': 'MAXVALUE'}
+]
+
+
+class TestMoodRetention:
+    """Unit tests for Mood Retention Service module"""
+
+    @patch('services.mood_retention.execute_query')
+    def test_creates_future_partitions(self, mock_query):
+        """
+        Test Case 1: Future Partitions
+
+        Purpose: Verify monthly partitions are split off p_future up to the horizon
+        Input: Partitions through March 2026, now = Apr 2026, 2 months ahead
+        Expected Output: p202604..p202606 created via REORGANIZE PARTITION
+        Tests: Partition maintenance
+        """
+        mock_query.return_value = PARTITION_ROWS
+
+        created = mood_retention.ensure_future_partitions(months_ahead=2, now=datetime(2026, 4, 10))
+
+        assert created == ['p202604', 'p202605', 'p202606']
+        alters = [c.args[0] for c in mock_query.call_args_list if 'REORGANIZE' in c.args[0]]
+        assert len(alters) == 3
+        assert "UNIX_TIMESTAMP('2026-05-01 00:00:00')" in alters[0]
+        print("✅ Test 1 PASSED: Future partitions created")
+
+    @patch('services.mood_retention.execute_query')
+    def test_drops_only_expired_partitions(self, mock_query):
+        """
+        Test Case 2: Expired Partitions
+
+        Purpose: Verify only partitions entirely older than the cutoff are dropped
+        Input: Cutoff falls inside p202602
+        Expected Output: p_archive and p202601 dropped; p202602 kept
+        Tests: Retention
+        """
+        mock_query.return_value = PARTITION_ROWS
+
+        now = _ts(2026, 2) + 20 * 86400 + 30 * 86400  # cutoff = Feb 21 with 30 days retention
+        dropped = mood_retention.drop_expired_partitions(retention_days=30, now=now)
+
+        assert dropped == ['p_archive', 'p202601']
+        drops = [c.args[0] for c in mock_query.call_args_list if 'DROP PARTITION' in c.args[0]]
+        assert len(drops) == 2
+        print("✅ Test 2 PASSED: Expired partitions dropped")
+
+    @patch('services.mood_retention.execute_query')
+    def test_unpartitioned_table_is_left_alone(self, mock_query):
+        """
+        Test Case 3: Unpartitioned Table
+
+        Purpose: Verify the job does nothing before migration 002 is applied
+        Input: INFORMATION_SCHEMA returns no partitions
+        Expected Output: No ALTER statements, empty result
+        Tests: Safety
+        """
+        mock_query.return_value = []
+
+        result = mood_retention.run_retention(retention_days=30)
+
+        assert result == {'created': [], 'dropped': []}
+        assert mock_query.call_count == 1
+        print("✅ Test 3 PASSED: Unpartitioned table untouched")
+
+    @patch('services.mood_retention.execute_query')
+    def test_unnamed_bound_read_as_utc(self, mock_query):
+        """
+        Test Case 3b: Partition Bound Time Zone
+
+        Purpose: Verify a bound without a pYYYYMM name is read as UTC, not host local time
+        Input: Only p_start (< 2026-03-01 UTC) and p_future; TZ=America/New_York; now = Mar 2026
+        Expected Output: p202603 created first (local time would give p202602)
+        Tests: Naive-UTC convention
+        """
+        mock_query.return_value = [
+            {'name': 'p_start', 'description': str(_ts(2026, 3))},
+            {'name': 'p_future', 'description': 'MAXVALUE'}
+        ]
+        original_tz = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            created = mood_retention.ensure_future_partitions(months_ahead=0, now=datetime(2026, 3, 10))
+        finally:
+            if original_tz is None:
+                os.environ.pop('TZ', None)
+            else:
+                os.environ['TZ'] = original_tz
+            time.tzset()
+
+        assert created == ['p202603']
+        print("✅ Test 3b PASSED: Partition bounds read as UTC")
+
+    def test_consecutive_runs_keep_earlier_rollups(self):
+        """
+        Test Case 4: Rollups Survive Repeated Retention
+
+        Purpose: Verify a later monthly run never deletes rollups of months dropped earlier
+        Input: Retention run in March (drops p_archive, p202601), then in April (drops p202602)
+        Expected Output: Each month dropped once; no statement touches the rollup tables
+        Tests: Rollup safety across runs
+        """
+        partitions = list(PARTITION_ROWS)
+        statements = []
+
+        def execute_query(query, params=None, fetch=False):
+            statements.append(query)
+            if fetch:
+                return list(partitions)
+            name = query.rsplit('DROP PARTITION', 1)[-1].strip()
+            partitions[:] = [p for p in partitions if p['name'] != name]
+
+        with patch('services.mood_retention.execute_query', side_effect=execute_query):
+            march = mood_retention.drop_expired_partitions(retention_days=30, now=_ts(2026, 3) + 15 * 86400)
+            april = mood_retention.drop_expired_partitions(retention_days=30, now=_ts(2026, 4) + 15 * 86400)
+
+        assert march == ['p_archive', 'p202601']
+        assert april == ['p202602']
+        assert not [q for q in statements if 'mood_stats' in q]
+        print("✅ Test 4 PASSED: Earlier months' rollups kept")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -2,6 +2,7 @@ import pytest
 import sys
 import os
 from unittest.mock import Mock, patch
+from datetime import datetime
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -66,18 +67,18 @@ class TestMoodRoutes:
         assert 'error' in response.get_json()
         print("✅ Test 2 PASSED: Missing image handled")
     
-    @patch('routes.mood_routes.execute_query')
-    def test_log_mood_endpoint_success(self, mock_query, client):
+    @patch('routes.mood_routes.mood_log_buffer.log')
+    def test_log_mood_endpoint_success(self, mock_log, client):
         """
         Test Case 3: Log Mood Success
         
-        Purpose: Verify mood logging to database
+        Purpose: Verify mood logging is queued for a batched database write
         Input: POST with mood and confidence data
-        Expected Output: {'success': True, 'session_id': 123}
+        Expected Output: 202 with {'success': True, 'queued': True}
         Tests: Mood persistence functionality
         """
-        # Mock database insert
-        mock_query.return_value = 123  # session_id
+        # Mock buffer accepting the event
+        mock_log.return_value = True
         
         # Execute
         response = client.post('/api/mood/log', json={
@@ -88,11 +89,30 @@ class TestMoodRoutes:
         data = response.get_json()
         
         # Assert
-        assert response.status_code == 201
+        assert response.status_code == 202
         assert data['success'] == True
-        assert data['session_id'] == 123
+        assert data['queued'] == True
+        mock_log.assert_called_once_with(1, 'angry', 0.75)
         print("✅ Test 3 PASSED: Mood logged successfully")
     
+    @patch('routes.mood_routes.mood_log_buffer.log')
+    def test_log_mood_endpoint_backpressure(self, mock_log, client):
+        """
+        Test Case 3b: Log Mood Backpressure
+        
+        Purpose: Verify a full log buffer asks the client to retry
+        Input: POST with mood while the buffer is full
+        Expected Output: 503 with Retry-After header
+        Tests: Write-behind backpressure
+        """
+        mock_log.return_value = False
+        
+        response = client.post('/api/mood/log', json={'mood': 'happy'})
+        
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        print("✅ Test 3b PASSED: Backpressure applied")
+    
     def test_log_mood_endpoint_missing_mood(self, client):
         """
         Test Case 4: Log Mood Missing Data
@@ -112,7 +132,30 @@ class TestMoodRoutes:
         assert 'error' in response.get_json()
         print("✅ Test 4 PASSED: Missing mood handled")
     
-    @patch('routes.mood_routes.execute_query')
+    @patch('services.mood_log_buffer.MoodLogBuffer._ensure_started')
+    def test_log_mood_endpoint_invalid_event(self, mock_started, client):
+        """
+        Test Case 4b: Log Mood Invalid Event
+        
+        Purpose: Verify malformed events are rejected before reaching the write buffer
+        Input: Non-numeric confidence, out-of-range confidence, 51-character mood
+        Expected Output: 400 for each, nothing queued
+        Tests: Input validation for logging
+        """
+        from services.mood_log_buffer import mood_log_buffer
+        pending = mood_log_buffer.pending()
+        
+        for payload in ({'mood': 'happy', 'confidence': 'high'},
+                        {'mood': 'happy', 'confidence': 1.5},
+                        {'mood': 'h' * 51, 'confidence': 0.5}):
+            response = client.post('/api/mood/log', json=payload)
+            assert response.status_code == 400
+            assert 'error' in response.get_json()
+        
+        assert mood_log_buffer.pending() == pending
+        print("✅ Test 4b PASSED: Invalid mood events rejected")
+    
+    @patch('services.mood_history.execute_query')
     def test_get_mood_history_endpoint(self, mock_query, client):
         """
         Test Case 5: Get Mood History
@@ -124,8 +167,8 @@ class TestMoodRoutes:
         """
         # Mock database query
         mock_query.return_value = [
-            {'detected_mood': 'happy', 'confidence_score': 0.8, 'timestamp': '2024-01-01'},
-            {'detected_mood': 'neutral', 'confidence_score': 0.6, 'timestamp': '2024-01-02'}
+            {'session_id': 2, 'detected_mood': 'happy', 'confidence_score': 0.8, 'timestamp': datetime(2024, 1, 2)},
+            {'session_id': 1, 'detected_mood': 'neutral', 'confidence_score': 0.6, 'timestamp': datetime(2024, 1, 1)}
         ]
         
         # Execute
@@ -137,22 +180,62 @@ class TestMoodRoutes:
         assert data['success'] == True
         assert len(data['history']) == 2
         assert data['history'][0]['detected_mood'] == 'happy'
+        assert data['next_cursor'] is None
         print("✅ Test 5 PASSED: Mood history retrieved")
     
-    @patch('routes.mood_routes.execute_query')
+    @patch('services.mood_history.execute_query')
+    def test_get_mood_history_keyset_pagination(self, mock_query, client):
+        """
+        Test Case 5b: Keyset Pagination
+        
+        Purpose: Verify pages continue from the cursor of the previous page
+        Input: limit=1 with two rows available, then the returned cursor
+        Expected Output: next_cursor on page 1; page 2 query bounded by (timestamp, session_id)
+        Tests: Cursor-based pagination
+        """
+        mock_query.return_value = [
+            {'session_id': 9, 'detected_mood': 'happy', 'confidence_score': 0.8, 'timestamp': datetime(2024, 1, 2, 12)},
+            {'session_id': 8, 'detected_mood': 'angry', 'confidence_score': 0.7, 'timestamp': datetime(2024, 1, 2, 11)}
+        ]
+        
+        first = client.get('/api/mood/history?user_id=1&limit=1').get_json()
+        client.get(f"/api/mood/history?user_id=1&limit=1&cursor={first['next_cursor']}")
+        query, params = mock_query.call_args[0][:2]
+        
+        assert len(first['history']) == 1
+        assert first['next_cursor']
+        assert 'session_id < %s' in query
+        assert params == ('1', datetime(2024, 1, 2, 12), datetime(2024, 1, 2, 12), 9, 2)
+        print("✅ Test 5b PASSED: History paginated by cursor")
+    
+    def test_get_mood_history_invalid_params(self, client):
+        """
+        Test Case 5c: History Parameter Validation
+        
+        Purpose: Verify limit and cursor are validated before reaching SQL
+        Input: limit=abc, limit=100000, cursor=garbage
+        Expected Output: 400 for each
+        Tests: Input validation
+        """
+        for query in ('limit=abc', 'limit=100000', 'cursor=garbage'):
+            response = client.get(f'/api/mood/history?{query}')
+            assert response.status_code == 400
+        print("✅ Test 5c PASSED: Invalid history params rejected")
+    
+    @patch('services.mood_stats.execute_query')
     def test_get_mood_stats_endpoint(self, mock_query, client):
         """
         Test Case 6: Get Mood Statistics
         
-        Purpose: Verify mood statistics aggregation
+        Purpose: Verify mood statistics are read from the daily rollup
         Input: GET /api/mood/stats?user_id=1
         Expected Output: Aggregated mood counts and averages
         Tests: Statistics calculation
         """
-        # Mock database query
+        # Mock rollup query
         mock_query.return_value = [
-            {'detected_mood': 'happy', 'count': 10, 'avg_confidence': 0.85},
-            {'detected_mood': 'angry', 'count': 3, 'avg_confidence': 0.75}
+            {'detected_mood': 'happy', 'count': 10, 'confidence_count': 10, 'confidence_sum': 8.5},
+            {'detected_mood': 'angry', 'count': 3, 'confidence_count': 2, 'confidence_sum': 1.5}
         ]
         
         # Execute
@@ -163,8 +246,62 @@ class TestMoodRoutes:
         assert response.status_code == 200
         assert data['success'] == True
         assert len(data['stats']) == 2
+        assert data['stats'][0]['count'] == 10
+        assert data['stats'][0]['avg_confidence'] == pytest.approx(0.85)
+        assert data['stats'][1]['avg_confidence'] == pytest.approx(0.75)  # NULL confidence skipped
+        assert 'mood_stats_daily' in mock_query.call_args[0][0]
         print("✅ Test 6 PASSED: Mood stats retrieved")
     
+    @patch('services.mood_stats.execute_query')
+    def test_get_mood_stats_time_range(self, mock_query, client):
+        """
+        Test Case 6b: Mood Statistics for a Time Range
+        
+        Purpose: Verify since/until read the hourly rollup and bad timestamps are rejected
+        Input: GET /api/mood/stats?since=...&until=... (until with a +02:00 offset), then an invalid since
+        Expected Output: Hourly rollup query with naive UTC bounds; 400 for invalid input
+        Tests: Time-range statistics
+        """
+        mock_query.return_value = []
+        
+        response = client.get('/api/mood/stats?user_id=1&since=2025-01-01T10:30:00'
+                              '&until=2025-01-02T02:00:00%2B02:00')
+        query, params = mock_query.call_args[0][:2]
+        bad = client.get('/api/mood/stats?since=yesterday')
+        
+        assert response.status_code == 200
+        assert 'mood_stats_hourly' in query
+        assert params[1] == datetime(2025, 1, 1, 10, 0)
+        assert params[2] == datetime(2025, 1, 2, 0, 0)
+        assert bad.status_code == 400
+        print("✅ Test 6b PASSED: Time-ranged stats retrieved")
+    
+    @patch('services.export_service.stream_query')
+    def test_export_mood_history_endpoint(self, mock_stream, client):
+        """
+        Test Case 6c: Export Mood History
+        
+        Purpose: Verify history export streams CSV and rejects unknown formats
+        Input: GET /api/mood/export?format=csv, then format=xml
+        Expected Output: CSV attachment with header and rows; 400 for xml
+        Tests: Streaming export endpoint
+        """
+        mock_stream.return_value = iter([[
+            {'session_id': 1, 'detected_mood': 'happy', 'confidence_score': 0.9, 'timestamp': datetime(2024, 1, 1)}
+        ]])
+        
+        response = client.get('/api/mood/export?user_id=1&format=csv')
+        body = response.get_data(as_text=True)
+        bad = client.get('/api/mood/export?format=xml')
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert 'attachment' in response.headers['Content-Disposition']
+        assert body.splitlines()[0] == 'session_id,detected_mood,confidence_score,timestamp'
+        assert 'happy' in body
+        assert bad.status_code == 400
+        print("✅ Test 6c PASSED: Mood history exported")
+    
     @patch('routes.mood_routes.mood_detector.reset')
     def test_reset_detector_endpoint(self, mock_reset, client):
         """
@@ -27,6 +27,7 @@ class TestMusicRoutes:
                 'expires_at': 9999999999
             }
             sess['user_id'] = 'test_user'
+            sess['db_user_id'] = 1
         return client
     
     @patch('routes.music_routes.spotify_service.get_songs_for_mood')
@@ -217,6 +218,86 @@ class TestMusicRoutes:
         assert data['total_processed'] == 25
         print("✅ Test 7 PASSED: Library synced")
 
+    @patch('routes.music_routes.spotify_service.get_songs_for_mood')
+    def test_queue_start_and_next_endpoint(self, mock_get_songs, authenticated_session):
+        """
+        Test Case 8: Playback Queue Start and Next
+        
+        Purpose: Verify the server-side queue serves prefetched tracks
+        Input: POST /api/music/queue/start with mood='happy', then POST /api/music/queue/next
+        Expected Output: Next track popped from the prefetched queue
+        Tests: Playback queue endpoints
+        """
+        # Mock song recommendations
+        mock_get_songs.return_value = [
+            {'spotify_song_id': 'track1', 'title': 'Happy Song'},
+            {'spotify_song_id': 'track2', 'title': 'Joyful Tune'}
+        ]
+        
+        # Execute
+        start = authenticated_session.post('/api/music/queue/start', json={'mood': 'happy'})
+        response = authenticated_session.post('/api/music/queue/next')
+        data = response.get_json()
+        
+        # Assert
+        assert start.status_code == 200
+        assert start.get_json()['queued'] == 2
+        assert response.status_code == 200
+        assert data['success'] == True
+        assert data['track']['spotify_song_id'] == 'track1'
+        print("✅ Test 8 PASSED: Playback queue served next track")
+
+    @patch('services.orphan_gc.orphan_collector.request')
+    @patch('config.database.execute_query')
+    def test_reset_library_defers_orphan_cleanup(self, mock_query, mock_gc_request, authenticated_session):
+        """
+        Test Case 9: Reset Library
+        
+        Purpose: Verify reset only unlinks the user's songs and leaves orphans to the collector
+        Input: POST /api/music/reset
+        Expected Output: One indexed user_songs delete, background cleanup requested
+        Tests: Reset without a global anti-join in the request
+        """
+        # Execute
+        response = authenticated_session.post('/api/music/reset')
+        data = response.get_json()
+        
+        # Assert
+        assert response.status_code == 200
+        assert data['success'] == True
+        assert mock_query.call_count == 1
+        assert mock_query.call_args[0] == ("DELETE FROM user_songs WHERE user_id = %s", (1,))
+        mock_gc_request.assert_called_once()
+        print("✅ Test 9 PASSED: Reset unlinked songs and scheduled cleanup")
+
+    @patch('routes.music_routes.spotify_service.pause_playback')
+    @patch('routes.music_routes.spotify_service.refresh_access_token')
+    def test_expired_token_refreshed_and_saved(self, mock_refresh, mock_pause, client):
+        """
+        Test Case 10: Token Refresh Write-Back
+        
+        Purpose: Verify an expired session token is refreshed once and the new token saved
+        Input: Two POST /api/music/pause calls with an expired token in the session
+        Expected Output: One refresh; session holds the refreshed token
+        Tests: Shared token refresh
+        """
+        with client.session_transaction() as sess:
+            sess['spotify_token_info'] = {'access_token': 'expired', 'refresh_token': 'r', 'expires_at': 1}
+            sess['user_id'] = 'refresh_test_user'
+        mock_refresh.return_value = {'access_token': 'fresh', 'refresh_token': 'r', 'expires_at': 9999999999}
+        mock_pause.return_value = {'success': True}
+        
+        # Execute
+        client.post('/api/music/pause', json={})
+        response = client.post('/api/music/pause', json={})
+        
+        # Assert
+        assert response.status_code == 200
+        assert mock_refresh.call_count == 1
+        with client.session_transaction() as sess:
+            assert sess['spotify_token_info']['access_token'] == 'fresh'
+        print("✅ Test 10 PASSED: Refreshed token written back to session")
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.orphan_gc import collect_orphan_songs
+
+
+class TestOrphanGC:
+    """Unit tests for Orphan Song Collector module"""
+
+    @patch('services.orphan_gc.transaction')
+    @patch('services.orphan_gc.execute_query')
+    def test_deletes_orphans_in_chunks(self, mock_query, mock_transaction):
+        """
+        Test Case 1: Chunked Deletes
+
+        Purpose: Verify orphans are found by keyset and deleted one chunk per transaction
+        Input: 3 orphaned songs, batch_size=2
+        Expected Output: Two chunks, the second continuing after the last song_id
+        Tests: Batched anti-join cleanup
+        """
+        mock_query.side_effect = [
+            [{'song_id': 3}, {'song_id': 8}],
+            [{'song_id': 12}]
+        ]
+        tx = MagicMock()
+        tx.rowcount = 2
+        mock_transaction.return_value.__enter__.return_value = tx
+
+        deleted = collect_orphan_songs(batch_size=2)
+
+        assert mock_query.call_count == 2
+        assert mock_query.call_args_list[1][0][1] == (8, 2)
+        assert mock_transaction.call_count == 2
+        assert tx.execute.call_args_list[0][0][1] == (3, 8)
+        assert 'us.song_id IS NULL' in tx.execute.call_args_list[0][0][0]
+        assert deleted == 4
+        print("✅ Test 1 PASSED: Orphans deleted in chunks")
+
+    @patch('services.orphan_gc.transaction')
+    @patch('services.orphan_gc.execute_query')
+    def test_no_orphans(self, mock_query, mock_transaction):
+        """
+        Test Case 2: Nothing to Collect
+
+        Purpose: Verify a clean catalogue costs a single query
+        Input: Anti-join returns no rows
+        Expected Output: 0 deleted, no transaction opened
+        Tests: Cheap no-op pass
+        """
+        mock_query.return_value = []
+
+        assert collect_orphan_songs() == 0
+        assert mock_transaction.call_count == 0
+        print("✅ Test 2 PASSED: No orphans, no deletes")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,215 @@
+import pytest
+import sys
+import os
+import time
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.playback_queue import PlaybackQueueManager
+
+
+def make_songs(prefix, count):
+    return [{'spotify_song_id': f'{prefix}{i}', 'title': f'Song {prefix}{i}'} for i in range(count)]
+
+
+def shared_redis():
+    """Dict-backed stand-in for the Redis calls the queue store makes"""
+    store = {}
+
+    def fake_set(key, value, nx=False, px=None, ex=None):
+        if nx and key in store:
+            return None
+        store[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    client = Mock()
+    client.set.side_effect = fake_set
+    client.get.side_effect = store.get
+    client.delete.side_effect = lambda key: store.pop(key, None)
+    return client
+
+
+class TestPlaybackQueue:
+    """Unit tests for PlaybackQueueManager module"""
+
+    @pytest.fixture
+    def spotify_service(self):
+        """Mock SpotifyService returning songs per mood"""
+        service = Mock()
+        service.get_songs_for_mood.side_effect = lambda mood, limit, user_id: make_songs(mood, limit)
+        return service
+
+    @pytest.fixture
+    def queues(self, spotify_service):
+        """Queue manager that runs background work inline"""
+        manager = PlaybackQueueManager(spotify_service, prefetch_size=5, low_watermark=2)
+        manager._spawn = lambda target, *args: target(*args)
+        return manager
+
+    def test_start_prefetches_tracks(self, queues, spotify_service):
+        """
+        Test Case 1: Prefetch on Start
+
+        Purpose: Verify starting a queue prefetches N tracks for the mood
+        Input: start('u1', 'happy')
+        Expected Output: 5 queued tracks, one database fetch
+        Tests: Initial prefetch
+        """
+        state = queues.start('u1', 'happy', 'u1')
+
+        assert state['mood'] == 'happy'
+        assert state['queued'] == 5
+        assert spotify_service.get_songs_for_mood.call_count == 1
+        print("✅ Test 1 PASSED: Queue prefetched")
+
+    def test_next_track_pops_without_query(self, queues, spotify_service):
+        """
+        Test Case 2: Next Track Pop
+
+        Purpose: Verify next_track pops from the queue without querying
+        Input: start() then next_track() while above the low watermark
+        Expected Output: First prefetched track, no extra fetch
+        Tests: O(1) pop path
+        """
+        queues.start('u1', 'happy', 'u1')
+        track = queues.next_track('u1')
+
+        assert track['spotify_song_id'] == 'happy0'
+        assert spotify_service.get_songs_for_mood.call_count == 1
+        print("✅ Test 2 PASSED: Track popped from queue")
+
+    def test_refill_skips_played_tracks(self, queues):
+        """
+        Test Case 3: Refill Drops Played Tracks
+
+        Purpose: Verify refills never re-queue played or queued tracks
+        Input: Pop until below the low watermark
+        Expected Output: Queue topped up with unique, unplayed tracks
+        Tests: Background refill and de-duplication
+        """
+        queues.start('u1', 'happy', 'u1')
+        played = [queues.next_track('u1')['spotify_song_id'] for _ in range(4)]
+
+        state = queues.get_state('u1', preview=10)
+        upcoming = [t['spotify_song_id'] for t in state['upcoming']]
+
+        assert state['queued'] == 5
+        assert len(set(upcoming)) == len(upcoming)
+        assert not set(upcoming) & set(played)
+        print("✅ Test 3 PASSED: Refill skipped played tracks")
+
+    def test_mood_change_reranks_queue(self, queues):
+        """
+        Test Case 4: Mood Change Re-rank
+
+        Purpose: Verify a mood change replaces the queued tracks
+        Input: start('happy') then set_mood('angry')
+        Expected Output: Queue contains angry tracks only
+        Tests: Background re-rank on mood change
+        """
+        queues.start('u1', 'happy', 'u1')
+
+        assert queues.set_mood('u1', 'angry') is True
+        assert queues.set_mood('u1', 'angry') is False
+
+        state = queues.get_state('u1')
+        assert state['mood'] == 'angry'
+        assert all(t['spotify_song_id'].startswith('angry') for t in state['upcoming'])
+        print("✅ Test 4 PASSED: Queue re-ranked for new mood")
+
+    def test_next_track_unknown_session(self, queues):
+        """
+        Test Case 5: Unknown Session
+
+        Purpose: Verify popping from a missing queue returns None
+        Input: next_track('missing')
+        Expected Output: None
+        Tests: Missing session handling
+        """
+        assert queues.next_track('missing') is None
+        print("✅ Test 5 PASSED: Unknown session handled")
+
+    def test_idle_and_excess_queues_evicted(self, spotify_service):
+        """
+        Test Case 6: Queue Eviction
+
+        Purpose: Verify queues are bounded by count and dropped once idle
+        Input: max_queues=2 with three sessions; then idle_ttl=0 after a pause
+        Expected Output: Least recently used session evicted; idle session gone
+        Tests: LRU/TTL eviction
+        """
+        queues = PlaybackQueueManager(spotify_service, prefetch_size=5, low_watermark=2, max_queues=2)
+        queues.start('u1', 'happy')
+        queues.start('u2', 'happy')
+        queues.get_state('u1')  # u1 used more recently than u2
+        queues.start('u3', 'happy')
+
+        assert list(queues.queues) == ['u1', 'u3']
+
+        queues.idle_ttl = 0
+        time.sleep(0.01)
+        assert queues.get_state('u1') is None
+        assert 'u1' not in queues.queues
+        print("✅ Test 6 PASSED: Idle and excess queues evicted")
+
+    def test_prefetch_limit_bounded_by_history(self, spotify_service):
+        """
+        Test Case 7: Bounded Prefetch Query
+
+        Purpose: Verify the refill LIMIT does not grow with the number of tracks played
+        Input: prefetch 5, history 10; 200 tracks played in one session
+        Expected Output: Every fetch LIMIT <= 5 + 5 queued + 10 played; played count still 200
+        Tests: Played-history cap
+        """
+        queues = PlaybackQueueManager(spotify_service, prefetch_size=5, low_watermark=2, history_size=10)
+        queues._spawn = lambda target, *args: target(*args)
+        queues.start('u1', 'happy')
+        for _ in range(200):
+            assert queues.next_track('u1') is not None
+
+        limits = [c.args[1] for c in spotify_service.get_songs_for_mood.call_args_list]
+        assert max(limits) <= 5 + 5 + 10
+        assert queues.get_state('u1')['played'] == 200
+        print("✅ Test 7 PASSED: Prefetch limit bounded by the played history")
+
+    def test_queue_shared_across_workers(self, spotify_service):
+        """
+        Test Case 8: Queue Shared Through Redis
+
+        Purpose: Verify any worker can serve a session's queue when it is stored in Redis
+        Input: Worker A starts the queue; worker B pops and refills; A changes the mood; B stops it
+        Expected Output: B pops A's first track; A sees B's play count; B serves the re-ranked mood;
+                         the queue is gone for both after stop
+        Tests: Cross-process playback queue
+        """
+        client = shared_redis()
+        workers = []
+        for _ in range(2):
+            manager = PlaybackQueueManager(spotify_service, prefetch_size=5, low_watermark=2,
+                                           redis_url='redis://redis:6379/1')
+            manager._redis = client
+            manager._spawn = lambda target, *args: target(*args)
+            workers.append(manager)
+        worker_a, worker_b = workers
+
+        worker_a.start('u1', 'happy', 7)
+        played = [worker_b.next_track('u1')['spotify_song_id'] for _ in range(4)]
+        state = worker_a.get_state('u1', preview=10)
+
+        assert played == ['happy0', 'happy1', 'happy2', 'happy3']
+        assert state['played'] == 4 and state['queued'] == 5
+        assert not {t['spotify_song_id'] for t in state['upcoming']} & set(played)
+        assert not worker_a.queues and not worker_b.queues
+
+        assert worker_a.set_mood('u1', 'calm')
+        assert worker_b.next_track('u1')['spotify_song_id'].startswith('calm')
+        assert spotify_service.get_songs_for_mood.call_args.args[2] == 7
+
+        worker_b.stop('u1')
+        assert worker_a.get_state('u1') is None
+        print("✅ Test 8 PASSED: Queue served by any worker through Redis")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
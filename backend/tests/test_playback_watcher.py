@@ -0,0 +1,168 @@
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.playback_watcher import playback_watcher, PlaybackWatcher, next_interval, has_changed
+from app import app, socketio
+
+
+def make_playback(is_playing=True, track_id='t1', progress_ms=10000, duration_ms=200000):
+    return {
+        'is_playing': is_playing,
+        'track': {'id': track_id, 'title': 'Song', 'duration_ms': duration_ms, 'progress_ms': progress_ms}
+    }
+
+
+class TestPlaybackWatcher:
+    """Unit tests for Playback Watcher module"""
+
+    def test_adaptive_interval(self):
+        """
+        Test Case 1: Adaptive Poll Interval
+
+        Purpose: Verify polling is slower when paused, timed to the track end, and backs off on errors
+        Input: Paused, playing mid-track, playing 2s before the end, 1 and 10 failures
+        Expected Output: 15s, 5s, 2.5s, 10s, capped at 60s
+        Tests: next_interval()
+        """
+        assert next_interval(None) == 15
+        assert next_interval(make_playback(is_playing=False)) == 15
+        assert next_interval(make_playback()) == 5
+        assert next_interval(make_playback(progress_ms=198000)) == 2.5
+        assert next_interval(make_playback(), failures=1) == 10
+        assert next_interval(make_playback(), failures=10) == 60
+        print("✅ Test 1 PASSED: Poll interval adapts to playback")
+
+    def test_change_detection(self):
+        """
+        Test Case 2: Change Detection
+
+        Purpose: Verify only changes clients cannot predict are pushed
+        Input: Same track 5s later, a seek, a pause, a new track
+        Expected Output: Only the seek, pause and new track count as changes
+        Tests: has_changed()
+        """
+        previous = make_playback(progress_ms=10000)
+
+        assert not has_changed(previous, make_playback(progress_ms=15000), 5.0)
+        assert has_changed(previous, make_playback(progress_ms=90000), 5.0)
+        assert has_changed(previous, make_playback(is_playing=False, progress_ms=15000), 5.0)
+        assert has_changed(previous, make_playback(track_id='t2', progress_ms=0), 5.0)
+        assert not has_changed(None, None, 5.0)
+        print("✅ Test 2 PASSED: Only unpredictable changes pushed")
+
+    def test_one_poller_shared_by_tabs(self):
+        """
+        Test Case 3: Shared Watcher
+
+        Purpose: Verify two tabs of one user share one poller and /current is served from it
+        Input: Two sockets for user_w send 'watch_playback'; GET /api/music/current
+        Expected Output: Both sockets receive 'playback_state'; Spotify fetched once; /current skips Spotify
+        Tests: Server-pushed playback state
+        """
+        app.config['TESTING'] = True
+        fetch = Mock(return_value=(make_playback(), {'access_token': 't', 'expires_at': 9999999999}))
+
+        def user_socket():
+            http_client = app.test_client()
+            with http_client.session_transaction() as sess:
+                sess['user_id'] = 'user_w'
+                sess['spotify_token_info'] = {'access_token': 't', 'expires_at': 9999999999}
+            return http_client, socketio.test_client(app, flask_test_client=http_client)
+
+        with patch.object(playback_watcher, '_fetch', fetch), \
+                patch('routes.music_routes.spotify_service.get_current_playback') as mock_live:
+            http_client, tab1 = user_socket()
+            _, tab2 = user_socket()
+            tab1.emit('watch_playback')
+            tab2.emit('watch_playback')
+
+            def states(sock):
+                return [r for r in sock.get_received() if r['name'] == 'playback_state']
+
+            received1, received2 = [], []
+            for _ in range(100):
+                received1 += states(tab1)
+                received2 += states(tab2)
+                if received1 and received2:
+                    break
+                time.sleep(0.02)
+
+            response = http_client.get('/api/music/current')
+
+            tab1.disconnect()
+            tab2.disconnect()
+            for _ in range(100):
+                if 'user_w' not in playback_watcher._watches:
+                    break
+                time.sleep(0.02)
+
+        assert received1[0]['args'][0]['playback']['track']['id'] == 't1'
+        assert received2
+        assert fetch.call_count == 1
+        assert response.get_json()['playback']['track']['id'] == 't1'
+        mock_live.assert_not_called()
+        assert 'user_w' not in playback_watcher._watches
+        print("✅ Test 3 PASSED: One watcher served every tab and /current")
+
+    def test_state_shared_with_workers_without_lease(self):
+        """
+        Test Case 4: State Across Workers
+
+        Purpose: Verify a tab on a worker without the lease still gets the current state
+        Input: Workers A and B share a (fake) Redis; A polls user u1, then a tab subscribes on B
+        Expected Output: B sends A's state to the new tab and snapshot() on B returns it; only A polls
+        Tests: Playback state stored next to the lease
+        """
+        store = {}
+
+        def fake_set(key, value, nx=False, ex=None):
+            if nx and key in store:
+                return None
+            store[key] = value.encode() if isinstance(value, str) else value
+            return True
+
+        shared = Mock()
+        shared.set.side_effect = fake_set
+        shared.get.side_effect = store.get
+        shared.delete.side_effect = lambda key: store.pop(key, None)
+
+        def make_worker():
+            worker = PlaybackWatcher('redis://redis:6379/1')
+            worker._redis = shared
+            sock = Mock()
+            sock.start_background_task.side_effect = \
+                lambda target, *args: threading.Thread(target=target, args=args, daemon=True).start()
+            fetch = Mock(return_value=(make_playback(track_id='t9'), {'access_token': 't'}))
+            worker.init_app(sock, fetch, lambda user_id: f'user:{user_id}')
+            return worker, sock, fetch
+
+        worker_a, socket_a, fetch_a = make_worker()
+        worker_b, socket_b, fetch_b = make_worker()
+
+        worker_a.subscribe('u1', 'sid-a', {'access_token': 't'})
+        for _ in range(100):
+            if socket_a.emit.called:
+                break
+            time.sleep(0.02)
+        worker_b.subscribe('u1', 'sid-b', {'access_token': 't'})
+        snapshot = worker_b.snapshot('u1')
+
+        worker_a.unsubscribe('sid-a')
+        worker_b.unsubscribe('sid-b')
+
+        sent = [c for c in socket_b.emit.call_args_list if c.kwargs.get('to') == 'sid-b']
+        assert sent and sent[0].args[1]['playback']['track']['id'] == 't9'
+        assert snapshot['playback']['track']['id'] == 't9'
+        assert fetch_a.call_count == 1
+        fetch_b.assert_not_called()
+        print("✅ Test 4 PASSED: Workers without the lease serve the shared state")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
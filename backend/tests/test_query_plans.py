@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.database import execute_query, get_db_connection
+
+
+def _explain(query, params=()):
+    return execute_query(f"EXPLAIN {query}", params, fetch=True)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def migrated_database():
+    """Skip unless a database with migration 003 applied is reachable"""
+    try:
+        conn = get_db_connection()
+        conn.close()
+        rows = execute_query("SELECT MAX(version) AS version FROM schema_migrations", fetch=True)
+    except Exception as e:
+        pytest.skip(f"Database not available for query plan checks: {e}")
+    if not rows or (rows[0]['version'] or 0) < 3:
+        pytest.skip("Migration 003 not applied (flask --app app db-migrate)")
+
+
+class TestQueryPlans:
+    """Query plan checks for hot-path queries (need a migrated database)"""
+
+    def test_sync_status_uses_unique_key(self):
+        """
+        Test Case 1: Sync Status Plan
+
+        Purpose: Verify /sync/status counts from uq_user_song without touching rows
+        Input: EXPLAIN of the sync status query
+        Expected Output: key = uq_user_song, 'Using index'
+        Tests: Covering index on user_songs
+        """
+        plan = _explain("SELECT COUNT(DISTINCT song_id) FROM user_songs WHERE user_id = %s", (1,))
+
+        assert plan[0]['key'] == 'uq_user_song'
+        assert 'Using index' in (plan[0]['Extra'] or '')
+        print("✅ Test 1 PASSED: Sync status served from uq_user_song")
+
+    def test_recommendation_join_uses_indexes(self):
+        """
+        Test Case 2: Recommendation Plan
+
+        Purpose: Verify the user recommendation query never scans user_songs or songs
+        Input: EXPLAIN of the get_songs_for_mood query
+        Expected Output: No table accessed with type ALL
+        Tests: Join index usage
+        """
+        plan = _explain("""
+            SELECT s.* FROM songs s
+            INNER JOIN user_songs us ON s.song_id = us.song_id
+            WHERE us.user_id = %s
+            AND s.valence BETWEEN %s AND %s
+            AND s.energy BETWEEN %s AND %s
+            AND s.tempo BETWEEN %s AND %s
+        """, (1, 0.6, 1.0, 0.5, 1.0, 100, 180))
+
+        assert all(row['type'] != 'ALL' for row in plan)
+        print("✅ Test 2 PASSED: Recommendation join uses indexes")
+
+    def test_history_page_is_covered(self):
+        """
+        Test Case 3: History Plan
+
+        Purpose: Verify a /history page is read from the covering index in order
+        Input: EXPLAIN of the keyset history query
+        Expected Output: key = idx_user_timestamp_covering, no filesort
+        Tests: Covering index on mood_sessions
+        """
+        plan = _explain("""
+            SELECT session_id, detected_mood, confidence_score, timestamp
+            FROM mood_sessions
+            WHERE user_id = %s
+            ORDER BY timestamp DESC, session_id DESC
+            LIMIT %s
+        """, (1, 11))
+
+        assert plan[0]['key'] == 'idx_user_timestamp_covering'
+        assert 'filesort' not in (plan[0]['Extra'] or '')
+        print("✅ Test 3 PASSED: History page served from covering index")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.query_stats import QueryStats, fingerprint, start_request, request_totals, end_request
+
+
+class TestQueryStats:
+    """Unit tests for Query Stats module"""
+
+    def test_fingerprint_normalizes_literals_and_lists(self):
+        """
+        Test Case 1: Query Fingerprints
+
+        Purpose: Verify executions of the same statement share one fingerprint
+        Input: Statements differing only in literals, IN list length and whitespace
+        Expected Output: Identical fingerprints
+        Tests: Query normalization
+        """
+        a = fingerprint("SELECT * FROM songs WHERE song_id IN (%s, %s)  AND title = 'A'")
+        b = fingerprint("SELECT * FROM songs\n WHERE song_id IN (%s, %s, %s, %s) AND title = 'B'")
+        c = fingerprint("DELETE FROM user_songs WHERE user_id = 42")
+
+        assert a == b == "SELECT * FROM songs WHERE song_id IN (...) AND title = ?"
+        assert c == "DELETE FROM user_songs WHERE user_id = ?"
+        print("✅ Test 1 PASSED: Fingerprints normalized")
+
+    def test_record_aggregates_and_logs_slow_queries(self, capsys):
+        """
+        Test Case 2: Aggregation and Slow Query Log
+
+        Purpose: Verify totals, histogram buckets and the slow query log
+        Input: Two executions of one statement, one over the 100 ms threshold
+        Expected Output: count=2, rows summed, one bucket each, one slow query log line
+        Tests: Statement timing aggregation
+        """
+        stats = QueryStats(slow_query_ms=100)
+        stats.record("SELECT * FROM songs WHERE song_id = 1", 0.002, rows=1, wait_time=0.01)
+        stats.record("SELECT * FROM songs WHERE song_id = 2", 0.3, rows=1)
+
+        snapshot = stats.snapshot()
+        assert len(snapshot) == 1
+        assert snapshot[0]['count'] == 2
+        assert snapshot[0]['rows'] == 2
+        assert snapshot[0]['time_max'] == 0.3
+        assert snapshot[0]['pool_wait_total'] == 0.01
+        assert sum(snapshot[0]['buckets']) == 2
+
+        output = capsys.readouterr().out
+        assert output.count('Slow query') == 1
+        print("✅ Test 2 PASSED: Statement timings aggregated")
+
+    def test_request_totals(self):
+        """
+        Test Case 3: Per-Request Database Time
+
+        Purpose: Verify database time is accumulated only while a request is active
+        Input: Two statements inside start_request()/end_request(), one after
+        Expected Output: Totals cover the two statements and pool waits
+        Tests: X-DB-Time accounting
+        """
+        stats = QueryStats(slow_query_ms=1000)
+        start_request()
+        stats.record("SELECT 1", 0.01)
+        stats.record("SELECT 2", 0.02, wait_time=0.005)
+        totals = request_totals()
+        end_request()
+        stats.record("SELECT 3", 0.5)
+
+        assert totals['queries'] == 2
+        assert totals['time'] == pytest.approx(0.035)
+        assert request_totals() is None
+        print("✅ Test 3 PASSED: Request database time accumulated")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+import gc
+import time
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.spotify_clients import SpotifyClientCache
+
+
+def make_token(name, expires_in=3600):
+    return {'access_token': name, 'expires_at': int(time.time()) + expires_in}
+
+
+class TestSpotifyClients:
+    """Unit tests for Spotify Client Cache module"""
+
+    def test_clients_reused_per_user_and_token(self):
+        """
+        Test Case 1: Client Reuse
+
+        Purpose: Verify a user's client is reused until their token changes or expires
+        Input: Same token twice, a refreshed token, an expired token
+        Expected Output: Same client, then new clients; all on one shared session
+        Tests: Cache keying and expiry
+        """
+        cache = SpotifyClientCache(max_size=10, pool_size=5, api_url='')
+        token = make_token('a')
+
+        first = cache.get(token, 'user1')
+        assert cache.get(token, 'user1') is first
+
+        refreshed = cache.get(make_token('b'), 'user1')
+        assert refreshed is not first
+        assert cache.stats()['size'] == 1
+
+        expired = make_token('c', expires_in=-1)
+        assert cache.get(expired, 'user2') is not cache.get(expired, 'user2')
+
+        assert first._session is cache.session and refreshed._session is cache.session
+        print("✅ Test 1 PASSED: Clients reused per user and token")
+
+    def test_bounded_and_session_survives_eviction(self):
+        """
+        Test Case 2: Eviction
+
+        Purpose: Verify the cache is bounded and evicted clients don't close the shared session
+        Input: 3 users in a cache of size 2, evicted client garbage collected
+        Expected Output: Oldest user evicted; session adapters still mounted and pooled
+        Tests: LRU bound, shared session lifetime
+        """
+        cache = SpotifyClientCache(max_size=2, pool_size=7, api_url='')
+        cache.session.close = Mock()
+        cache.get(make_token('a'), 'user1')
+        cache.get(make_token('b'), 'user2')
+        cache.get(make_token('c'), 'user3')
+
+        assert cache.stats()['size'] == 2
+        assert 'user1' not in cache._clients
+        gc.collect()
+        cache.session.close.assert_not_called()
+
+        adapter = cache.session.get_adapter('https://api.spotify.com/v1/')
+        assert adapter._pool_maxsize == 7
+        assert adapter.max_retries.status_forcelist == (429, 500, 502, 503, 504)
+        print("✅ Test 2 PASSED: Cache bounded, session shared")
+
+    def test_client_without_user_not_cached(self):
+        """
+        Test Case 3: Uncached Login Client
+
+        Purpose: Verify a client requested without a user ID (login callback) is not cached
+        Input: get() twice with the same token and no user_id
+        Expected Output: Two distinct clients on the shared session; cache stays empty
+        Tests: No dead cache entries keyed by access token
+        """
+        cache = SpotifyClientCache(max_size=10, pool_size=5, api_url='')
+        token = make_token('login')
+
+        first = cache.get(token)
+        second = cache.get(token)
+
+        assert first is not second
+        assert first._session is cache.session
+        assert cache.stats()['size'] == 0
+        print("✅ Test 3 PASSED: Login client built without caching")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
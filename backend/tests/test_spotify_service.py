@@ -1,11 +1,15 @@
 import pytest
 import sys
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, MagicMock, patch
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from services.spotify_service import SpotifyService
+from services.device_cache import device_cache, DeviceCache
+from services.spotify_clients import spotify_clients
+from loadtest.fakes import FakeSpotify, track_id
+from spotipy.exceptions import SpotifyException
 
 
 class TestSpotifyService:
@@ -108,7 +112,7 @@ class TestSpotifyService:
         ]
         
         # Get songs for happy mood
-        songs = spotify_service.get_songs_for_mood('happy', 10, 'test_user')
+        songs = spotify_service.get_songs_for_mood('happy', 10, 1)
         
         # Verify query was called
         assert mock_query.called
@@ -125,6 +129,205 @@ class TestSpotifyService:
         
         print("✅ Test 5 PASSED: Query constructed with correct mood parameters")
 
+    
+    @patch('services.spotify_service.mood_registry.get_mood_id')
+    @patch('services.spotify_service.transaction')
+    def test_store_track_batch_single_transaction(self, mock_transaction, mock_mood_id, spotify_service):
+        """
+        Test Case 6: Batched Track Storage
+        
+        Purpose: Verify a sync batch is written with bulk statements in one transaction
+        Input: Two tracks, one without audio features
+        Expected Output: One songs executemany, one user_songs executemany for the classified track
+        Tests: Unit-of-work sync writes
+        """
+        tx = MagicMock()
+        mock_transaction.return_value.__enter__.return_value = tx
+        tx.fetchall.return_value = [{'song_id': 11, 'spotify_song_id': 'track_a'}]
+        mock_mood_id.return_value = 1
+        
+        batch = [
+            {'spotify_song_id': 'track_a', 'title': 'A', 'artist': 'X', 'album': 'Y',
+             'duration_ms': 1000, 'valence': 0.8, 'energy': 0.7, 'tempo': 130},
+            {'spotify_song_id': 'track_b', 'title': 'B', 'artist': 'X', 'album': 'Y',
+             'duration_ms': 1000, 'valence': None, 'energy': None, 'tempo': None}
+        ]
+        spotify_service._store_track_batch(batch, 7)
+        
+        assert mock_transaction.call_count == 1
+        assert tx.executemany.call_count == 2
+        songs_rows = tx.executemany.call_args_list[0][0][1]
+        user_song_rows = tx.executemany.call_args_list[1][0][1]
+        assert len(songs_rows) == 2
+        assert user_song_rows == [(7, 11, 1)]
+        mock_mood_id.assert_called_once_with('happy')
+        print("✅ Test 6 PASSED: Sync batch stored in one transaction")
+
+    def test_play_track_reuses_remembered_device(self, spotify_service):
+        """
+        Test Case 7: Remembered Playback Device
+        
+        Purpose: Verify only the first play lists devices; later plays start directly
+        Input: Two play_track() calls without device_id for the same user
+        Expected Output: devices() called once (active device chosen), start_playback twice
+        Tests: Device cache
+        """
+        device_cache.invalidate('device_user')
+        sp_client = Mock()
+        sp_client.devices.return_value = {'devices': [
+            {'id': 'phone', 'is_active': False},
+            {'id': 'laptop', 'is_active': True}
+        ]}
+        
+        assert spotify_service.play_track('t1', sp_client=sp_client, user_id='device_user')['success']
+        assert spotify_service.play_track('t2', sp_client=sp_client, user_id='device_user')['success']
+        
+        assert sp_client.devices.call_count == 1
+        assert sp_client.start_playback.call_count == 2
+        assert sp_client.start_playback.call_args[1]['device_id'] == 'laptop'
+        print("✅ Test 7 PASSED: Remembered device reused")
+
+    def test_play_track_retries_when_device_gone(self, spotify_service):
+        """
+        Test Case 8: Vanished Device Retry
+        
+        Purpose: Verify a 404 device error invalidates the remembered device and retries once
+        Input: Remembered 'old' device; start_playback fails with 404 Device not found, then succeeds
+        Expected Output: Devices listed, playback started on the new device, which is remembered
+        Tests: Device cache invalidation
+        """
+        device_cache.remember('gone_user', 'old')
+        sp_client = Mock()
+        sp_client.devices.return_value = {'devices': [{'id': 'new', 'is_active': True}]}
+        sp_client.start_playback.side_effect = [
+            SpotifyException(404, -1, 'Device not found', reason='DEVICE_NOT_FOUND'),
+            None
+        ]
+        
+        result = spotify_service.play_track('t1', sp_client=sp_client, user_id='gone_user')
+        
+        assert result['success']
+        assert [c[1]['device_id'] for c in sp_client.start_playback.call_args_list] == ['old', 'new']
+        assert device_cache.get('gone_user') == 'new'
+        print("✅ Test 8 PASSED: Vanished device replaced after one retry")
+
+    def test_create_playlist_uploads_all_tracks_in_order(self, spotify_service):
+        """
+        Test Case 9: Chunked Playlist Upload
+        
+        Purpose: Verify more than 100 tracks are uploaded, in order, in 100-item chunks
+        Input: 250 track IDs for a mood the user has no playlist for
+        Expected Output: New playlist; three add calls of 100, 100 and 50 tracks in order
+        Tests: create_mood_playlist() chunking
+        """
+        sp_client = Mock()
+        sp_client.current_user_playlists.return_value = {'items': [], 'next': None}
+        sp_client.user_playlist_create.return_value = {
+            'id': 'pl1', 'external_urls': {'spotify': 'https://open.spotify.com/playlist/pl1'}
+        }
+        track_ids = [f't{i}' for i in range(250)]
+        
+        result = spotify_service.create_mood_playlist('u1', 'happy', track_ids, sp_client)
+        
+        chunks = [c[0][1] for c in sp_client.playlist_add_items.call_args_list]
+        assert result['success'] and result['created']
+        assert result['added'] == 250 and result['removed'] == 0
+        assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+        assert sum(chunks, []) == [f'spotify:track:{tid}' for tid in track_ids]
+        sp_client.playlist_replace_items.assert_not_called()
+        print("✅ Test 9 PASSED: All 250 tracks uploaded in order")
+    
+    def test_create_playlist_updates_existing_in_place(self, spotify_service):
+        """
+        Test Case 10: In-Place Playlist Update
+        
+        Purpose: Verify a repeat call edits the user's MoodDJ playlist instead of making another
+        Input: Fake Spotify; 150 happy tracks, then tracks 50-279, then the same set reversed
+        Expected Output: One playlist; 50 removed / 130 added, then rewritten in the new order
+        Tests: create_mood_playlist() diffing against a real spotipy client
+        """
+        spotify = FakeSpotify().start()
+        try:
+            with patch.object(spotify_clients, 'api_url', f'{spotify.url}/v1'):
+                sp_client = spotify_service.create_spotify_client(
+                    {'access_token': 'fake-token-dj_alice', 'expires_at': 9999999999})
+                first = spotify_service.create_mood_playlist(
+                    'dj_alice', 'happy', [track_id(i) for i in range(150)], sp_client)
+                second = spotify_service.create_mood_playlist(
+                    'dj_alice', 'happy', [track_id(i) for i in range(50, 280)], sp_client)
+                reordered = [track_id(i) for i in reversed(range(50, 280))]
+                third = spotify_service.create_mood_playlist('dj_alice', 'happy', reordered, sp_client)
+                playlists = sp_client.current_user_playlists()['items']
+                uris = spotify_service._playlist_uris(sp_client, first['playlist_id'])
+        finally:
+            spotify.stop()
+        
+        assert first['created'] and first['added'] == 150
+        assert not second['created'] and second['playlist_id'] == first['playlist_id']
+        assert (second['added'], second['removed']) == (130, 50)
+        assert (third['added'], third['removed']) == (0, 0)
+        assert len(playlists) == 1
+        assert uris == [f'spotify:track:{tid}' for tid in reordered]
+        print("✅ Test 10 PASSED: Existing playlist diffed and updated in place")
+    
+    def test_create_client_does_not_refresh(self, spotify_service):
+        """
+        Test Case 11: No Refresh in Client Creation
+        
+        Purpose: Verify create_spotify_client leaves refreshing to the token manager
+        Input: Expired token passed straight to create_spotify_client
+        Expected Output: No refresh call; client built for the token as given
+        Tests: Single refresh path (get_valid_token)
+        """
+        token_info = {'access_token': 'stale', 'refresh_token': 'r', 'expires_at': 1}
+        with patch.object(spotify_service, 'refresh_access_token') as mock_refresh, \
+                patch.object(spotify_clients, 'get') as mock_get:
+            spotify_service.create_spotify_client(token_info, 'u1')
+        
+        mock_refresh.assert_not_called()
+        mock_get.assert_called_once_with(token_info, 'u1')
+        print("✅ Test 11 PASSED: Client creation does not refresh tokens")
+    
+    def test_oauth_manager_keeps_no_tokens(self, spotify_service):
+        """
+        Test Case 12: No Shared Token Cache
+        
+        Purpose: Verify the shared OAuth manager never hands one user's token to another
+        Input: Save a token through the manager's cache handler
+        Expected Output: get_cached_token() still returns None
+        Tests: Per-user token isolation
+        """
+        oauth = spotify_service.get_oauth_manager()
+        oauth.cache_handler.save_token_to_cache({'access_token': 'alice', 'expires_at': 9999999999})
+        
+        assert oauth.cache_handler.get_cached_token() is None
+        print("✅ Test 12 PASSED: OAuth manager keeps no tokens")
+
+    
+    def test_device_cache_shared_across_workers(self):
+        """
+        Test Case 13: Shared Device Cache
+        
+        Purpose: Verify a device remembered by one worker is used by another
+        Input: Two DeviceCaches sharing one (fake) Redis; remember on A, invalidate on B
+        Expected Output: B returns A's device; after B invalidates, A no longer has it
+        Tests: Cross-process device cache
+        """
+        store = {}
+        shared = Mock()
+        shared.set.side_effect = lambda key, value, ex=None: store.__setitem__(key, value.encode())
+        shared.get.side_effect = store.get
+        shared.delete.side_effect = lambda key: store.pop(key, None)
+        worker_a = DeviceCache(ttl=60, redis_url='redis://redis:6379/1')
+        worker_b = DeviceCache(ttl=60, redis_url='redis://redis:6379/1')
+        worker_a._redis = worker_b._redis = shared
+        
+        worker_a.remember('shared_user', 'speaker')
+        assert worker_b.get('shared_user') == 'speaker'
+        
+        worker_b.invalidate('shared_user')
+        assert worker_a.get('shared_user') is None
+        print("✅ Test 13 PASSED: Device cache shared across workers")
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
\ No newline at end of file
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.user_resolver import UserResolver
+
+
+class TestUserResolver:
+    """Unit tests for User Resolver module"""
+
+    @patch('services.user_resolver.execute_query')
+    def test_resolves_once_then_caches(self, mock_query):
+        """
+        Test Case 1: Cached Resolution
+
+        Purpose: Verify a Spotify ID is looked up once and then served from memory
+        Input: Two resolve() calls for the same Spotify ID
+        Expected Output: Same internal ID, one database query
+        Tests: LRU caching
+        """
+        mock_query.return_value = [{'user_id': 42}]
+        resolver = UserResolver(max_size=10)
+
+        assert resolver.resolve('spotify_user') == 42
+        assert resolver.resolve('spotify_user') == 42
+        assert mock_query.call_count == 1
+        assert resolver.stats()['hits'] == 1
+        print("✅ Test 1 PASSED: User ID cached after first lookup")
+
+    @patch('services.user_resolver.execute_query')
+    def test_unknown_users_and_eviction(self, mock_query):
+        """
+        Test Case 2: Unknown Users and Eviction
+
+        Purpose: Verify unknown users are not cached and the least recently used entry is evicted
+        Input: Lookup of a missing user; three remembered users with max_size=2
+        Expected Output: None for the missing user; oldest mapping evicted
+        Tests: Cache bounds
+        """
+        mock_query.return_value = []
+        resolver = UserResolver(max_size=2)
+
+        assert resolver.resolve('missing') is None
+        assert resolver.resolve('missing') is None
+        assert mock_query.call_count == 2
+
+        resolver.remember('a', 1)
+        resolver.remember('b', 2)
+        resolver.resolve('a')  # 'a' becomes most recently used
+        resolver.remember('c', 3)
+
+        assert resolver.stats()['size'] == 2
+        assert resolver.resolve('a') == 1
+        assert resolver.resolve('b') is None  # evicted, and missing from the mocked table
+        print("✅ Test 2 PASSED: Unknown users skipped, LRU eviction works")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
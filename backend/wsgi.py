@@ -0,0 +1,20 @@
+"""
+Production entry point
+
+Run with gunicorn using gunicorn.conf.py:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The worker type follows SOCKETIO_ASYNC_MODE ('threading' -> gthread,
+'eventlet' -> eventlet). Eventlet must patch the standard library before
+anything else is imported, so this module does it first.
+"""
+
+import os
+
+if os.getenv('SOCKETIO_ASYNC_MODE', 'threading') == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+
+from app import app, socketio  # noqa: E402
+
+__all__ = ['app', 'socketio']
@@ -7,12 +7,53 @@ import SkipPreviousIcon from '@mui/icons-material/SkipPrevious';
 import MusicNoteIcon from '@mui/icons-material/MusicNote';
 import useStore from '../../store/useStore';
 import { musicService } from '../../services/musicService';
+import websocketService from '../../services/websocket';
 
 function MusicPlayer() {
   const { currentMood, currentTrack, isPlaying, playlist, setCurrentTrack, setIsPlaying, setPlaylist } = useStore();
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [currentIndex, setCurrentIndex] = useState(0);
+  const [progress, setProgress] = useState(null); // { progressMs, durationMs, receivedAt }
+  const [now, setNow] = useState(Date.now());
+
+  // Playback state is pushed by the server's per-user watcher (no polling)
+  useEffect(() => {
+    const handlePlaybackState = (state) => {
+      const playback = state && state.playback;
+      if (!playback || !playback.track) {
+        setProgress(null);
+        if (state && state.playback === null) {
+          setIsPlaying(false);
+        }
+        return;
+      }
+      setIsPlaying(playback.is_playing);
+      setCurrentTrack({
+        id: playback.track.id,
+        title: playback.track.title,
+        artist: playback.track.artist,
+        album: playback.track.album,
+      });
+      setProgress({
+        progressMs: playback.track.progress_ms,
+        durationMs: playback.track.duration_ms,
+        receivedAt: Date.now(),
+      });
+    };
+
+    websocketService.watchPlayback(handlePlaybackState);
+    return () => websocketService.unwatchPlayback();
+  }, [setCurrentTrack, setIsPlaying]);
+
+  // Advance the progress bar locally between pushes
+  useEffect(() => {
+    if (!isPlaying || !progress) {
+      return undefined;
+    }
+    const timer = setInterval(() => setNow(Date.now()), 1000);
+    return () => clearInterval(timer);
+  }, [isPlaying, progress]);
 
   // Fetch recommendations when mood changes
   useEffect(() => {
@@ -106,6 +147,10 @@ function MusicPlayer() {
     }
   };
 
+  const progressPercent = progress && progress.durationMs
+    ? Math.min(100, ((progress.progressMs + (isPlaying ? Math.max(0, now - progress.receivedAt) : 0)) / progress.durationMs) * 100)
+    : 0;
+
   const displayTrack = currentTrack || {
     title: 'No track playing',
     artist: 'Start mood detection to play music',
@@ -178,7 +223,7 @@ function MusicPlayer() {
           <Box sx={{ mb: 3 }}>
             <LinearProgress
               variant="determinate"
-              value={isPlaying ? 50 : 0}
+              value={progressPercent}
               sx={{
                 height: 6,
                 borderRadius: 3,
@@ -81,9 +81,11 @@ function VideoFeed() {
     setIsActive(false);
     setIsDetecting(false);
     
-    // Disconnect WebSocket
+    // Disconnect WebSocket (kept open while the player is receiving playback state)
     websocketService.stopDetection();
-    websocketService.disconnect();
+    if (!websocketService.isWatchingPlayback()) {
+      websocketService.disconnect();
+    }
   };
 
   const handleUserMediaError = (err) => {
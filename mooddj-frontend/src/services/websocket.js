@@ -6,6 +6,7 @@ class WebSocketService {
   constructor() {
     this.socket = null;
     this.isConnected = false;
+    this.playbackCallback = null;
   }
 
   connect() {
@@ -14,7 +15,8 @@ class WebSocketService {
     }
 
     this.socket = io(WS_URL, {
-      transports: ['websocket', 'polling'],
+      transports: ['websocket'], // any backend worker can hold the socket; polling would need sticky sessions
+      withCredentials: true, // send the session cookie so the server can join the user's room
       reconnection: true,
       reconnectionAttempts: 5,
       reconnectionDelay: 1000,
@@ -22,12 +24,23 @@ class WebSocketService {
 
     this.socket.on('connect', () => {
       this.isConnected = true;
+      // Re-subscribe after a reconnect (the server forgets the old socket)
+      if (this.playbackCallback) {
+        this.socket.emit('watch_playback', {});
+      }
     });
 
     this.socket.on('disconnect', () => {
       this.isConnected = false;
     });
 
+    // One listener per socket; watchPlayback/unwatchPlayback only swap the callback
+    this.socket.on('playback_state', (state) => {
+      if (this.playbackCallback) {
+        this.playbackCallback(state);
+      }
+    });
+
     this.socket.on('connection_response', () => {
       // Connection established
     });
@@ -71,6 +84,26 @@ class WebSocketService {
     }
   }
 
+  // Receive 'playback_state' pushes instead of polling /api/music/current
+  watchPlayback(callback) {
+    this.playbackCallback = callback;
+    this.connect();
+    if (this.isConnected) {
+      this.socket.emit('watch_playback', {});
+    }
+  }
+
+  unwatchPlayback() {
+    this.playbackCallback = null;
+    if (this.socket && this.isConnected) {
+      this.socket.emit('unwatch_playback', {});
+    }
+  }
+
+  isWatchingPlayback() {
+    return Boolean(this.playbackCallback);
+  }
+
   getSocket() {
     return this.socket;
   }